@@ -0,0 +1,102 @@
+import math
+import random
+import time
+from collections import Counter, OrderedDict, deque
+from typing import List, Tuple
+
+# TTL reasons reported in stats
+COLD = "cold"                # too few reads to judge: the TTL the caller asked for
+READ_MOSTLY = "read-mostly"  # written rarely or never: held longer
+VOLATILE = "volatile"        # written often: held about until the next write
+
+class AdaptiveTTL:
+    """Per-key TTLs adapted to the read and write rates this worker observes, with jitter"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        min_ttl: int = 60,
+        max_ttl: int = 86400,
+        max_stretch: float = 2.0,
+        jitter: float = 0.1,
+        half_life: float = 600.0,
+        min_reads: float = 3.0,
+        max_keys: int = 10000
+    ):
+        self.enabled = enabled
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.max_stretch = max_stretch
+        self.jitter = jitter
+        self.half_life = half_life
+        self.min_reads = min_reads
+        self.max_keys = max_keys
+        # key -> [decayed reads, decayed writes, monotonic time of last update]
+        self._keys: "OrderedDict[str, List[float]]" = OrderedDict()
+
+        # Per-worker statistics: decisions by reason and the latest ones
+        self.decisions: Counter = Counter()
+        self.recent: deque = deque(maxlen=20)
+
+    def _entry(self, key: str) -> List[float]:
+        """The key's counters decayed to now, tracking it if new"""
+        now = time.monotonic()
+        entry = self._keys.get(key)
+        if entry is None:
+            entry = self._keys[key] = [0.0, 0.0, now]
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            decay = 0.5 ** ((now - entry[2]) / self.half_life)
+            entry[0] *= decay
+            entry[1] *= decay
+            entry[2] = now
+            self._keys.move_to_end(key)
+        return entry
+
+    def record_read(self, key: str):
+        """Count a read of a key (hit or miss)"""
+        if self.enabled:
+            self._entry(key)[0] += 1
+
+    def record_write(self, key: str):
+        """Count a write or invalidation of a key"""
+        if self.enabled:
+            self._entry(key)[1] += 1
+
+    def choose(self, key: str, expire: int) -> Tuple[int, str]:
+        """TTL before jitter for a key the caller would store for `expire` seconds, and why"""
+        entry = self._entry(key)
+        reads, writes = entry[0], entry[1]
+        if reads < self.min_reads:
+            return expire, COLD
+        longest = max(expire, int(min(self.max_ttl, expire * self.max_stretch)))
+        if writes < 0.1:
+            return longest, READ_MOSTLY
+        # A decayed count n stands for a rate of n * ln 2 / half_life per second
+        until_next_write = self.half_life / (writes * math.log(2))
+        ttl = int(min(longest, max(self.min_ttl, until_next_write)))
+        return ttl, VOLATILE if ttl < expire else READ_MOSTLY
+
+    def ttl(self, key: str, expire: int) -> int:
+        """TTL in seconds to store a key with, in place of `expire`"""
+        if not self.enabled:
+            return expire
+        ttl, reason = self.choose(key, expire)
+        ttl = max(1, round(ttl * (1 + random.uniform(-self.jitter, self.jitter))))
+        self.decisions[reason] += 1
+        self.recent.append({"key": key, "ttl": ttl, "reason": reason})
+        return ttl
+
+    def get_stats(self) -> dict:
+        """Policy settings, decisions by reason and the latest decisions"""
+        return {
+            "enabled": self.enabled,
+            "min_ttl": self.min_ttl,
+            "max_ttl": self.max_ttl,
+            "max_stretch": self.max_stretch,
+            "jitter": self.jitter,
+            "tracked_keys": len(self._keys),
+            "decisions": dict(self.decisions),
+            "recent": list(reversed(self.recent))
+        }
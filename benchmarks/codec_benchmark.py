@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Cache codec benchmark.
+
+Compares encode/decode time and stored bytes of every available
+serializer/compression combination for Product.to_dict payloads of
+different sizes. Needs no running services.
+
+    python benchmarks/codec_benchmark.py --sizes 1 50 1000 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_codecs import AVAILABLE, Codec
+from models import Product
+
+CATEGORIES = ["Electronics", "Books", "Clothing", "Home", "Sports"]
+WORDS = ("premium durable lightweight wireless classic compact portable ergonomic "
+         "stainless organic handmade rechargeable waterproof adjustable").split()
+
+def make_products(count: int, seed: int = 42) -> list:
+    """Build realistic product dicts through Product.to_dict"""
+    rng = random.Random(seed)
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    products = []
+    for i in range(1, count + 1):
+        product = Product(
+            id=i,
+            name=" ".join(rng.choices(WORDS, k=3)).title(),
+            description=" ".join(rng.choices(WORDS, k=rng.randint(8, 20))),
+            price=round(rng.uniform(5, 3000), 2),
+            category=rng.choice(CATEGORIES),
+            stock_quantity=rng.randint(0, 500),
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(days=rng.randint(1, 300)) if rng.random() < 0.5 else None
+        )
+        products.append(product.to_dict())
+    return products
+
+def codecs():
+    """Every serializer/compression combination whose packages are installed"""
+    for serializer in ("json", "orjson", "msgpack"):
+        if AVAILABLE.get(serializer) is False:
+            continue
+        for compression in ("none", "zlib", "zstd", "lz4"):
+            if AVAILABLE.get(compression) is False:
+                continue
+            yield Codec(serializer, compression, threshold=1024)
+
+def measure(func, repeat: int) -> float:
+    """Best-of-5 mean time per call in microseconds"""
+    return min(timeit.repeat(func, number=repeat, repeat=5)) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 50, 1000, 10000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        value = make_products(size)[0] if size == 1 else make_products(size)
+        repeat = max(3, 20000 // size)
+        baseline = None
+
+        print(f"\n📦 {size} product{'s' if size != 1 else ''}")
+        print(f"   {'codec':<16}{'encode µs':>12}{'decode µs':>12}{'bytes':>12}{'vs json':>10}")
+        for codec in codecs():
+            encoded = codec.encode(value)
+            assert codec.decode(encoded) == value
+            if baseline is None:
+                baseline = len(encoded)
+            encode_us = measure(lambda: codec.encode(value), repeat)
+            decode_us = measure(lambda: codec.decode(encoded), repeat)
+            print(f"   {codec.name:<16}{encode_us:>12.1f}{decode_us:>12.1f}{len(encoded):>12}"
+                  f"{len(encoded) / baseline:>9.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the product endpoints.
+
+Fires concurrent requests at a running application and reports throughput
+and latency percentiles. Run it against two builds (for example the sync
+and the async request path) with the same settings to compare them.
+
+    python benchmarks/load_test.py --concurrency 50 --duration 15
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+BASE_URL = "http://localhost:8000"
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+async def worker(client, paths, deadline, latencies, errors):
+    """Issue requests back to back until the deadline passes"""
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+async def run(base_url, concurrency, duration, paths):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        # Warm the cache so every path measures the steady state
+        for path in paths:
+            await client.get(path)
+
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            worker(client, paths, deadline, latencies, errors)
+            for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument(
+        "--paths", nargs="+", default=["/products", "/products/1"],
+        help="paths requested round-robin by every worker"
+    )
+    args = parser.parse_args()
+
+    print(f"⚡ {args.concurrency} concurrent clients for {args.duration:.0f}s against {args.base_url}")
+    result = asyncio.run(run(args.base_url, args.concurrency, args.duration, args.paths))
+    print(f"   Requests:   {result['requests']} ({result['errors']} errors)")
+    print(f"   Throughput: {result['rps']:.1f} req/s")
+    print(f"   Latency:    mean {result['mean_ms']:.2f}ms | p50 {result['p50_ms']:.2f}ms | "
+          f"p95 {result['p95_ms']:.2f}ms | p99 {result['p99_ms']:.2f}ms")
+
+if __name__ == "__main__":
+    main()
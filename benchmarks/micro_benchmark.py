@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the hot paths behind the product endpoints.
+
+Times each piece on its own and measures its peak memory allocation, once
+per data size so scaling is visible (the per-item column should stay flat
+for linear code):
+
+    to_dict         Product.to_dict over ORM rows
+    cache_set       CacheService.set of a product list (encode + write)
+    cache_get       CacheService.get of a product list (read + decode)
+    validate        pydantic validation of ProductsResponseWithMetadata
+    get_all         DatabaseService.get_all_products (query + ORM hydration)
+
+Runs in process against fakeredis and a temporary SQLite file, so numbers
+measure the Python side rather than the network (needs `pip install
+fakeredis aiosqlite`).
+
+    python benchmarks/micro_benchmark.py --sizes 100 1000 10000
+    python benchmarks/micro_benchmark.py --only to_dict validate --output micro.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Stand-ins must be in place before the app modules are imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='micro-benchmark-'), 'products.db')}"
+from asgi_benchmark import use_fakeredis
+use_fakeredis()
+
+from codec_benchmark import make_products
+from sqlalchemy import func, insert, select
+
+from cache_service import CacheService
+from database import AsyncSessionLocal, Base, async_engine, engine
+from database_service import DatabaseService
+from models import Product
+from schemas import ProductsResponseWithMetadata
+
+BENCHMARKS = ["to_dict", "cache_set", "cache_get", "validate", "get_all"]
+
+def parse_time(value):
+    """Datetime back from a to_dict() timestamp"""
+    return datetime.fromisoformat(value) if value else None
+
+def make_rows(count: int) -> list:
+    """Transient Product rows with realistic values (attribute access is instrumented as for loaded rows)"""
+    rows = []
+    for product in make_products(count):
+        rows.append(Product(
+            **{key: value for key, value in product.items() if key not in ("created_at", "updated_at")},
+            created_at=parse_time(product["created_at"]),
+            updated_at=parse_time(product["updated_at"])
+        ))
+    return rows
+
+def fill_table(count: int):
+    """Top the products table up to exactly `count` rows"""
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(Product)).scalar_one()
+        if existing < count:
+            rows = make_products(count)[existing:]
+            for row in rows:
+                row.pop("id")
+                row["created_at"] = parse_time(row["created_at"])
+                row["updated_at"] = parse_time(row["updated_at"])
+            conn.execute(insert(Product), rows)
+
+def measure(loop, func, is_async: bool, number: int) -> tuple:
+    """Best-of-5 mean seconds per call, and the peak bytes allocated during one call"""
+    async def timed():
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        return time.perf_counter() - start
+
+    def timed_sync():
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+
+    best = min(
+        loop.run_until_complete(timed()) if is_async else timed_sync()
+        for _ in range(5)
+    ) / number
+
+    tracemalloc.start()
+    if is_async:
+        loop.run_until_complete(func())
+    else:
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def cases(size: int, cache_service: CacheService, db_service: DatabaseService) -> dict:
+    """name -> (function, is async) for one data size"""
+    rows = make_rows(size)
+    products = [row.to_dict() for row in rows]
+    key = f"benchmark:products:{size}"
+    response = {"products": products, "next_cursor": None, "source": "cache", "response_time": 0.001}
+
+    async def cache_set():
+        await cache_service.set(key, products, expire=600)
+
+    async def cache_get():
+        await cache_service.get(key)
+
+    async def get_all():
+        async with AsyncSessionLocal() as db:
+            await db_service.get_all_products(db)
+
+    return {
+        "to_dict": (lambda: [row.to_dict() for row in rows], False),
+        "cache_set": (cache_set, True),
+        "cache_get": (cache_get, True),
+        "validate": (lambda: ProductsResponseWithMetadata.model_validate(response), False),
+        "get_all": (get_all, True),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000], help="products per call")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--output", help="save the results as JSON")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    cache_service = CacheService()
+    db_service = DatabaseService()
+    loop = asyncio.new_event_loop()
+
+    results = {name: [] for name in args.only}
+    for size in sorted(args.sizes):
+        if "get_all" in args.only:
+            fill_table(size)
+        number = max(3, 20000 // size)
+        benchmarks = cases(size, cache_service, db_service)
+        # The get benchmark reads what the set benchmark stores
+        loop.run_until_complete(benchmarks["cache_set"][0]())
+        for name in args.only:
+            func, is_async = benchmarks[name]
+            seconds, peak = measure(loop, func, is_async, number)
+            results[name].append({
+                "size": size,
+                "us": round(seconds * 1e6, 1),
+                "us_per_item": round(seconds * 1e6 / size, 3),
+                "peak_kib": round(peak / 1024, 1),
+            })
+
+    for name, rows in results.items():
+        print(f"\n⏱️  {name}")
+        print(f"   {'size':>8}{'µs/call':>14}{'µs/item':>10}{'peak KiB':>12}")
+        for row in rows:
+            print(f"   {row['size']:>8}{row['us']:>14.1f}{row['us_per_item']:>10.3f}{row['peak_kib']:>12.1f}")
+
+    loop.run_until_complete(cache_service.close())
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+if __name__ == "__main__":
+    main()
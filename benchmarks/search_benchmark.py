@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Product search benchmark: the old ILIKE '%term%' scan vs. the full-text index.
+
+Works on its own copy of the products table in the search_benchmark
+schema, so the app's data is never touched. Tops it up to --rows products
+with synthetic rows generated inside PostgreSQL (words drawn from a skewed
+vocabulary so terms range from common to rare), makes sure the GIN index
+exists, then times both queries for a set of search terms. Needs the
+PostgreSQL database from docker-compose (DATABASE_URL).
+
+    python benchmarks/search_benchmark.py --rows 1000000 --repeat 5
+    python benchmarks/search_benchmark.py --cleanup     # drop the benchmark schema
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, text
+
+from database import engine
+from models import Product, SEARCH_CONFIG, SEARCH_INDEX, search_document
+
+# Schema holding the benchmark's products table; the connection's search_path
+# points at it alone, so the app's models and queries resolve to the copy
+BENCHMARK_SCHEMA = "search_benchmark"
+BENCHMARK_CATEGORY = "Benchmark"
+INSERT_BATCH = 100_000
+
+# Ordered from most to least frequent in the generated rows
+VOCABULARY = (
+    "premium durable lightweight wireless classic compact portable ergonomic stainless "
+    "organic handmade rechargeable waterproof adjustable vintage modern smart digital "
+    "leather cotton wooden ceramic bamboo carbon titanium magnetic foldable insulated "
+    "cordless bluetooth ultrasonic hypoallergenic biodegradable antimicrobial"
+).split()
+
+DEFAULT_TERMS = [VOCABULARY[0], VOCABULARY[8], VOCABULARY[20], VOCABULARY[-1], "wireless bluetooth"]
+
+# power(random(), 3) skews picks towards the start of the vocabulary
+GENERATE_SQL = text("""
+INSERT INTO products (name, description, price, category, stock_quantity)
+SELECT
+    initcap(w[1 + floor(power(random(), 3) * n)::int] || ' ' ||
+            w[1 + floor(power(random(), 3) * n)::int] || ' ' ||
+            w[1 + floor(power(random(), 3) * n)::int]),
+    (SELECT string_agg(w[1 + floor(power(random(), 3) * n)::int], ' ')
+     FROM generate_series(1, 8 + i % 13)),
+    round((5 + random() * 2995)::numeric, 2),
+    :category,
+    floor(random() * 500)::int
+FROM (SELECT CAST(:words AS text[]) AS w, CAST(:word_count AS int) AS n) AS vocabulary,
+     generate_series(1, :count) AS i
+""")
+
+def top_up(conn, rows: int):
+    """Insert synthetic products until the table holds at least `rows` rows"""
+    existing = conn.execute(select(func.count()).select_from(Product)).scalar_one()
+    missing = rows - existing
+    while missing > 0:
+        batch = min(missing, INSERT_BATCH)
+        conn.execute(GENERATE_SQL, {
+            "category": BENCHMARK_CATEGORY,
+            "words": VOCABULARY,
+            "word_count": len(VOCABULARY),
+            "count": batch
+        })
+        conn.commit()
+        missing -= batch
+        print(f"  inserted {rows - existing - missing:,} / {rows - existing:,} rows")
+    conn.execute(text("ANALYZE products"))
+    conn.commit()
+
+def ilike_query(term: str):
+    """The query DatabaseService.search_products ran before the index existed"""
+    return select(Product).where(
+        Product.name.ilike(f"%{term}%") | Product.description.ilike(f"%{term}%")
+    )
+
+def fulltext_query(term: str, limit: int):
+    """The ranked query DatabaseService.search_products runs on PostgreSQL"""
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, term)
+    return (
+        select(Product)
+        .where(search_document.op("@@")(query))
+        .order_by(func.ts_rank_cd(search_document, query).desc(), Product.id)
+        .limit(limit)
+    )
+
+def time_query(conn, statement, repeat: int):
+    """Median wall time in milliseconds and the number of rows returned"""
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(conn.execute(statement).fetchall())
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), rows
+
+def uses_index(conn, statement) -> bool:
+    """Whether the plan reads the full-text GIN index"""
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    plan = conn.execute(text(f"EXPLAIN {compiled}")).scalars().all()
+    return any(SEARCH_INDEX.name in line for line in plan)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="table size to benchmark at")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query (median is reported)")
+    parser.add_argument("--limit", type=int, default=20, help="results per full-text query")
+    parser.add_argument("--terms", nargs="+", default=DEFAULT_TERMS, help="search terms to time")
+    parser.add_argument("--cleanup", action="store_true", help="delete the generated rows and exit")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("search_benchmark needs PostgreSQL (set DATABASE_URL)")
+
+    with engine.connect() as conn:
+        if args.cleanup:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE"))
+            conn.commit()
+            print(f"Dropped the {BENCHMARK_SCHEMA} schema")
+            return
+
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {BENCHMARK_SCHEMA}"))
+        conn.execute(text(f"SET search_path TO {BENCHMARK_SCHEMA}"))
+        conn.commit()
+        Product.__table__.create(bind=conn, checkfirst=True)
+        print(f"Filling products to {args.rows:,} rows...")
+        top_up(conn, args.rows)
+        print("Creating the full-text index (first run only)...")
+        SEARCH_INDEX.create(bind=conn, checkfirst=True)
+        conn.execute(text("ANALYZE products"))
+        conn.commit()
+
+        print(f"\n{'term':<22}{'ILIKE ms':>11}{'rows':>10}{'FTS ms':>11}{'rows':>7}{'speedup':>10}  index")
+        for term in args.terms:
+            scan_ms, scan_rows = time_query(conn, ilike_query(term), args.repeat)
+            search = fulltext_query(term, args.limit)
+            fts_ms, fts_rows = time_query(conn, search, args.repeat)
+            print(
+                f"{term:<22}{scan_ms:>11.1f}{scan_rows:>10,}{fts_ms:>11.1f}{fts_rows:>7}"
+                f"{scan_ms / fts_ms:>9.1f}x  {'yes' if uses_index(conn, search) else 'no'}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import hashlib
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from cache_service import CacheService
+from circuit_breaker import log_error
+
+# Sets an item's bits in the filter, and in the filter being rebuilt if a
+# rebuild is running (so items added meanwhile aren't lost by the swap)
+ADD_SCRIPT = """
+local building = redis.call('EXISTS', KEYS[2]) == 1
+for i = 1, #ARGV do
+    redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+    if building then
+        redis.call('SETBIT', KEYS[2], ARGV[i], 1)
+    end
+end
+return 1
+"""
+
+class BloomFilter:
+    """Bounded membership filter over existing IDs, kept in Redis as a bitmap.
+
+    A negative answer is definite, so lookups of IDs that were never
+    created can be answered without a database query; a positive answer
+    may be wrong with a small probability (about 1% with the defaults for a
+    million IDs). IDs are added as they are created; deleted IDs stay in
+    the filter until the next rebuild, which reloads every ID from the
+    database in the background at startup and whenever the ready marker is
+    missing (after a cache clear and once per `expire` seconds). Until then,
+    and whenever Redis fails, every ID is reported as possibly present.
+    While disabled, the filter touches neither Redis nor the database.
+    """
+
+    def __init__(
+        self,
+        cache_service: CacheService,
+        name: str,
+        fetch_ids: Callable[[int, Optional[int]], Awaitable[Tuple[List[int], Optional[int]]]],
+        enabled: bool = True,
+        bits: int = 1 << 23,
+        hashes: int = 7,
+        expire: int = 86400,
+        batch_size: int = 10000
+    ):
+        self.cache_service = cache_service
+        self.redis_client = cache_service.redis_client
+        self.fetch_ids = fetch_ids
+        self.enabled = enabled
+        self.bits = bits
+        self.hashes = hashes
+        self.expire = expire
+        self.batch_size = batch_size
+
+        # Cache keys (stored under CacheService.key())
+        self.key = f"bloom:{name}"
+        self.building_key = f"bloom:{name}:building"
+        self.ready_key = f"bloom:{name}:ready"
+        self._add_script = self.redis_client.register_script(ADD_SCRIPT)
+
+        # Per-worker statistics
+        self.rejected = 0
+
+    def positions(self, item) -> List[int]:
+        """Bit positions of an item (double hashing over one 128-bit digest)"""
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    async def might_contain_many(self, items: List) -> List[bool]:
+        """Whether each item may be present; False only for items that certainly aren't"""
+        if not self.enabled or not items:
+            return [True] * len(items)
+        try:
+            ready_key, key = self.cache_service.key(self.ready_key), self.cache_service.key(self.key)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.exists(ready_key)
+                for item in items:
+                    for position in self.positions(item):
+                        pipe.getbit(key, position)
+                ready, *bits = await pipe.execute()
+        except Exception as e:
+            log_error("Bloom filter error", e)
+            return [True] * len(items)
+        if not ready:
+            await self.ensure_ready()
+            return [True] * len(items)
+
+        present = [all(bits[i * self.hashes:(i + 1) * self.hashes]) for i in range(len(items))]
+        self.rejected += present.count(False)
+        return present
+
+    async def might_contain(self, item) -> bool:
+        """Whether an item may be present"""
+        return (await self.might_contain_many([item]))[0]
+
+    async def add_many(self, items: Iterable) -> bool:
+        """Add items (call after they are committed); returns False if Redis failed"""
+        if not self.enabled:
+            return True
+        positions = [position for item in items for position in self.positions(item)]
+        if not positions:
+            return True
+        try:
+            await self._add_script(
+                keys=[self.cache_service.key(self.key), self.cache_service.key(self.building_key)], args=positions
+            )
+            return True
+        except Exception as e:
+            log_error("Bloom filter error", e)
+            return False
+
+    async def start(self):
+        """Rebuild in the background at startup (an older bitmap lacks IDs created while the filter was off)"""
+        if not self.enabled:
+            return
+        await self.cache_service.delete(self.ready_key)
+        await self.ensure_ready()
+
+    async def ensure_ready(self) -> bool:
+        """Return whether the filter is loaded, starting a background rebuild if not"""
+        if not self.enabled:
+            return False
+
+        async def load():
+            count = await self.rebuild()
+            return {"count": count} if count is not None else None
+
+        ready, _ = await self.cache_service.get_or_set(
+            self.ready_key, load, expire=self.expire, wait_on_miss=False
+        )
+        return ready is not None
+
+    async def rebuild(self) -> Optional[int]:
+        """Load every ID into a fresh bitmap and swap it in; returns the number of IDs"""
+        if not self.enabled:
+            return None
+        count = 0
+        key, building_key = self.cache_service.key(self.key), self.cache_service.key(self.building_key)
+        try:
+            # Items added while the IDs are read also land in the new bitmap
+            await self.redis_client.set(building_key, b"", ex=self.expire)
+            bitmap = bytearray((self.bits + 7) // 8)
+            cursor = None
+            while True:
+                ids, cursor = await self.fetch_ids(self.batch_size, cursor)
+                for item in ids:
+                    for position in self.positions(item):
+                        bitmap[position >> 3] |= 0x80 >> (position & 7)
+                count += len(ids)
+                if cursor is None:
+                    break
+            if self.cache_service.key(self.key) != key:
+                # The cache was cleared meanwhile: the ready marker would go to
+                # the new generation and this bitmap to the old one
+                raise RuntimeError("cache cleared during rebuild")
+            loaded_key = f"{key}:loaded"
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.set(loaded_key, bytes(bitmap))
+                pipe.bitop("OR", building_key, building_key, loaded_key)
+                pipe.rename(building_key, key)
+                pipe.persist(key)
+                pipe.delete(loaded_key)
+                await pipe.execute()
+            return count
+        except Exception as e:
+            log_error("Bloom filter rebuild error", e)
+            try:
+                await self.redis_client.delete(building_key)
+            except Exception:
+                pass
+            return None
+
+    def get_stats(self) -> dict:
+        """Filter settings and lookups it answered on this worker"""
+        return {
+            "enabled": self.enabled,
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "rejected": self.rejected
+        }
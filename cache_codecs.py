@@ -0,0 +1,131 @@
+import json
+import zlib
+from typing import Any, Callable, Dict, Tuple
+
+# Optional faster serializers and compressors; codecs that need a missing
+# package are rejected when configured and unreadable entries become misses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# Encoded values start with this byte followed by a serializer and a
+# compression id. No JSON document starts with NUL, so entries written
+# before codecs existed (plain JSON) are still readable.
+HEADER_MARKER = 0
+HEADER_SIZE = 3
+
+def dumps_json(value: Any) -> bytes:
+    """Encode value as compact JSON bytes with the fastest available encoder"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+def loads_json(data: bytes) -> Any:
+    """Decode JSON bytes with the fastest available decoder"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _require(module, name: str):
+    if module is None:
+        raise ValueError(f"Cache codec '{name}' requires the {name} package")
+    return module
+
+# id -> (name, dumps, loads, produces JSON)
+SERIALIZERS: Dict[int, Tuple[str, Callable[[Any], bytes], Callable[[bytes], Any], bool]] = {
+    1: ("json", lambda value: json.dumps(value).encode(), json.loads, True),
+    2: ("orjson", lambda value: _require(orjson, "orjson").dumps(value),
+        lambda data: _require(orjson, "orjson").loads(data), True),
+    3: ("msgpack", lambda value: _require(msgpack, "msgpack").packb(value, use_bin_type=True),
+        lambda data: _require(msgpack, "msgpack").unpackb(data, raw=False), False),
+}
+
+# id -> (name, compress, decompress)
+COMPRESSORS: Dict[int, Tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    0: ("none", lambda data: data, lambda data: data),
+    1: ("zlib", lambda data: zlib.compress(data, 6), zlib.decompress),
+    2: ("zstd", lambda data: _require(zstandard, "zstandard").ZstdCompressor(level=3).compress(data),
+        lambda data: _require(zstandard, "zstandard").ZstdDecompressor().decompress(data)),
+    3: ("lz4", lambda data: _require(lz4, "lz4").frame.compress(data),
+        lambda data: _require(lz4, "lz4").frame.decompress(data)),
+}
+
+AVAILABLE = {
+    "orjson": orjson is not None,
+    "msgpack": msgpack is not None,
+    "zstd": zstandard is not None,
+    "lz4": lz4 is not None,
+}
+
+def _lookup(table: dict, name: str) -> int:
+    for codec_id, entry in table.items():
+        if entry[0] == name:
+            return codec_id
+    raise ValueError(f"Unknown cache codec '{name}'")
+
+class Codec:
+    """Serializer plus optional compression above a size threshold.
+
+    Every encoded value carries a header naming how it was written, so any
+    worker can read entries written with a different configuration.
+    """
+
+    def __init__(self, serializer: str = "json", compression: str = "none", threshold: int = 1024):
+        self.serializer_id = _lookup(SERIALIZERS, serializer)
+        self.compression_id = _lookup(COMPRESSORS, compression)
+        self.threshold = threshold
+
+        for name in (serializer, compression):
+            if AVAILABLE.get(name) is False:
+                raise ValueError(f"Cache codec '{name}' is configured but its package is not installed")
+
+    @property
+    def name(self) -> str:
+        return f"{SERIALIZERS[self.serializer_id][0]}+{COMPRESSORS[self.compression_id][0]}"
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize value, compressing it when it is larger than the threshold"""
+        payload = SERIALIZERS[self.serializer_id][1](value)
+        compression_id = 0
+        if self.compression_id and len(payload) >= self.threshold:
+            payload = COMPRESSORS[self.compression_id][1](payload)
+            compression_id = self.compression_id
+        return bytes((HEADER_MARKER, self.serializer_id, compression_id)) + payload
+
+    def _unpack(self, data: bytes) -> Tuple[int, bytes]:
+        """Return the serializer id and decompressed payload of an encoded value"""
+        if not data or data[0] != HEADER_MARKER:
+            # Legacy entry written as plain JSON
+            return 1, data
+        serializer_id, compression_id = data[1], data[2]
+        if serializer_id not in SERIALIZERS or compression_id not in COMPRESSORS:
+            raise ValueError(f"Unsupported cache codec header {data[:HEADER_SIZE]!r}")
+        return serializer_id, COMPRESSORS[compression_id][2](data[HEADER_SIZE:])
+
+    def decode(self, data: bytes) -> Any:
+        """Decode a value written by any codec"""
+        serializer_id, payload = self._unpack(data)
+        return SERIALIZERS[serializer_id][2](payload)
+
+    def to_json_bytes(self, data: bytes) -> bytes:
+        """Return an encoded value as JSON bytes, re-encoding only non-JSON serializers"""
+        serializer_id, payload = self._unpack(data)
+        if SERIALIZERS[serializer_id][3]:
+            return payload
+        return dumps_json(SERIALIZERS[serializer_id][2](payload))
@@ -0,0 +1,166 @@
+import asyncio
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Generation field of the root namespace, which holds every key
+ROOT = "*"
+
+# Give a namespace a new generation and queue its old key prefix for
+# reclaiming, in one step so no worker can mix the two up.
+# KEYS: generations hash, reclaim set
+# ARGV: generation fields from the root down to the namespace being cleared
+BUMP_SCRIPT = """
+local generations = {}
+for i = 1, #ARGV do
+    table.insert(generations, redis.call('HGET', KEYS[1], ARGV[i]) or '0')
+end
+redis.call('HINCRBY', KEYS[1], ARGV[#ARGV], 1)
+redis.call('SADD', KEYS[2], table.concat(generations, '.') .. ' ' .. ARGV[#ARGV])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+def glob_escape(text: str) -> str:
+    """Escape glob characters for a SCAN MATCH pattern"""
+    return re.sub(r"([\\*?\[\]])", r"\\\1", text)
+
+class Namespaces:
+    """Generation-numbered key namespaces ("{prefix}:{generations}:{key}"), so a clear is one atomic increment"""
+
+    def __init__(self, redis_client, markers: Sequence[str], prefix: str = "cache", batch_size: int = 500):
+        self.redis_client = redis_client
+        # What may come before the prefix in the Redis keys of one cache key
+        # (the key itself, companion keys, tombstones, tag sets, locks)
+        self.markers = set(markers) | {""}
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.generations_key = f"{prefix}:generations"
+        self.reclaim_key = f"{prefix}:reclaim"
+
+        # Key prefix -> function of the key returning its namespace path below the root
+        self._namespaces: Dict[str, Callable[[str], Tuple[str, ...]]] = {}
+        self._generations: Dict[str, int] = {}
+        self._prefixes: Dict[Tuple[str, ...], str] = {}
+        self._pattern = re.compile(rf"(.*?){re.escape(prefix)}:(\d+(?:\.\d+)*):(.*)", re.S)
+        self._bump_script = redis_client.register_script(BUMP_SCRIPT)
+
+        # Per-worker statistics
+        self.reclaimed = 0
+
+    def register(self, key_prefix: str, namespace: Callable[[str], Tuple[str, ...]]):
+        """Place keys starting with key_prefix in the namespace path namespace(key) returns"""
+        self._namespaces[key_prefix] = namespace
+
+    def path(self, key: str) -> Tuple[str, ...]:
+        """Namespace path of a key below the root (empty for unregistered keys)"""
+        for key_prefix, namespace in self._namespaces.items():
+            if key.startswith(key_prefix):
+                return namespace(key)
+        return ()
+
+    @staticmethod
+    def fields(path: Sequence[str]) -> List[str]:
+        """Generation fields of a namespace path, from the root down"""
+        return [ROOT] + ["/".join(path[:depth]) for depth in range(1, len(path) + 1)]
+
+    def key(self, key: str) -> str:
+        """The Redis key a cache key is stored under at the current generations"""
+        path = self.path(key)
+        prefix = self._prefixes.get(path)
+        if prefix is None:
+            generations = ".".join(str(self._generations.get(field, 0)) for field in self.fields(path))
+            prefix = self._prefixes[path] = f"{self.prefix}:{generations}:"
+        return prefix + key
+
+    def shared_key(self, name: str) -> str:
+        """A Redis key under the prefix but outside every generation, so no clear drops it"""
+        return f"{self.prefix}:{name}"
+
+    def split(self, redis_key: str) -> Optional[Tuple[str, str, str]]:
+        """(marker, generations, cache key) of a stored Redis key, or None if it isn't one.
+
+        The marker is what comes before the prefix, e.g. "etag:" for an
+        ETag stored next to a value.
+        """
+        match = self._pattern.fullmatch(redis_key)
+        return match.groups() if match else None
+
+    def unqualified(self, redis_key: str) -> str:
+        """The cache key a Redis key stores"""
+        parts = self.split(redis_key)
+        return parts[2] if parts else redis_key
+
+    def _update(self, flat: list) -> bool:
+        """Take generations from a flat HGETALL reply; returns whether any changed"""
+        generations = {
+            field.decode() if isinstance(field, bytes) else field: int(value)
+            for field, value in zip(flat[::2], flat[1::2])
+        }
+        if generations == self._generations:
+            return False
+        self._generations = generations
+        self._prefixes = {}
+        return True
+
+    async def load(self) -> bool:
+        """Reload generations from Redis; returns whether any changed"""
+        generations = await self.redis_client.hgetall(self.generations_key)
+        return self._update([item for pair in generations.items() for item in pair])
+
+    async def bump(self, path: Sequence[str] = ()) -> bool:
+        """Move a namespace (the root when path is empty) to a new generation"""
+        flat = await self._bump_script(keys=[self.generations_key, self.reclaim_key], args=self.fields(path))
+        return self._update(flat)
+
+    async def reclaim(self, pause: float = 0.01) -> int:
+        """Delete the keys of every queued old generation; returns the number deleted"""
+        deleted = 0
+        while True:
+            entry = await self.redis_client.spop(self.reclaim_key)
+            if entry is None:
+                return deleted
+            generations, field = entry.decode().split(" ", 1)
+            try:
+                deleted += await self._reclaim_generation(generations, field, pause)
+            except Exception:
+                # Leave it for the next attempt
+                await self.redis_client.sadd(self.reclaim_key, entry)
+                raise
+
+    async def _reclaim_generation(self, generations: str, field: str, pause: float) -> int:
+        """SCAN for one old generation's keys and UNLINK them batch by batch"""
+        depth = generations.count(".")
+        deleted = 0
+        batch = []
+        pattern = f"*{glob_escape(self.prefix)}:{generations}[.:]*"
+        async for redis_key in self.redis_client.scan_iter(match=pattern, count=1000):
+            parts = self.split(redis_key.decode())
+            if parts is None:
+                continue
+            marker, key_generations, key = parts
+            if marker not in self.markers or not (key_generations + ".").startswith(generations + "."):
+                continue
+            # Same generations can belong to a sibling namespace
+            if self.fields(self.path(key))[depth:depth + 1] != [field]:
+                continue
+            batch.append(redis_key)
+            if len(batch) >= self.batch_size:
+                deleted += await self._unlink(batch)
+                batch = []
+                await asyncio.sleep(pause)
+        if batch:
+            deleted += await self._unlink(batch)
+        return deleted
+
+    async def _unlink(self, redis_keys: List[bytes]) -> int:
+        """UNLINK one batch (memory is freed off Redis's main thread)"""
+        deleted = await self.redis_client.unlink(*redis_keys)
+        self.reclaimed += deleted
+        return deleted
+
+    def get_stats(self) -> dict:
+        """Key prefix, current generations and keys reclaimed by this worker"""
+        return {
+            "prefix": self.prefix,
+            "generations": dict(self._generations),
+            "reclaimed": self.reclaimed
+        }
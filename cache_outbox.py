@@ -0,0 +1,326 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import delete, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from circuit_breaker import CircuitBreaker, log_error
+from database import AsyncSessionLocal, engine
+from models import CacheOutbox, Product
+
+# How product writes reach the outbox:
+#   orm      session hooks below record writes made through SQLAlchemy
+#   trigger  a PostgreSQL trigger records every write to products, including
+#            ones from psql, migrations and other services
+INVALIDATION_MODE = os.getenv("CACHE_INVALIDATION_MODE", "orm")
+
+# Channel notified when outbox rows commit (PostgreSQL only)
+NOTIFY_CHANNEL = "cache_outbox"
+
+# Product fields kept in outbox rows: enough to find the cache tags of a version
+SNAPSHOT_FIELDS = ("id", "name", "description", "category")
+
+# Seconds between liveness checks of the LISTEN connection
+LISTEN_KEEPALIVE = 30
+
+TRIGGER_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION products_cache_outbox() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO cache_outbox (product_id, old_values, new_values)
+    VALUES (
+        CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+        CASE WHEN TG_OP <> 'INSERT' THEN to_jsonb(OLD) END,
+        CASE WHEN TG_OP <> 'DELETE' THEN to_jsonb(NEW) END
+    );
+    PERFORM pg_notify('{NOTIFY_CHANNEL}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+TRIGGER = """
+CREATE OR REPLACE TRIGGER products_cache_outbox
+AFTER INSERT OR UPDATE OR DELETE ON products
+FOR EACH ROW EXECUTE FUNCTION products_cache_outbox()
+"""
+DROP_TRIGGER = "DROP TRIGGER IF EXISTS products_cache_outbox ON products"
+# Serializes trigger setup between workers starting together
+TRIGGER_LOCK_ID = 7_240_021
+
+def configure_trigger() -> str:
+    """Install the products trigger in trigger mode (drop it otherwise); returns the mode in effect"""
+    global INVALIDATION_MODE
+    if engine.dialect.name != "postgresql":
+        if INVALIDATION_MODE == "trigger":
+            print("⚠️  CACHE_INVALIDATION_MODE=trigger needs PostgreSQL; using session hooks")
+            INVALIDATION_MODE = "orm"
+        return INVALIDATION_MODE
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({TRIGGER_LOCK_ID})")
+        if INVALIDATION_MODE == "trigger":
+            conn.exec_driver_sql(TRIGGER_FUNCTION)
+            conn.exec_driver_sql(TRIGGER)
+        else:
+            conn.exec_driver_sql(DROP_TRIGGER)
+    return INVALIDATION_MODE
+
+def _snapshot(product: Product, previous: bool = False) -> dict:
+    """Searchable fields of a product as flushed, or as they were before this flush"""
+    state = inspect(product)
+    values = {}
+    for field in SNAPSHOT_FIELDS:
+        deleted = state.attrs[field].history.deleted
+        values[field] = deleted[0] if previous and deleted else state.dict.get(field)
+    return values
+
+def _queue(connection, rows: List[dict]):
+    """Insert outbox rows on the transaction's connection and notify listeners at commit"""
+    if not rows:
+        return
+    connection.execute(CacheOutbox.__table__.insert(), rows)
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SELECT pg_notify('{NOTIFY_CHANNEL}', '')")
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_writes(session: Session, flush_context):
+    """Queue an outbox row for each Product this flush inserted, changed or deleted"""
+    if INVALIDATION_MODE != "orm":
+        return
+    rows = []
+    for product in session.new:
+        if isinstance(product, Product):
+            new_values = _snapshot(product)
+            rows.append({"product_id": new_values["id"], "old_values": None, "new_values": new_values})
+    for product in session.dirty:
+        if isinstance(product, Product) and session.is_modified(product):
+            new_values = _snapshot(product)
+            rows.append({
+                "product_id": new_values["id"],
+                "old_values": _snapshot(product, previous=True),
+                "new_values": new_values
+            })
+    for product in session.deleted:
+        if isinstance(product, Product):
+            old_values = _snapshot(product, previous=True)
+            rows.append({"product_id": old_values["id"], "old_values": old_values, "new_values": None})
+    _queue(session.connection(), rows)
+
+def _parameter_sets(orm_execute_state) -> List[dict]:
+    """The parameter dictionaries a statement was executed with"""
+    parameters = orm_execute_state.parameters
+    if not parameters:
+        return []
+    return list(parameters) if isinstance(parameters, (list, tuple)) else [parameters]
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_writes(orm_execute_state):
+    """Queue outbox rows for ORM-enabled INSERT, UPDATE and DELETE statements on products.
+
+    Flushes never come through here; they're recorded by after_flush.
+    UPDATE and DELETE read the affected rows before (and UPDATE after) the
+    statement so both versions are known.
+    """
+    if INVALIDATION_MODE != "orm" or orm_execute_state.is_select:
+        return None
+    statement = orm_execute_state.statement
+    table = getattr(statement, "table", None)
+    if table is None or not table.is_derived_from(Product.__table__):
+        return None
+    session = orm_execute_state.session
+    # Results with RETURNING rows are frozen so they can be read here and by the caller
+    returns_rows = len(statement.exported_columns) > 0
+
+    if orm_execute_state.is_insert:
+        result = orm_execute_state.invoke_statement()
+        frozen = result.freeze() if returns_rows else None
+        products = [row[0] for row in frozen().all() if isinstance(row[0], Product)] if frozen else []
+        if products:
+            rows = [{"product_id": product.id, "old_values": None, "new_values": _snapshot(product)}
+                    for product in products]
+        else:
+            # No product IDs came back: the worker refreshes the catalog as a whole
+            rows = [{
+                "product_id": None,
+                "old_values": None,
+                "new_values": {field: params.get(field) for field in SNAPSHOT_FIELDS}
+            } for params in _parameter_sets(orm_execute_state)] or [
+                {"product_id": None, "old_values": None, "new_values": None}
+            ]
+        _queue(session.connection(), rows)
+        return frozen() if frozen else result
+
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    columns = [getattr(Product, field) for field in SNAPSHOT_FIELDS]
+    affected = select(*columns)
+    if statement.whereclause is not None:
+        affected = affected.where(statement.whereclause)
+    else:
+        # ORM bulk UPDATE by primary key: the IDs are in the parameters
+        ids = [params["id"] for params in _parameter_sets(orm_execute_state) if "id" in params]
+        if ids:
+            affected = affected.where(Product.id.in_(ids))
+    previous = {row.id: row._asdict() for row in session.execute(affected)}
+
+    result = orm_execute_state.invoke_statement()
+    frozen = result.freeze() if returns_rows else None
+    current = {}
+    if orm_execute_state.is_update and previous:
+        current = {
+            row.id: row._asdict()
+            for row in session.execute(select(*columns).where(Product.id.in_(list(previous))))
+        }
+    _queue(session.connection(), [
+        {"product_id": product_id, "old_values": old_values, "new_values": current.get(product_id)}
+        for product_id, old_values in previous.items()
+    ])
+    return frozen() if frozen else result
+
+class OutboxWorker:
+    """Applies cache outbox rows until the cache reflects every committed product write.
+
+    apply() gets a batch of rows (product_id, old_values, new_values) and
+    raises if the cache couldn't be updated, leaving the batch to be retried.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[List[dict]], Awaitable[None]],
+        interval: float = 1.0,
+        batch_size: int = 500,
+        max_backoff: float = 60.0,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.apply = apply
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.breaker = breaker
+
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._listen_task: Optional[asyncio.Task] = None
+
+        # Per-worker statistics
+        self.applied = 0
+        self.retries = 0
+        self.last_error: Optional[str] = None
+
+    async def start(self):
+        """Start draining the outbox in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if self._listen_task is None and engine.dialect.name == "postgresql":
+            self._listen_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop background work; rows left behind are applied after the next start"""
+        for task in (self._task, self._listen_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._listen_task = None
+
+    async def drain(self, replay: bool = False) -> int:
+        """Apply one batch of due outbox rows; returns the number applied.
+
+        With replay, rows still backing off are taken too and a failure is
+        raised instead of only being logged.
+        """
+        async with AsyncSessionLocal() as db:
+            query = select(CacheOutbox)
+            if not replay:
+                query = query.where(CacheOutbox.available_at <= func.now())
+            result = await db.execute(
+                query
+                .order_by(CacheOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = result.scalars().all()
+            if not rows:
+                return 0
+            row_ids = [row.id for row in rows]
+            try:
+                await self.apply([
+                    {"product_id": row.product_id, "old_values": row.old_values, "new_values": row.new_values}
+                    for row in rows
+                ])
+            except Exception as e:
+                if not replay and self.breaker is not None and self.breaker.is_open:
+                    # Redis is known to be down; replay() applies the rows on recovery
+                    return 0
+                log_error("Cache outbox error", e)
+                attempts = max(row.attempts for row in rows) + 1
+                backoff = min(self.max_backoff, self.interval * 2 ** (attempts - 1))
+                await db.execute(
+                    update(CacheOutbox)
+                    .where(CacheOutbox.id.in_(row_ids))
+                    .values(
+                        attempts=CacheOutbox.attempts + 1,
+                        available_at=datetime.now(timezone.utc) + timedelta(seconds=backoff)
+                    )
+                )
+                await db.commit()
+                self.retries += 1
+                self.last_error = str(e)
+                if replay:
+                    raise
+                return 0
+            await db.execute(delete(CacheOutbox).where(CacheOutbox.id.in_(row_ids)))
+            await db.commit()
+        self.applied += len(rows)
+        return len(rows)
+
+    async def replay(self):
+        """Apply every pending row now, ignoring backoff; raises if the cache can't take them"""
+        while await self.drain(replay=True) >= self.batch_size:
+            pass
+        self._wake.set()
+
+    async def _run(self):
+        """Drain the outbox, then wait for a notification or the next poll"""
+        while True:
+            self._wake.clear()
+            try:
+                applied = await self.drain()
+            except Exception as e:
+                log_error("Cache outbox error", e)
+                applied = 0
+            if applied < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _listen(self):
+        """Wake the worker on outbox notifications, reconnecting after errors"""
+        import asyncpg
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+                try:
+                    await connection.add_listener(NOTIFY_CHANNEL, lambda *args: self._wake.set())
+                    while True:
+                        await asyncio.sleep(LISTEN_KEEPALIVE)
+                        await connection.execute("SELECT 1")
+                finally:
+                    await connection.close()
+            except Exception as e:
+                log_error("Cache outbox listen error", e)
+                await asyncio.sleep(LISTEN_KEEPALIVE)
+
+    def get_stats(self) -> dict:
+        """Invalidation mode and outbox counters of this worker"""
+        return {
+            "mode": INVALIDATION_MODE,
+            "applied": self.applied,
+            "retries": self.retries,
+            "last_error": self.last_error
+        }
@@ -1,7 +1,70 @@
 import os
-import json
-import redis
-from typing import Any, Optional
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from local_cache import LocalCache
+from circuit_breaker import CircuitBreaker, GuardedRedis, log_error
+from adaptive_ttl import AdaptiveTTL
+from cache_namespaces import Namespaces
+from cache_codecs import Codec, dumps_json
+from http_compression import SUPPORTED_ENCODINGS, CompressedHead, compress_head
+from cache_stats import StatsRecorder
+from metrics import time_cache_operation, observe_payload_size
+from pools import TimedBlockingConnectionPool, redis_pool_settings
+
+# Pub/sub channel used to drop L1 entries on every worker after a write (under the key prefix)
+INVALIDATION_CHANNEL = "invalidate"
+# Message payload telling workers a namespace moved to a new generation
+GENERATIONS_CHANGED = "*"
+# L1 key prefix for values kept as encoded JSON bytes (see get_raw)
+RAW_L1_PREFIX = "raw:"
+# Redis set listing the keys stored under a tag (see invalidate_tags)
+TAG_PREFIX = "tag:"
+# Set while a database write may not have reached the read replica yet (under the key prefix)
+RECENT_WRITE_KEY = "db:recent_write"
+# Key prefix of the ETag stored next to a value (see register_etag)
+ETAG_PREFIX = "etag:"
+# Compressed bodies are stored next to values under "{encoding}:{key}" (see register_compressed)
+# Tombstone recording that a key's loader found nothing (see get_or_set)
+NEGATIVE_PREFIX = "missing:"
+# Recompute lock of a key (see _load_with_lock)
+LOCK_PREFIX = "lock:"
+# Returned by _get_with_ttl for a key with a tombstone
+TOMBSTONE = object()
+
+# Delete every key listed in the given tag sets plus the sets themselves and
+# tell other workers to drop their L1 copies, all in one round trip
+INVALIDATE_TAGS_SCRIPT = """
+-- KEYS: ARGV[3] tag sets, then plain keys to delete with them
+local keys = {}
+local tag_count = tonumber(ARGV[3])
+for i = 1, tag_count do
+    for _, key in ipairs(redis.call('SMEMBERS', KEYS[i])) do
+        table.insert(keys, key)
+    end
+end
+for i = tag_count + 1, #KEYS do
+    table.insert(keys, KEYS[i])
+end
+-- Also the keys stored next to each value, one prefix per ARGV from ARGV[4]
+local doomed = {}
+for _, key in ipairs(keys) do
+    table.insert(doomed, key)
+    for i = 4, #ARGV do
+        table.insert(doomed, ARGV[i] .. key)
+    end
+end
+for i = 1, #doomed, 1000 do
+    redis.call('DEL', unpack(doomed, i, math.min(i + 999, #doomed)))
+end
+if tag_count > 0 then
+    redis.call('DEL', unpack(KEYS, 1, tag_count))
+end
+if ARGV[2] == '1' and #keys > 0 then
+    redis.call('PUBLISH', ARGV[1], table.concat(keys, '\\n'))
+end
+return keys
+"""
 
 class CacheService:
     def __init__(self):
@@ -9,78 +72,788 @@ class CacheService:
         self.redis_host = os.getenv("REDIS_HOST", "localhost")
         self.redis_port = int(os.getenv("REDIS_PORT", "6379"))
 
-        # Initialize Redis connection
-        self.redis_client = redis.Redis(
+        # Initialize asyncio Redis connection pool (sized per worker, connects
+        # lazily); responses stay bytes so cached JSON can be served without decoding
+        self.redis_pool = TimedBlockingConnectionPool(
             host=self.redis_host,
             port=self.redis_port,
-            decode_responses=True
+            decode_responses=False,
+            **redis_pool_settings()
+        )
+
+        # Circuit breaker: after repeated connection errors or timeouts, cache
+        # calls fail fast (callers fall back to the database) until a
+        # background probe reaches Redis again
+        self.breaker = CircuitBreaker(
+            lambda: self.redis_client.ping(),
+            failure_threshold=int(os.getenv("CACHE_BREAKER_THRESHOLD", "5")),
+            probe_interval=float(os.getenv("CACHE_BREAKER_PROBE_INTERVAL", "5"))
+        )
+        self.redis_client = GuardedRedis(connection_pool=self.redis_pool, breaker=self.breaker)
+        self.redis_client.auto_close_connection_pool = True
+
+        # Value encoding: serializer, compression and the size that triggers it
+        self.codec = Codec(
+            serializer=os.getenv("CACHE_CODEC", "json"),
+            compression=os.getenv("CACHE_COMPRESSION", "none"),
+            threshold=int(os.getenv("CACHE_COMPRESSION_THRESHOLD", "1024"))
+        )
+
+        # Serve cache hits as the stored JSON bytes instead of re-parsing them
+        self.raw_responses = os.getenv("CACHE_RAW_RESPONSES", "false").lower() == "true"
+
+        # Optional in-process L1 cache in front of Redis (disabled when size is 0)
+        l1_max_entries = int(os.getenv("CACHE_L1_MAX_ENTRIES", "0"))
+        l1_ttl = float(os.getenv("CACHE_L1_TTL", "5"))
+        self.local_cache = LocalCache(l1_max_entries, l1_ttl) if l1_max_entries > 0 else None
+        self._listener_task: Optional[asyncio.Task] = None
+
+        # Stampede protection: seconds a value may be served stale while one
+        # background task refreshes it (0 disables), and the recompute lock TTL
+        self.stale_ttl = int(os.getenv("CACHE_STALE_TTL", "30"))
+        self.lock_timeout = float(os.getenv("CACHE_LOCK_TIMEOUT", "5"))
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+
+        # Adaptive TTLs: the expire callers pass is adjusted per key from its
+        # read and write rates, within CACHE_TTL_MIN..CACHE_TTL_MAX seconds and
+        # at most CACHE_TTL_MAX_STRETCH times the requested TTL
+        self.ttl_policy = AdaptiveTTL(
+            enabled=os.getenv("CACHE_ADAPTIVE_TTL", "true").lower() == "true",
+            min_ttl=int(os.getenv("CACHE_TTL_MIN", "60")),
+            max_ttl=int(os.getenv("CACHE_TTL_MAX", "86400")),
+            max_stretch=float(os.getenv("CACHE_TTL_MAX_STRETCH", "2")),
+            jitter=float(os.getenv("CACHE_TTL_JITTER", "0.1")),
+            half_life=float(os.getenv("CACHE_TTL_HALF_LIFE", "600"))
+        )
+
+        self._invalidate_tags_script = self.redis_client.register_script(INVALIDATE_TAGS_SCRIPT)
+
+        # Key namespaces: every key is stored under its namespaces' current
+        # generations, so clear() is O(1) and old keys are reclaimed in the background
+        self.namespaces = Namespaces(
+            self.redis_client,
+            markers=[ETAG_PREFIX, NEGATIVE_PREFIX, LOCK_PREFIX, TAG_PREFIX,
+                     *[f"{encoding}:" for encoding in SUPPORTED_ENCODINGS]],
+            prefix=os.getenv("CACHE_KEY_PREFIX", "cache"),
+            batch_size=int(os.getenv("CACHE_RECLAIM_BATCH", "500"))
         )
+        self.invalidation_channel = self.shared_key(INVALIDATION_CHANNEL)
+        self.recent_write_key = self.shared_key(RECENT_WRITE_KEY)
+        self._reclaim_task: Optional[asyncio.Task] = None
+        self.breaker.on_close(self._catch_up)
 
-        # Cache statistics
-        self.hits = 0
-        self.misses = 0
+        # Key prefix -> (companion key prefix, function of the value, whether
+        # it lives through the stale window) for the keys stored next to such values
+        self._companions: Dict[str, List[Tuple[str, Callable[[Any], Optional[bytes]], bool]]] = {}
+        self._compressed_families: List[str] = []
 
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
+        # Content codings stored for compressed key families, and the
+        # smallest body worth compressing
+        self.compressed_encodings = [
+            encoding for encoding in (
+                part.strip() for part in os.getenv("HTTP_COMPRESSION", ",".join(SUPPORTED_ENCODINGS)).split(",")
+            ) if encoding in SUPPORTED_ENCODINGS
+        ]
+        self.compression_min_size = int(os.getenv("HTTP_COMPRESSION_MIN_SIZE", "1024"))
+
+        # Cluster-wide hit/miss counters (buffered locally, flushed to Redis)
+        self.stats = StatsRecorder(
+            self.redis_client,
+            prefix=self.namespaces.prefix,
+            flush_interval=float(os.getenv("CACHE_STATS_FLUSH_INTERVAL", "2"))
+        )
+
+        # Per-worker cache statistics
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.coalesced_misses = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.background_refreshes = 0
+
+    async def start(self):
+        """Start the stats flusher, follow namespace generations and cross-worker L1 invalidations"""
+        await self.stats.start()
         try:
-            value = self.redis_client.get(key)
-            if value:
-                return json.loads(value)
-            return None
+            await self.namespaces.load()
+        except Exception as e:
+            log_error("Cache namespace error", e)
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen_for_invalidations())
+        # Finish reclaiming generations a stopped worker left behind
+        self._schedule_reclaim()
+
+    async def _listen_for_invalidations(self):
+        """Follow generation changes and drop L1 entries named on the invalidation channel, reconnecting on errors"""
+        while True:
+            try:
+                async with self.redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.invalidation_channel)
+                    # Messages may have been missed while disconnected
+                    await self.namespaces.load()
+                    if self.local_cache is not None:
+                        self.local_cache.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = message["data"].decode()
+                        if data == GENERATIONS_CHANGED:
+                            # Entries of old generations can't be read any more; free them
+                            if await self.namespaces.load() and self.local_cache is not None:
+                                self.local_cache.clear()
+                        elif self.local_cache is not None:
+                            for key in data.split("\n"):
+                                self._drop_local(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Stay quiet while the breaker reports the outage
+                if not self.breaker.is_open:
+                    log_error("Cache invalidation listener error", e)
+                if self.local_cache is not None:
+                    self.local_cache.clear()
+                await asyncio.sleep(1)
+
+    async def _catch_up(self):
+        """After an outage, take generations cleared meanwhile and drop L1 entries that missed invalidations"""
+        await self.namespaces.load()
+        if self.local_cache is not None:
+            self.local_cache.clear()
+
+    def register_namespace(self, key_prefix: str, namespace: Callable[[str], Tuple[str, ...]]):
+        """Place keys starting with key_prefix in the namespace path namespace(key) returns.
+
+        A path names nested namespaces below the root, e.g. ("products",
+        "category:Books"); clear() can drop any of them on its own. Keys of
+        unregistered prefixes are only dropped when everything is cleared.
+        """
+        self.namespaces.register(key_prefix, namespace)
+
+    def key(self, key: str) -> str:
+        """The Redis key a cache key is currently stored under (for direct Redis access)"""
+        return self.namespaces.key(key)
+
+    def shared_key(self, name: str) -> str:
+        """The Redis key of app-wide state (stats, locks) under the key prefix, kept by clear()"""
+        return self.namespaces.shared_key(name)
+
+    def register_etag(self, key_prefix: str, etag: Callable[[Any], str]):
+        """Store etag(value) next to every value whose key starts with key_prefix.
+
+        The ETag is written in the same round trip as the value, with the
+        same TTL, and deleted with it, so get_etag() can answer conditional
+        requests without reading the value.
+        """
+        self._companions.setdefault(key_prefix, []).append(
+            (ETAG_PREFIX, lambda value: etag(value).encode(), True)
+        )
+
+    def register_compressed(self, key_prefix: str, envelope: bytes):
+        """Store compressed response bodies (envelope + value JSON) next to values whose key starts with key_prefix"""
+        def compressor(encoding: str) -> Callable[[Any], Optional[bytes]]:
+            def compress(value: Any) -> Optional[bytes]:
+                body = envelope + dumps_json(value)
+                return compress_head(encoding, body) if len(body) >= self.compression_min_size else None
+            return compress
+
+        for encoding in self.compressed_encodings:
+            self._companions.setdefault(key_prefix, []).append((f"{encoding}:", compressor(encoding), False))
+        self._compressed_families.append(key_prefix)
+
+    def _companions_for(
+        self, key: str, value: Any, expire: int, redis_expire: int
+    ) -> List[Tuple[str, bytes, int]]:
+        """(key, value, TTL) of each key to store next to a value"""
+        companions = []
+        cache_key = self.namespaces.unqualified(key)
+        for key_prefix, functions in self._companions.items():
+            if cache_key.startswith(key_prefix):
+                for companion_prefix, function, keep_stale in functions:
+                    companion = function(value)
+                    if companion is not None:
+                        companions.append((companion_prefix + key, companion, redis_expire if keep_stale else expire))
+        return companions
+
+    def _companion_prefixes(self) -> List[str]:
+        """Every key prefix used for keys stored next to values"""
+        return list(dict.fromkeys(
+            companion_prefix for functions in self._companions.values() for companion_prefix, _, _ in functions
+        ))
+
+    def _with_companion_keys(self, keys: List[str]) -> List[str]:
+        """Keys plus the keys stored next to them"""
+        return keys + [
+            companion_prefix + key
+            for key in keys
+            for key_prefix, functions in self._companions.items()
+            if self.namespaces.unqualified(key).startswith(key_prefix)
+            for companion_prefix, _, _ in functions
+        ]
+
+    async def get_etag(self, key: str) -> Optional[str]:
+        """Get the ETag stored next to a value without reading the value"""
+        try:
+            with time_cache_operation("get_etag"):
+                etag = await self.redis_client.get(ETAG_PREFIX + self.key(key))
+            return etag.decode() if etag else None
         except Exception as e:
-            print(f"Cache get error: {e}")
+            log_error("Cache get error", e)
             return None
 
-    def set(self, key: str, value: Any, expire: int = 3600) -> bool:
-        """Set value in cache with expiration"""
+    def _drop_local(self, key: str):
+        """Drop the decoded, raw and compressed L1 copies of a key"""
+        if self.local_cache is not None:
+            self.local_cache.delete(key)
+            self.local_cache.delete(RAW_L1_PREFIX + key)
+            for encoding in self.compressed_encodings:
+                self.local_cache.delete(f"{encoding}:{key}")
+
+    async def _publish_invalidation(self, payload: str):
+        """Tell every worker to drop the given L1 entries"""
+        if self.local_cache is None:
+            return
+        try:
+            await self.redis_client.publish(self.invalidation_channel, payload)
+        except Exception as e:
+            log_error("Cache invalidation publish error", e)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from cache, checking the L1 cache before Redis"""
+        value, _ = await self._get_with_ttl(self.key(key))
+        return value
+
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """Get the stored JSON bytes of a value without decoding them"""
+        value, _ = await self._get_with_ttl(self.key(key), raw=True)
+        return value
+
+    async def _get_with_ttl(
+        self, key: str, raw: bool = False, encoding: Optional[str] = None, negative: bool = False
+    ) -> Tuple[Optional[Any], Optional[int]]:
+        """Get the value stored under a Redis key and its remaining TTL in milliseconds (None for L1 hits).
+
+        With an encoding, the compressed body stored next to the value (see
+        register_compressed) is returned instead when there is one. With
+        negative=True a missing value with a tombstone returns TOMBSTONE.
+        """
+        self.ttl_policy.record_read(key)
+        local_key = RAW_L1_PREFIX + key if raw else key
+        compressed_key = f"{encoding}:{key}" if encoding in self.compressed_encodings else None
+        if self.local_cache is not None:
+            for candidate in (compressed_key, local_key):
+                value = self.local_cache.get(candidate) if candidate else None
+                if value is not None:
+                    return value, None
+
+        try:
+            with time_cache_operation("get"):
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.get(key)
+                    pipe.pttl(key)
+                    if negative:
+                        pipe.exists(NEGATIVE_PREFIX + key)
+                    if compressed_key:
+                        pipe.get(compressed_key)
+                    value, ttl_ms, *extra = await pipe.execute()
+            tombstone = extra.pop(0) if negative else False
+            compressed = extra
+            if value and compressed and compressed[0]:
+                self.l2_hits += 1
+                observe_payload_size("get", len(compressed[0]))
+                head = CompressedHead(compressed[0])
+                if self.local_cache is not None:
+                    self.local_cache.set(compressed_key, head)
+                return head, ttl_ms
+            if value:
+                self.l2_hits += 1
+                observe_payload_size("get", len(value))
+                value = self.codec.to_json_bytes(value) if raw else self.codec.decode(value)
+                if self.local_cache is not None and not self._is_stale(ttl_ms):
+                    self.local_cache.set(local_key, value)
+                return value, ttl_ms
+            if tombstone:
+                self.negative_hits += 1
+                return TOMBSTONE, None
+            self.l2_misses += 1
+            return None, None
+        except Exception as e:
+            log_error("Cache get error", e)
+            return None, None
+
+    def _is_stale(self, ttl_ms: Optional[int]) -> bool:
+        """Whether a value has passed its soft expiry and is in the stale window"""
+        return self.stale_ttl > 0 and ttl_ms is not None and 0 <= ttl_ms < self.stale_ttl * 1000
+
+    async def set(self, key: str, value: Any, expire: int = 3600, tags: Sequence[str] = ()) -> bool:
+        """Set value in cache with expiration, optionally under invalidation tags"""
+        return await self._set(self.key(key), value, expire, expire, tags)
+
+    async def _set(
+        self, key: str, value: Any, expire: int, redis_expire: int, tags: Sequence[str] = ()
+    ) -> bool:
+        """Set the value of a Redis key with separate logical and Redis expirations, adapted to the key (see AdaptiveTTL)"""
+        ttl = self.ttl_policy.ttl(key, expire)
+        expire, redis_expire = ttl, redis_expire + ttl - expire
         try:
-            serialized_value = json.dumps(value)
-            return self.redis_client.setex(key, expire, serialized_value)
+            serialized_value = self.codec.encode(value)
+            observe_payload_size("set", len(serialized_value))
+            cache_key = self.namespaces.unqualified(key)
+            if any(cache_key.startswith(key_prefix) for key_prefix in self._compressed_families):
+                # Compressing a large body would hold up the event loop
+                companions = await asyncio.to_thread(self._companions_for, key, value, expire, redis_expire)
+            else:
+                companions = self._companions_for(key, value, expire, redis_expire)
+            with time_cache_operation("set"):
+                if tags or companions:
+                    async with self.redis_client.pipeline(transaction=False) as pipe:
+                        pipe.setex(key, redis_expire, serialized_value)
+                        for companion_key, companion, companion_expire in companions:
+                            pipe.setex(companion_key, companion_expire, companion)
+                        for tag in tags:
+                            # Tag sets live as long as their longest-lived member
+                            tag_key = TAG_PREFIX + self.key(tag)
+                            pipe.sadd(tag_key, key)
+                            pipe.expire(tag_key, redis_expire, nx=True)
+                            pipe.expire(tag_key, redis_expire, gt=True)
+                        result = (await pipe.execute())[0]
+                else:
+                    result = await self.redis_client.setex(key, redis_expire, serialized_value)
+            if self.local_cache is not None:
+                self._drop_local(key)
+                self.local_cache.set(key, value, expire)
+            return result
         except Exception as e:
-            print(f"Cache set error: {e}")
+            log_error("Cache set error", e)
             return False
 
-    def delete(self, key: str) -> bool:
-        """Delete value from cache"""
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values with one MGET; missing keys are left out"""
+        redis_keys = {key: self.key(key) for key in keys}
+        for redis_key in redis_keys.values():
+            self.ttl_policy.record_read(redis_key)
+        found = {}
+        remaining = keys
+        if self.local_cache is not None:
+            remaining = []
+            for key in keys:
+                value = self.local_cache.get(redis_keys[key])
+                if value is not None:
+                    found[key] = value
+                else:
+                    remaining.append(key)
+
+        if not remaining:
+            return found
         try:
-            return bool(self.redis_client.delete(key))
+            with time_cache_operation("mget"):
+                values = await self.redis_client.mget([redis_keys[key] for key in remaining])
         except Exception as e:
-            print(f"Cache delete error: {e}")
+            log_error("Cache get error", e)
+            return found
+
+        for key, value in zip(remaining, values):
+            if value:
+                self.l2_hits += 1
+                observe_payload_size("get", len(value))
+                found[key] = self.codec.decode(value)
+                if self.local_cache is not None:
+                    self.local_cache.set(redis_keys[key], found[key])
+            else:
+                self.l2_misses += 1
+        return found
+
+    async def set_many(self, mapping: Dict[str, Any], expire: int = 3600) -> bool:
+        """Set several values in one pipeline, stored like get_or_set() entries"""
+        return await self._set_many({self.key(key): value for key, value in mapping.items()}, expire)
+
+    async def _set_many(self, mapping: Dict[str, Any], expire: int) -> bool:
+        """Set the values of several Redis keys in one pipeline"""
+        if not mapping:
+            return True
+        ttls = {key: self.ttl_policy.ttl(key, expire) for key in mapping}
+        try:
+            with time_cache_operation("set_many"):
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for key, value in mapping.items():
+                        serialized_value = self.codec.encode(value)
+                        observe_payload_size("set", len(serialized_value))
+                        pipe.setex(key, ttls[key] + self.stale_ttl, serialized_value)
+                        for companion_key, companion, companion_expire in self._companions_for(
+                            key, value, ttls[key], ttls[key] + self.stale_ttl
+                        ):
+                            pipe.setex(companion_key, companion_expire, companion)
+                    await pipe.execute()
+            if self.local_cache is not None:
+                for key, value in mapping.items():
+                    self._drop_local(key)
+                    self.local_cache.set(key, value, ttls[key])
+            return True
+        except Exception as e:
+            log_error("Cache set error", e)
             return False
 
-    def clear_all(self) -> bool:
-        """Clear all cache"""
+    async def replace_many(self, mapping: Dict[str, Any], expire: int = 3600) -> bool:
+        """Write several fresh values through after a batch write"""
+        mapping = {self.key(key): value for key, value in mapping.items()}
+        for key in mapping:
+            self.ttl_policy.record_write(key)
+        result = await self._set_many(mapping, expire)
+        await self._publish_invalidation("\n".join(mapping))
+        return result
+
+    async def delete_many(self, keys: List[str]) -> int:
+        """Delete several values with one command and one invalidation message"""
+        if not keys:
+            return 0
+        keys = [self.key(key) for key in keys]
+        for key in keys:
+            self._drop_local(key)
+            self.ttl_policy.record_write(key)
+        try:
+            with time_cache_operation("delete_many"):
+                deleted = await self.redis_client.delete(*self._with_companion_keys(keys))
+        except Exception as e:
+            log_error("Cache delete error", e)
+            deleted = 0
+        await self._publish_invalidation("\n".join(keys))
+        return deleted
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        expire: int = 3600,
+        wait_on_miss: bool = True,
+        raw: bool = False,
+        tags: Sequence[str] = (),
+        encoding: Optional[str] = None,
+        negative_ttl: int = 0
+    ) -> Tuple[Optional[Any], bool]:
+        """Get value from cache, loading it on a miss with stampede protection; returns (value, from_cache).
+
+        Loaders open their own database session (a refresh can outlive the
+        request). raw, encoding and negative_ttl work as in get_raw,
+        register_compressed and clear_missing; tags as in invalidate_tags.
+        """
+        key = self.key(key)
+        value, ttl_ms = await self._get_with_ttl(key, raw=raw, encoding=encoding, negative=negative_ttl > 0)
+        if value is TOMBSTONE:
+            return None, True
+        if value is not None:
+            if self._is_stale(ttl_ms):
+                self.stale_hits += 1
+                self._schedule_refresh(key, loader, expire, tags, negative_ttl)
+            return value, True
+
+        if not wait_on_miss:
+            self._schedule_refresh(key, loader, expire, tags, negative_ttl)
+            return None, False
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._load_with_lock(key, loader, expire, tags, wait=True, negative_ttl=negative_ttl)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(self._inflight, key, done))
+        else:
+            self.coalesced_misses += 1
+        # Shield so a cancelled request doesn't abort the load other waiters share
+        return await asyncio.shield(task), False
+
+    def _schedule_refresh(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        expire: int,
+        tags: Sequence[str],
+        negative_ttl: int = 0
+    ):
+        """Refresh a stale value in the background unless a refresh is already running"""
+        if key in self._refresh_tasks:
+            return
+        task = asyncio.create_task(
+            self._load_with_lock(key, loader, expire, tags, wait=False, negative_ttl=negative_ttl)
+        )
+        self._refresh_tasks[key] = task
+        task.add_done_callback(lambda done: self._forget(self._refresh_tasks, key, done))
+
+    @staticmethod
+    def _forget(tasks: Dict[str, asyncio.Task], key: str, task: asyncio.Task):
+        """Drop a finished task from its registry and surface unexpected errors"""
+        if tasks.get(key) is task:
+            del tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            log_error(f"Cache load error for {key}", task.exception())
+
+    async def _load_with_lock(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        expire: int,
+        tags: Sequence[str],
+        wait: bool,
+        negative_ttl: int = 0
+    ) -> Optional[Any]:
+        """Run loader under a Redis lock so only one node recomputes a key.
+
+        Without the lock, wait=True polls for the holder's result and falls
+        back to loading directly if the holder gives up; wait=False returns
+        None since another node is already refreshing.
+        """
+        lock = self.redis_client.lock(LOCK_PREFIX + key, timeout=self.lock_timeout, blocking=False)
+        try:
+            acquired = await lock.acquire()
+        except Exception as e:
+            # Redis is unavailable; load without coordinating with other nodes
+            log_error("Cache lock error", e)
+            return await loader()
+
+        if acquired:
+            try:
+                value = await loader()
+                if value is not None:
+                    if not wait:
+                        self.background_refreshes += 1
+                    await self._set(key, value, expire, expire + self.stale_ttl, tags)
+                elif negative_ttl > 0:
+                    await self._set_tombstone(key, negative_ttl)
+                return value
+            finally:
+                try:
+                    await lock.release()
+                except Exception:
+                    pass
+
+        if not wait:
+            return None
+
+        deadline = asyncio.get_running_loop().time() + self.lock_timeout
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.get(key)
+                    pipe.exists(LOCK_PREFIX + key)
+                    value, locked = await pipe.execute()
+            except Exception:
+                break
+            if value:
+                return self.codec.decode(value)
+            if not locked:
+                # The holder finished without caching anything (e.g. not found)
+                break
+        return await loader()
+
+    async def _set_tombstone(self, key: str, negative_ttl: int):
+        """Record that key's loader found nothing"""
         try:
-            self.redis_client.flushdb()
+            await self.redis_client.set(NEGATIVE_PREFIX + key, b"1", ex=negative_ttl)
+        except Exception as e:
+            log_error("Cache set error", e)
+
+    async def clear_missing(self, keys: List[str]) -> bool:
+        """Drop the tombstones of keys that now exist (e.g. after a create)"""
+        if not keys:
+            return True
+        try:
+            await self.redis_client.delete(*[NEGATIVE_PREFIX + self.key(key) for key in keys])
             return True
         except Exception as e:
-            print(f"Cache clear error: {e}")
+            log_error("Cache delete error", e)
             return False
 
-    def increment_hits(self):
-        """Increment cache hits counter"""
-        self.hits += 1
+    async def cached_keys(self, keys: List[str]) -> Set[str]:
+        """Which of the given keys are currently stored, checked in one pipeline"""
+        if not keys:
+            return set()
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.exists(self.key(key))
+                found = await pipe.execute()
+        except Exception as e:
+            log_error("Cache get error", e)
+            return set()
+        return {key for key, exists in zip(keys, found) if exists}
 
-    def increment_misses(self):
-        """Increment cache misses counter"""
-        self.misses += 1
+    async def delete(self, key: str) -> bool:
+        """Delete value from cache"""
+        key = self.key(key)
+        self._drop_local(key)
+        self.ttl_policy.record_write(key)
+        try:
+            with time_cache_operation("delete"):
+                deleted = bool(await self.redis_client.delete(*self._with_companion_keys([key])))
+        except Exception as e:
+            log_error("Cache delete error", e)
+            deleted = False
+        await self._publish_invalidation(key)
+        return deleted
+
+    async def replace(self, key: str, value: Any, expire: int = 3600) -> bool:
+        """Write a fresh value through after a database write.
+
+        Unlike set(), other workers are told to drop their L1 copy, and the
+        value keeps the same stale window as entries stored by get_or_set().
+        """
+        key = self.key(key)
+        self.ttl_policy.record_write(key)
+        result = await self._set(key, value, expire, expire + self.stale_ttl)
+        await self._publish_invalidation(key)
+        return result
+
+    async def invalidate_tags(
+        self, tags: Iterable[str], keys: Sequence[str] = (), raise_errors: bool = False
+    ) -> int:
+        """Delete every key stored under any of the given tags, plus `keys`, in one round trip.
+
+        Returns the number of keys removed. Keys that already expired may
+        still be listed in a tag set; deleting them is a no-op. Redis errors
+        are logged and count as nothing removed unless raise_errors is set.
+        """
+        tag_keys = [TAG_PREFIX + self.key(tag) for tag in dict.fromkeys(tags)]
+        keys = [self.key(key) for key in dict.fromkeys(keys)]
+        if not tag_keys and not keys:
+            return 0
+        try:
+            with time_cache_operation("invalidate_tags"):
+                removed = await self._invalidate_tags_script(
+                    keys=[*tag_keys, *keys],
+                    args=[
+                        self.invalidation_channel,
+                        "1" if self.local_cache is not None else "0",
+                        len(tag_keys),
+                        *self._companion_prefixes()
+                    ]
+                )
+        except Exception as e:
+            log_error("Cache tag invalidation error", e)
+            if raise_errors:
+                raise
+            return 0
+        for key in removed:
+            self._drop_local(key.decode())
+            self.ttl_policy.record_write(key.decode())
+        return len(removed)
+
+    async def tag_names(self) -> List[str]:
+        """Every tag that currently has keys stored under it (raises on Redis errors)"""
+        tags = []
+        async for tag_key in self.redis_client.scan_iter(match=TAG_PREFIX + "*", count=1000):
+            redis_key = tag_key.decode()[len(TAG_PREFIX):]
+            tag = self.namespaces.unqualified(redis_key)
+            # Tag sets of old generations are waiting to be reclaimed
+            if self.key(tag) == redis_key:
+                tags.append(tag)
+        return tags
 
-    def get_stats(self) -> dict:
-        """Get cache statistics"""
-        total_requests = self.hits + self.misses
-        hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
+    async def mark_recent_write(self, seconds: float):
+        """Record that the database was written to within the last `seconds`"""
+        try:
+            await self.redis_client.set(self.recent_write_key, b"1", px=max(1, int(seconds * 1000)))
+        except Exception as e:
+            log_error("Cache set error", e)
+
+    async def has_recent_write(self) -> bool:
+        """Whether a write may still be missing from the read replica.
+
+        Assumes a write when Redis can't tell, so callers fall back to the
+        primary rather than risk caching stale rows.
+        """
+        try:
+            return bool(await self.redis_client.exists(self.recent_write_key))
+        except Exception as e:
+            log_error("Cache get error", e)
+            return True
+
+    async def clear(self, namespace: Sequence[str] = ()) -> bool:
+        """Clear a namespace path (everything when empty) by moving it to a new generation.
+
+        Its keys become unreachable at once on this worker and, as soon as
+        they hear about it, on every other worker; they're deleted in the
+        background afterwards. Keys outside the cache service (other
+        applications, stats, hot-product scores) are left alone.
+        """
+        try:
+            await self.namespaces.bump(namespace)
+            cleared = True
+        except Exception as e:
+            log_error("Cache clear error", e)
+            cleared = False
+        if self.local_cache is not None:
+            self.local_cache.clear()
+        try:
+            await self.redis_client.publish(self.invalidation_channel, GENERATIONS_CHANGED)
+        except Exception as e:
+            log_error("Cache invalidation publish error", e)
+        self._schedule_reclaim()
+        return cleared
+
+    def _schedule_reclaim(self):
+        """Delete keys of old generations in the background unless that's already running"""
+        if self._reclaim_task is None or self._reclaim_task.done():
+            self._reclaim_task = asyncio.create_task(self._reclaim())
+
+    async def _reclaim(self):
+        """Reclaim old generations, logging errors (they're retried on the next clear or start)"""
+        try:
+            await self.namespaces.reclaim()
+        except Exception as e:
+            log_error("Cache reclaim error", e)
+
+    def increment_hits(self, endpoint: str, family: str, count: int = 1):
+        """Record cache hits for an endpoint and key family"""
+        self.stats.record(endpoint, family, True, count)
+
+    def increment_misses(self, endpoint: str, family: str, count: int = 1):
+        """Record cache misses for an endpoint and key family"""
+        self.stats.record(endpoint, family, False, count)
+
+    async def get_stats(self) -> dict:
+        """Get cluster-wide cache statistics plus this worker's tier statistics"""
+        l2_requests = self.l2_hits + self.l2_misses
+        l2_hit_rate = (self.l2_hits / l2_requests * 100) if l2_requests > 0 else 0
 
         return {
-            "hits": self.hits,
-            "misses": self.misses,
-            "hit_rate": round(hit_rate, 2),
-            "total_requests": total_requests
+            **await self.stats.get_stats(),
+            "codec": self.codec.name,
+            "l1": self.local_cache.get_stats() if self.local_cache is not None else None,
+            "l2": {
+                "hits": self.l2_hits,
+                "misses": self.l2_misses,
+                "hit_rate": round(l2_hit_rate, 2)
+            },
+            "coalesced_misses": self.coalesced_misses,
+            "stale_hits": self.stale_hits,
+            "negative_hits": self.negative_hits,
+            "background_refreshes": self.background_refreshes,
+            "adaptive_ttl": self.ttl_policy.get_stats(),
+            "namespaces": self.namespaces.get_stats(),
+            "circuit_breaker": self.breaker.get_stats()
         }
 
-    def health_check(self) -> bool:
+    async def health_check(self) -> bool:
         """Check if Redis is connected"""
         try:
-            self.redis_client.ping()
+            await self.redis_client.ping()
             return True
         except Exception:
             return False
+
+    async def close(self):
+        """Stop background tasks and close the Redis connection pool"""
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+        for task in (self._listener_task, self._reclaim_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener_task = self._reclaim_task = None
+        await self.breaker.stop()
+        await self.stats.stop()
+        await self.redis_client.aclose()
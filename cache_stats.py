@@ -0,0 +1,154 @@
+import time
+import asyncio
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from circuit_breaker import log_error
+
+# Redis keys holding the cluster-wide counters (under the key prefix)
+TOTALS_KEY = "stats:totals"
+MINUTE_KEY_PREFIX = "stats:minute:"
+
+# Rate windows reported by get_stats, in minutes
+WINDOWS = (1, 5, 15)
+
+def _rate(hits: int, misses: int) -> dict:
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total * 100, 2) if total > 0 else 0
+    }
+
+class StatsRecorder:
+    """Cache hit/miss counters aggregated across every worker in Redis.
+
+    Counts are buffered in process and flushed with one pipeline of HINCRBYs
+    every flush_interval seconds, so recording stays off the request path.
+    Each count is stored under "endpoint|family|hits" (or misses) in a
+    totals hash and in a per-minute hash used for windowed rates.
+    """
+
+    def __init__(self, redis_client, prefix: str = "cache", flush_interval: float = 2.0):
+        self.redis_client = redis_client
+        self.totals_key = f"{prefix}:{TOTALS_KEY}"
+        self.minute_key_prefix = f"{prefix}:{MINUTE_KEY_PREFIX}"
+        self.flush_interval = flush_interval
+        self._pending: Counter = Counter()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def record(self, endpoint: str, family: str, hit: bool, count: int = 1):
+        """Buffer a hit or miss for an endpoint and key family"""
+        if count:
+            self._pending[(endpoint, family, "hits" if hit else "misses")] += count
+
+    async def start(self):
+        """Start the periodic flush loop"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush loop and write out anything still buffered"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Write buffered counts to Redis, keeping them buffered if Redis fails"""
+        if not self._pending:
+            return True
+        pending, self._pending = self._pending, Counter()
+
+        minute_key = f"{self.minute_key_prefix}{int(time.time() // 60)}"
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for (endpoint, family, outcome), count in pending.items():
+                    field = f"{endpoint}|{family}|{outcome}"
+                    pipe.hincrby(self.totals_key, field, count)
+                    pipe.hincrby(minute_key, field, count)
+                pipe.expire(minute_key, (max(WINDOWS) + 1) * 60)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            log_error("Cache stats flush error", e)
+            self._pending.update(pending)
+            return False
+
+    async def get_stats(self) -> dict:
+        """Get cluster-wide totals by family and endpoint plus windowed rates"""
+        await self.flush()
+
+        now = time.time()
+        current_minute = int(now // 60)
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hgetall(self.totals_key)
+                for offset in range(max(WINDOWS)):
+                    pipe.hgetall(f"{self.minute_key_prefix}{current_minute - offset}")
+                totals, *minutes = await pipe.execute()
+        except Exception as e:
+            log_error("Cache stats read error", e)
+            totals, minutes = {}, []
+
+        overall, by_family, by_endpoint = self._aggregate(totals)
+
+        windows = {}
+        # The current minute is partial, so a window spans its elapsed seconds
+        # plus the complete minutes before it
+        elapsed_in_minute = now - current_minute * 60
+        for window in WINDOWS:
+            window_totals, _, _ = self._aggregate_many(minutes[:window])
+            seconds = (window - 1) * 60 + elapsed_in_minute
+            stats = _rate(*window_totals)
+            stats["requests_per_second"] = round(sum(window_totals) / seconds, 3) if seconds > 0 else 0
+            windows[f"{window}m"] = stats
+
+        total_requests = sum(overall)
+        return {
+            **_rate(*overall),
+            "total_requests": total_requests,
+            "by_family": {name: _rate(*counts) for name, counts in sorted(by_family.items())},
+            "by_endpoint": {name: _rate(*counts) for name, counts in sorted(by_endpoint.items())},
+            "windows": windows
+        }
+
+    def _aggregate_many(self, hashes) -> Tuple[Tuple[int, int], Dict, Dict]:
+        merged: Counter = Counter()
+        for counts in hashes:
+            for field, count in counts.items():
+                merged[field] += int(count)
+        return self._aggregate(merged)
+
+    @staticmethod
+    def _aggregate(counts) -> Tuple[Tuple[int, int], Dict[str, Tuple[int, int]], Dict[str, Tuple[int, int]]]:
+        """Sum "endpoint|family|outcome" counts overall, per family and per endpoint"""
+        hits = misses = 0
+        by_family: Dict[str, list] = {}
+        by_endpoint: Dict[str, list] = {}
+        for field, count in counts.items():
+            if isinstance(field, bytes):
+                field = field.decode()
+            endpoint, family, outcome = field.rsplit("|", 2)
+            index = 0 if outcome == "hits" else 1
+            count = int(count)
+            if index == 0:
+                hits += count
+            else:
+                misses += count
+            by_family.setdefault(family, [0, 0])[index] += count
+            by_endpoint.setdefault(endpoint, [0, 0])[index] += count
+        return (
+            (hits, misses),
+            {name: tuple(pair) for name, pair in by_family.items()},
+            {name: tuple(pair) for name, pair in by_endpoint.items()}
+        )
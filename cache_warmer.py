@@ -0,0 +1,210 @@
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from cache_service import CacheService
+from circuit_breaker import CircuitOpenError, log_error
+from catalog_cache import CatalogCache
+
+# Redis keys used by the warmer (under the key prefix)
+HOT_PRODUCTS_KEY = "stats:hot_products"        # sorted set: product id scored by reads
+DECAY_MARKER_KEY = "stats:hot_products:decay"  # set while the last decay is recent
+REFRESH_LOCK_KEY = "lock:refresh_ahead"        # held by the worker refreshing this round
+
+class CacheWarmer:
+    """Keeps the catalog and the most-read products in cache.
+
+    Product reads are counted in process and flushed into a Redis sorted
+    set whose scores halve every decay_interval, so it ranks recently hot
+    products. warm() preloads the catalog and the top_n hot products (run
+    in the background at startup, with ready set once it is over, and
+    after a cache clear) and gives up after warmup_timeout seconds, e.g.
+    when the database is down.
+    A background loop then refreshes hot products refresh_ahead seconds
+    before their TTL runs out, so they never expire in front of a user;
+    one worker per round does the refresh.
+    """
+
+    def __init__(
+        self,
+        cache_service: CacheService,
+        catalog_cache: CatalogCache,
+        fetch_page: Callable[[int, Optional[int]], Awaitable[Tuple[List[dict], Optional[int]]]],
+        fetch_products: Callable[[List[int]], Awaitable[List[dict]]],
+        expire: int = 600,
+        top_n: int = 200,
+        interval: float = 15.0,
+        refresh_ahead: float = 60.0,
+        decay_interval: float = 600.0,
+        warmup_timeout: float = 30.0
+    ):
+        self.cache_service = cache_service
+        self.redis_client = cache_service.redis_client
+        self.hot_products_key = cache_service.shared_key(HOT_PRODUCTS_KEY)
+        self.decay_marker_key = cache_service.shared_key(DECAY_MARKER_KEY)
+        self.refresh_lock_key = cache_service.shared_key(REFRESH_LOCK_KEY)
+        self.catalog_cache = catalog_cache
+        self.fetch_page = fetch_page
+        self.fetch_products = fetch_products
+        self.expire = expire
+        self.top_n = top_n
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self.decay_interval = decay_interval
+        self.warmup_timeout = warmup_timeout
+
+        self.ready = False
+        self._pending: Counter = Counter()
+        self._hot_ids: List[int] = []
+        self._task: Optional[asyncio.Task] = None
+        self._warm_task: Optional[asyncio.Task] = None
+
+        # Per-worker statistics
+        self.warmed_keys = 0
+        self.refreshed_ahead = 0
+
+    def record(self, product_id: int, count: int = 1):
+        """Buffer a read of a product"""
+        self._pending[product_id] += count
+
+    async def start(self):
+        """Start warming the cache in the background and the refresh loop"""
+        if self._warm_task is None:
+            self._warm_task = asyncio.create_task(self._warm_up())
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _warm_up(self):
+        """The startup warm-up; the worker is ready once it has finished or given up"""
+        await self.warm()
+        self.ready = True
+
+    async def stop(self):
+        """Stop background work and flush buffered read counts"""
+        for task in (self._task, self._warm_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._warm_task = None
+        await self.flush()
+
+    def schedule_warm(self):
+        """Warm the cache in the background (e.g. after it was cleared)"""
+        if self._warm_task is None or self._warm_task.done():
+            self._warm_task = asyncio.create_task(self.warm())
+
+    async def warm(self) -> bool:
+        """Load the catalog and every hot product that isn't cached; returns whether it finished"""
+        try:
+            await asyncio.wait_for(self._warm(), self.warmup_timeout)
+            return True
+        except asyncio.TimeoutError:
+            print(f"Cache warm-up did not finish within {self.warmup_timeout}s; continuing cold")
+        except Exception as e:
+            log_error("Cache warm-up error", e)
+        return False
+
+    async def _warm(self):
+        while not await self.catalog_cache.ensure_loaded(self.fetch_page):
+            if self.cache_service.breaker.is_open:
+                raise CircuitOpenError("Redis is unavailable; not waiting for the catalog")
+            # Another worker may be loading it; ensure_loaded only starts one load
+            await asyncio.sleep(0.2)
+        self.warmed_keys += await self._refresh(await self.hot_product_ids(), margin=0)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+                await self._decay()
+                # Reload the catalog if Redis lost it (restart, eviction)
+                await self.catalog_cache.ensure_loaded(self.fetch_page)
+                if await self._acquire_round():
+                    self.refreshed_ahead += await self._refresh(
+                        await self.hot_product_ids(), margin=self.refresh_ahead
+                    )
+            except Exception as e:
+                log_error("Cache refresh-ahead error", e)
+
+    async def flush(self) -> bool:
+        """Add buffered read counts to the hot product ranking"""
+        if not self._pending:
+            return True
+        pending, self._pending = self._pending, Counter()
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for product_id, count in pending.items():
+                    pipe.zincrby(self.hot_products_key, count, product_id)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            log_error("Cache hot key flush error", e)
+            self._pending.update(pending)
+            return False
+
+    async def _decay(self):
+        """Halve every hot product score once per decay_interval across all workers"""
+        if await self.redis_client.set(self.decay_marker_key, b"1", nx=True, px=int(self.decay_interval * 1000)):
+            await self.redis_client.zunionstore(self.hot_products_key, {self.hot_products_key: 0.5})
+            await self.redis_client.zremrangebyscore(self.hot_products_key, "-inf", "(0.5")
+
+    async def _acquire_round(self) -> bool:
+        """Let one worker per interval run the refresh"""
+        return bool(await self.redis_client.set(
+            self.refresh_lock_key, b"1", nx=True, px=max(1, int(self.interval * 1000) - 100)
+        ))
+
+    async def hot_product_ids(self) -> List[int]:
+        """The top_n most-read product IDs (the last known list if Redis has none)"""
+        try:
+            ids = await self.redis_client.zrevrange(self.hot_products_key, 0, self.top_n - 1)
+        except Exception as e:
+            log_error("Cache hot key read error", e)
+            return self._hot_ids
+        if ids:
+            self._hot_ids = [int(product_id) for product_id in ids]
+        return self._hot_ids
+
+    async def _refresh(self, product_ids: List[int], margin: float) -> int:
+        """Reload products that are missing or expire within margin seconds.
+
+        Remaining lifetimes come from one pipeline of PTTLs and the reload is
+        one database query plus one pipelined write. Returns the number of
+        products written.
+        """
+        if not product_ids:
+            return 0
+        keys = [f"product:{product_id}" for product_id in product_ids]
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.pttl(self.cache_service.key(key))
+            ttls = await pipe.execute()
+
+        # PTTL includes the stale window that follows the logical expiry
+        threshold_ms = (self.cache_service.stale_ttl + margin) * 1000
+        due = [
+            product_id for product_id, ttl_ms in zip(product_ids, ttls)
+            if ttl_ms == -2 or 0 <= ttl_ms < threshold_ms
+        ]
+        if not due:
+            return 0
+
+        products = await self.fetch_products(due)
+        found = {product["id"] for product in products}
+        gone = [product_id for product_id in due if product_id not in found]
+        if gone:
+            # Deleted products don't need warming
+            await self.redis_client.zrem(self.hot_products_key, *gone)
+        await self.cache_service.set_many({f"product:{p['id']}": p for p in products}, expire=self.expire)
+        return len(products)
+
+    def get_stats(self) -> dict:
+        """Warm-up and refresh-ahead counters of this worker"""
+        return {
+            "warmed_keys": self.warmed_keys,
+            "refreshed_ahead": self.refreshed_ahead
+        }
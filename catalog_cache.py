@@ -0,0 +1,354 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from cache_service import CacheService
+from circuit_breaker import log_error
+from cache_codecs import dumps_json, loads_json
+from http_compression import CompressedHead, compress_head
+
+# Cache keys holding the product list (stored under CacheService.key())
+CATALOG_KEY = "products:catalog"          # hash: product id -> product JSON
+INDEX_KEY = "products:ids"                # sorted set: product id scored by id
+READY_KEY = "products:catalog:ready"      # set once a full load has completed
+BUILDS_KEY = "products:catalog:builds"    # set of in-progress rebuild tokens
+VERSION_KEY = "products:catalog:version"  # changes with every catalog change
+EMPTY_KEY = "products:catalog:empty"      # set while a loaded catalog has no products
+# Compressed page bodies live under "{encoding}:" + key("products:catalog:page:{version}:{cursor}:{limit}")
+PAGE_BODY_PREFIX = "products:catalog:page:"
+
+def new_version() -> str:
+    """A catalog version: change time in milliseconds plus a random suffix.
+
+    Versions are never reused, so an ETag issued before Redis lost the
+    catalog can't match content loaded afterwards.
+    """
+    return f"{int(time.time() * 1000)}.{uuid.uuid4().hex[:8]}"
+
+# Read one page: ids after the cursor from the index, then their JSON from
+# the hash, plus the catalog version the page belongs to
+PAGE_SCRIPT = """
+local version = redis.call('GET', KEYS[3]) or ''
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[4]) == 1 then
+        return {{}, {}, version}
+    end
+    return false
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[2], '(' .. ARGV[1], '+inf', 'LIMIT', 0, ARGV[2])
+if #ids == 0 then
+    return {{}, {}, version}
+end
+return {ids, redis.call('HMGET', KEYS[1], unpack(ids)), version}
+"""
+
+# Read the catalog version and the compressed body stored for a page at that version
+COMPRESSED_PAGE_SCRIPT = """
+local version = redis.call('GET', KEYS[1])
+if not version then
+    return false
+end
+return {version, redis.call('GET', ARGV[1] .. version .. ARGV[2])}
+"""
+
+# Upsert one product, mirroring it into any rebuild that is in progress
+UPSERT_SCRIPT = """
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[1], ARGV[1])
+redis.call('SET', KEYS[4], ARGV[3])
+redis.call('DEL', KEYS[5])
+for _, token in ipairs(redis.call('SMEMBERS', KEYS[3])) do
+    redis.call('HSET', KEYS[1] .. ':tmp:' .. token, ARGV[1], ARGV[2])
+    redis.call('ZADD', KEYS[2] .. ':tmp:' .. token, ARGV[1], ARGV[1])
+    redis.call('SREM', KEYS[1] .. ':deleted:' .. token, ARGV[1])
+end
+"""
+
+# Remove one product, recording the delete for any rebuild that is in progress
+# (and marking the catalog empty when the last product goes)
+REMOVE_SCRIPT = """
+redis.call('HDEL', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('SET', KEYS[4], ARGV[2])
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    redis.call('SET', KEYS[5], '1', 'EX', ARGV[3])
+end
+for _, token in ipairs(redis.call('SMEMBERS', KEYS[3])) do
+    redis.call('HDEL', KEYS[1] .. ':tmp:' .. token, ARGV[1])
+    redis.call('ZREM', KEYS[2] .. ':tmp:' .. token, ARGV[1])
+    redis.call('SADD', KEYS[1] .. ':deleted:' .. token, ARGV[1])
+end
+"""
+
+# Load one batch into a rebuild without clobbering concurrent writes:
+# HSETNX keeps values upserted since the batch was read, deleted ids are skipped
+LOAD_BATCH_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    if redis.call('SISMEMBER', KEYS[3], ARGV[i]) == 0 then
+        if redis.call('HSETNX', KEYS[1], ARGV[i], ARGV[i + 1]) == 1 then
+            redis.call('ZADD', KEYS[2], ARGV[i], ARGV[i])
+        end
+    end
+end
+"""
+
+# Swap a finished rebuild in atomically; an empty result sets the empty marker
+# so pages read as empty instead of missing
+FINISH_SCRIPT = """
+redis.call('SREM', KEYS[5], ARGV[1])
+redis.call('DEL', KEYS[6])
+redis.call('SET', KEYS[7], ARGV[3])
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('RENAME', KEYS[3], KEYS[1])
+    redis.call('RENAME', KEYS[4], KEYS[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    redis.call('DEL', KEYS[8])
+else
+    redis.call('DEL', KEYS[1], KEYS[2])
+    redis.call('SET', KEYS[8], '1', 'EX', ARGV[2])
+end
+"""
+
+class CatalogCache:
+    """Product list kept in Redis as a hash plus an ordered id index.
+
+    Entries are plain JSON regardless of the configured cache codec so a
+    page can be spliced into a response without decoding each product.
+    Writes patch single entries in place instead of dropping the whole list,
+    so pages keep being served from cache on a write-heavy catalog. A full
+    load only happens when the catalog is cold or its ready marker expires,
+    and then runs in the background behind CacheService's recompute lock.
+    """
+
+    def __init__(
+        self, cache_service: CacheService, expire: int = 86400, batch_size: int = 1000, page_body_expire: int = 600
+    ):
+        self.cache_service = cache_service
+        self.redis_client = cache_service.redis_client
+        self.expire = expire
+        self.batch_size = batch_size
+        self.page_body_expire = page_body_expire
+
+        self._page_script = self.redis_client.register_script(PAGE_SCRIPT)
+        self._compressed_page_script = self.redis_client.register_script(COMPRESSED_PAGE_SCRIPT)
+        self._upsert_script = self.redis_client.register_script(UPSERT_SCRIPT)
+        self._remove_script = self.redis_client.register_script(REMOVE_SCRIPT)
+        self._load_batch_script = self.redis_client.register_script(LOAD_BATCH_SCRIPT)
+        self._finish_script = self.redis_client.register_script(FINISH_SCRIPT)
+
+    def _keys(self, *keys: str) -> List[str]:
+        """Redis keys of catalog keys at the current cache generation"""
+        return [self.cache_service.key(key) for key in keys]
+
+    async def ensure_loaded(
+        self,
+        fetch_batch: Callable[[int, Optional[int]], Awaitable[Tuple[List[dict], Optional[int]]]]
+    ) -> bool:
+        """Return whether the catalog is cached, starting a background load if not.
+
+        fetch_batch(limit, cursor) returns a page of products and the next
+        cursor; it must open its own database session.
+        """
+        async def load():
+            count = await self.rebuild(fetch_batch)
+            return {"count": count} if count is not None else None
+
+        ready, _ = await self.cache_service.get_or_set(READY_KEY, load, expire=self.expire, wait_on_miss=False)
+        return ready is not None
+
+    async def invalidate(self) -> bool:
+        """Mark the catalog cold so the next read reloads it"""
+        try:
+            await self.redis_client.set(self.cache_service.key(VERSION_KEY), new_version())
+        except Exception as e:
+            log_error("Catalog version error", e)
+        return await self.cache_service.delete(READY_KEY)
+
+    async def get_version(self) -> Optional[str]:
+        """Current catalog version (None if unknown), read without touching the catalog"""
+        try:
+            version = await self.redis_client.get(self.cache_service.key(VERSION_KEY))
+        except Exception as e:
+            log_error("Catalog version error", e)
+            return None
+        return version.decode() if version else None
+
+    async def rebuild(
+        self,
+        fetch_batch: Callable[[int, Optional[int]], Awaitable[Tuple[List[dict], Optional[int]]]]
+    ) -> Optional[int]:
+        """Load the full catalog into temporary keys and swap them in"""
+        token = uuid.uuid4().hex
+        keys = self._keys(CATALOG_KEY, INDEX_KEY, BUILDS_KEY, VERSION_KEY)
+        catalog_key, index_key, builds_key, version_key = keys
+        tmp_keys = [f"{catalog_key}:tmp:{token}", f"{index_key}:tmp:{token}", f"{catalog_key}:deleted:{token}"]
+        count = 0
+        try:
+            await self.redis_client.sadd(builds_key, token)
+            cursor = None
+            while True:
+                products, cursor = await fetch_batch(self.batch_size, cursor)
+                if products:
+                    args = []
+                    for product in products:
+                        args.extend([product["id"], dumps_json(product)])
+                    await self._load_batch_script(keys=tmp_keys, args=args)
+                    count += len(products)
+                if cursor is None:
+                    break
+            if self._keys(CATALOG_KEY, INDEX_KEY, BUILDS_KEY, VERSION_KEY) != keys:
+                # The cache was cleared meanwhile: this catalog would land in the old
+                # generation while the ready marker went to the new one
+                raise RuntimeError("cache cleared during rebuild")
+            await self._finish_script(
+                keys=[
+                    catalog_key, index_key, tmp_keys[0], tmp_keys[1], builds_key, tmp_keys[2], version_key,
+                    self.cache_service.key(EMPTY_KEY)
+                ],
+                args=[token, self.expire * 2, new_version()]
+            )
+            return count
+        except Exception as e:
+            log_error("Catalog rebuild error", e)
+            try:
+                await self.redis_client.srem(builds_key, token)
+                await self.redis_client.delete(*tmp_keys)
+            except Exception:
+                pass
+            return None
+
+    async def get_page(
+        self, limit: int, cursor: Optional[int] = None, raw: bool = False
+    ) -> Optional[Tuple[List[Any], Optional[int], Optional[str]]]:
+        """Get one page of products after cursor, or None if it can't be served from cache.
+
+        Returns the products, the next cursor and the catalog version the
+        page was read at. With raw=True the products are returned as their
+        stored JSON bytes.
+        """
+        try:
+            result = await self._page_script(
+                keys=self._keys(CATALOG_KEY, INDEX_KEY, VERSION_KEY, EMPTY_KEY), args=[cursor or 0, limit + 1]
+            )
+        except Exception as e:
+            log_error("Catalog page error", e)
+            return None
+        if result is None:
+            return None
+        ids, values, version = result
+        if any(value is None for value in values):
+            # Index and hash disagree (e.g. partially evicted); let the caller use the database
+            return None
+
+        next_cursor = int(ids[limit - 1]) if len(values) > limit else None
+        values = values[:limit]
+        products = values if raw else [loads_json(value) for value in values]
+        return products, next_cursor, version.decode() or None
+
+    async def get_compressed_page(
+        self, encoding: str, limit: int, cursor: Optional[int] = None
+    ) -> Optional[Tuple[CompressedHead, str]]:
+        """Get a page as a compressed body start, or None if it can't be served that way.
+
+        The body starts {"products":[...],"next_cursor":... and is finished
+        with http_compression.finish(). Each page is compressed once per
+        catalog version and encoding, then read back in one round trip
+        together with the version, which is returned for validators. Pages
+        smaller than the cache service's compression_min_size return None.
+        """
+        suffix = f":{cursor or 0}:{limit}"
+        try:
+            result = await self._compressed_page_script(
+                keys=self._keys(VERSION_KEY), args=[f"{encoding}:" + self.cache_service.key(PAGE_BODY_PREFIX), suffix]
+            )
+        except Exception as e:
+            log_error("Catalog page error", e)
+            return None
+        if result is not None and result[1] is not None:
+            return CompressedHead(result[1]), result[0].decode()
+
+        page = await self.get_page(limit, cursor, raw=True)
+        if page is None:
+            return None
+        products, next_cursor, version = page
+        body = b'{"products":[' + b",".join(products) + b'],"next_cursor":' + dumps_json(next_cursor)
+        if version is None or len(body) < self.cache_service.compression_min_size:
+            return None
+
+        # Compressing a large page would hold up the event loop
+        head = await asyncio.to_thread(compress_head, encoding, body)
+        try:
+            await self.redis_client.set(
+                f"{encoding}:" + self.cache_service.key(f"{PAGE_BODY_PREFIX}{version}{suffix}"),
+                head,
+                ex=self.page_body_expire
+            )
+        except Exception as e:
+            log_error("Catalog page error", e)
+        return head, version
+
+    async def upsert(self, product: dict) -> bool:
+        """Insert or update one product in place"""
+        try:
+            await self._upsert_script(
+                keys=self._keys(CATALOG_KEY, INDEX_KEY, BUILDS_KEY, VERSION_KEY, EMPTY_KEY),
+                args=[product["id"], dumps_json(product), new_version()]
+            )
+            return True
+        except Exception as e:
+            log_error("Catalog upsert error", e)
+            return False
+
+    async def upsert_many(self, products: List[dict]) -> bool:
+        """Insert or update several products in one pipeline"""
+        if not products:
+            return True
+        version = new_version()
+        keys = self._keys(CATALOG_KEY, INDEX_KEY, BUILDS_KEY, VERSION_KEY, EMPTY_KEY)
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for product in products:
+                    await self._upsert_script(
+                        keys=keys,
+                        args=[product["id"], dumps_json(product), version],
+                        client=pipe
+                    )
+                await pipe.execute()
+            return True
+        except Exception as e:
+            log_error("Catalog upsert error", e)
+            return False
+
+    async def remove_many(self, product_ids: List[int]) -> bool:
+        """Remove several products in one pipeline"""
+        if not product_ids:
+            return True
+        version = new_version()
+        keys = self._keys(CATALOG_KEY, INDEX_KEY, BUILDS_KEY, VERSION_KEY, EMPTY_KEY)
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for product_id in product_ids:
+                    await self._remove_script(
+                        keys=keys,
+                        args=[product_id, version, self.expire * 2],
+                        client=pipe
+                    )
+                await pipe.execute()
+            return True
+        except Exception as e:
+            log_error("Catalog remove error", e)
+            return False
+
+    async def remove(self, product_id: int) -> bool:
+        """Remove one product in place"""
+        try:
+            await self._remove_script(
+                keys=self._keys(CATALOG_KEY, INDEX_KEY, BUILDS_KEY, VERSION_KEY, EMPTY_KEY),
+                args=[product_id, new_version(), self.expire * 2]
+            )
+            return True
+        except Exception as e:
+            log_error("Catalog remove error", e)
+            return False
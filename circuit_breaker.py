@@ -0,0 +1,155 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, List, Optional
+
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Errors that mean Redis is unreachable or too slow (anything else, such as a
+# wrong-type reply, is the caller's problem and doesn't trip the breaker)
+CONNECTION_ERRORS = (RedisConnectionError, RedisTimeoutError, asyncio.TimeoutError, OSError)
+
+# Set in the probe task, whose calls go through while the breaker is half-open
+_probing: ContextVar[bool] = ContextVar("probing", default=False)
+
+class CircuitOpenError(RedisConnectionError):
+    """A Redis call turned away without trying because the breaker is open"""
+
+def log_error(message: str, error: BaseException):
+    """Print a cache error unless the open breaker turned the call away (announced once when it opened)"""
+    if not isinstance(error, CircuitOpenError):
+        print(f"{message}: {error}")
+
+class CircuitBreaker:
+    """Fails Redis calls fast after repeated connection errors until a probe reaches Redis again"""
+
+    def __init__(
+        self,
+        probe: Callable[[], Awaitable],
+        failure_threshold: int = 5,
+        probe_interval: float = 5.0
+    ):
+        self.probe = probe
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe_interval = probe_interval
+
+        self.state = CLOSED
+        self.failures = 0
+        self._on_close: List[Callable[[], Awaitable]] = []
+        self._probe_task: Optional[asyncio.Task] = None
+        self._opened_at: Optional[float] = None
+
+        # Per-worker statistics
+        self.trips = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != CLOSED
+
+    def on_close(self, callback: Callable[[], Awaitable]):
+        """Run callback once Redis is reachable again, before the breaker closes"""
+        self._on_close.append(callback)
+
+    async def call(self, function: Callable[..., Awaitable], *args, **kwargs):
+        """Await function(*args, **kwargs) unless the breaker is open, recording the outcome"""
+        if _probing.get():
+            return await function(*args, **kwargs)
+        if self.state != CLOSED:
+            self.rejected += 1
+            raise CircuitOpenError(f"Redis circuit is {self.state}")
+        try:
+            result = await function(*args, **kwargs)
+        except CONNECTION_ERRORS as e:
+            self.record_failure(e)
+            raise
+        self.failures = 0
+        return result
+
+    def record_failure(self, error: BaseException):
+        """Count a connection error, opening the breaker at failure_threshold in a row"""
+        self.failures += 1
+        self.last_error = str(error) or type(error).__name__
+        if self.state == CLOSED and self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.trips += 1
+            self._opened_at = time.monotonic()
+            print(
+                f"⚠️  Redis circuit open after {self.failures} failures ({self.last_error}); "
+                f"serving from the database, probing every {self.probe_interval}s"
+            )
+            if self._probe_task is None or self._probe_task.done():
+                self._probe_task = asyncio.create_task(self._probe_until_closed())
+
+    async def _probe_until_closed(self):
+        """Probe Redis until it answers and the recovery callbacks succeed, then close"""
+        _probing.set(True)
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            self.state = HALF_OPEN
+            try:
+                await self.probe()
+                for callback in self._on_close:
+                    await callback()
+            except Exception as e:
+                self.state = OPEN
+                self.last_error = str(e) or type(e).__name__
+                continue
+            break
+        outage = time.monotonic() - self._opened_at
+        self.state = CLOSED
+        self.failures = 0
+        print(f"✅ Redis circuit closed after {outage:.1f}s; cache calls resume")
+
+    async def stop(self):
+        """Stop probing (on shutdown)"""
+        if self._probe_task is not None and not self._probe_task.done():
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+        self._probe_task = None
+
+    def get_stats(self) -> dict:
+        """State, consecutive failures, trips and calls turned away on this worker"""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "open_for": round(time.monotonic() - self._opened_at, 3) if self.is_open else 0,
+            "last_error": self.last_error
+        }
+
+class GuardedPipeline(Pipeline):
+    """Pipeline whose execute() goes through the client's circuit breaker"""
+
+    breaker: CircuitBreaker
+
+    async def execute(self, raise_on_error: bool = True):
+        return await self.breaker.call(super().execute, raise_on_error)
+
+class GuardedRedis(redis.Redis):
+    """Redis client whose commands and pipelines go through a circuit breaker"""
+
+    def __init__(self, *args, breaker: CircuitBreaker, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = breaker
+
+    async def execute_command(self, *args, **options):
+        return await self.breaker.call(super().execute_command, *args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> GuardedPipeline:
+        pipe = GuardedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+        pipe.breaker = self.breaker
+        return pipe
@@ -1,8 +1,13 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from metrics import instrument_engine
+from pools import TimedAsyncQueuePool, database_pool_settings
+
 # Database configuration
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
@@ -10,15 +15,85 @@ DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "password123")
 DB_NAME = os.getenv("DB_NAME", "cache_example")
 
-# Create database URL
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Optional streaming replica for reads (same credentials and database name);
+# REPLICA_DATABASE_URL replaces the DB_REPLICA_* settings like DATABASE_URL does
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST", "")
+DB_REPLICA_PORT = os.getenv("DB_REPLICA_PORT", DB_PORT)
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL") or (
+    f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_REPLICA_HOST}:{DB_REPLICA_PORT}/{DB_NAME}" if DB_REPLICA_HOST else ""
+)
+HAS_REPLICA = bool(REPLICA_DATABASE_URL)
+# Seconds after a write during which reads that must see it use the primary;
+# set it above the replica's usual replay lag
+REPLICA_LAG_THRESHOLD = float(os.getenv("DB_REPLICA_LAG_THRESHOLD", "5"))
+
+# Async driver for each database a full DATABASE_URL or REPLICA_DATABASE_URL may name
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+# Create database URLs (psycopg2 for scripts, asyncpg for the request path);
+# DATABASE_URL replaces the DB_* settings, e.g. sqlite:///bench.db for benchmarks
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+def async_url(url: str) -> str:
+    """The URL with its database's async driver"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.get_backend_name()]).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = async_url(DATABASE_URL)
+ASYNC_REPLICA_DATABASE_URL = async_url(REPLICA_DATABASE_URL) if HAS_REPLICA else None
+
+# Per-worker pool sizing (see pools.database_pool_settings)
+POOL_SETTINGS = database_pool_settings()
+
+# Create SQLAlchemy engine (table creation and scripts only, so a small pool)
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=2,
+    max_overflow=2,
+    pool_pre_ping=POOL_SETTINGS["pool_pre_ping"],
+    pool_recycle=POOL_SETTINGS["pool_recycle"]
+)
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Create async SQLAlchemy engine used by the API handlers
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=TimedAsyncQueuePool, **POOL_SETTINGS)
+
+# Read-only engine on the replica (the primary when no replica is configured)
+if HAS_REPLICA:
+    replica_engine = create_async_engine(
+        ASYNC_REPLICA_DATABASE_URL, poolclass=TimedAsyncQueuePool, **POOL_SETTINGS
+    )
+else:
+    replica_engine = async_engine
+
+# Time every SQL statement for the /metrics endpoint
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+if HAS_REPLICA:
+    instrument_engine(replica_engine.sync_engine)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create AsyncSessionLocal class
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Sessions for reads that may lag behind the primary
+ReplicaSessionLocal = async_sessionmaker(
+    bind=replica_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+def read_session(primary: bool = False) -> AsyncSession:
+    """Open a session for reads: the replica unless primary is requested"""
+    return AsyncSessionLocal() if primary or not HAS_REPLICA else ReplicaSessionLocal()
+
 # Create Base class
 Base = declarative_base()
 
@@ -29,3 +104,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
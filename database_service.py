@@ -1,20 +1,48 @@
-from sqlalchemy.orm import Session
-from models import Product
-from schemas import ProductCreate, ProductUpdate
-from typing import List, Optional
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Product, SEARCH_CONFIG, search_document
+from schemas import ProductCreate, ProductUpdate, ProductBulkUpdate
+from typing import List, Optional, Tuple
 
 class DatabaseService:
-    def get_all_products(self, db: Session) -> List[dict]:
+    async def get_all_products(self, db: AsyncSession) -> List[dict]:
         """Get all products from database"""
-        products = db.query(Product).all()
-        return [product.to_dict() for product in products]
+        result = await db.execute(select(Product))
+        return [product.to_dict() for product in result.scalars().all()]
 
-    def get_product_by_id(self, db: Session, product_id: int) -> Optional[dict]:
+    async def get_products_page(
+        self, db: AsyncSession, limit: int, cursor: Optional[int] = None
+    ) -> Tuple[List[dict], Optional[int]]:
+        """Get one page of products ordered by ID, starting after cursor.
+
+        Returns the page and the cursor for the next page (None on the last page).
+        """
+        query = select(Product).order_by(Product.id).limit(limit + 1)
+        if cursor is not None:
+            query = query.where(Product.id > cursor)
+        result = await db.execute(query)
+        products = result.scalars().all()
+
+        next_cursor = products[limit - 1].id if len(products) > limit else None
+        return [product.to_dict() for product in products[:limit]], next_cursor
+
+    async def get_product_ids_page(
+        self, db: AsyncSession, limit: int, cursor: Optional[int] = None
+    ) -> Tuple[List[int], Optional[int]]:
+        """Get one page of product IDs in order, starting after cursor, and the next cursor"""
+        query = select(Product.id).order_by(Product.id).limit(limit + 1)
+        if cursor is not None:
+            query = query.where(Product.id > cursor)
+        result = await db.execute(query)
+        ids = result.scalars().all()
+        return list(ids[:limit]), ids[limit - 1] if len(ids) > limit else None
+
+    async def get_product_by_id(self, db: AsyncSession, product_id: int) -> Optional[dict]:
         """Get product by ID from database"""
-        product = db.query(Product).filter(Product.id == product_id).first()
+        product = await db.get(Product, product_id)
         return product.to_dict() if product else None
 
-    def create_product(self, db: Session, product_data: ProductCreate) -> dict:
+    async def create_product(self, db: AsyncSession, product_data: ProductCreate) -> dict:
         """Create a new product"""
         db_product = Product(
             name=product_data.name,
@@ -24,15 +52,22 @@ class DatabaseService:
             stock_quantity=product_data.stock_quantity
         )
         db.add(db_product)
-        db.commit()
-        db.refresh(db_product)
+        await db.commit()
+        await db.refresh(db_product)
         return db_product.to_dict()
 
-    def update_product(self, db: Session, product_id: int, product_data: ProductCreate) -> Optional[dict]:
-        """Update an existing product"""
-        db_product = db.query(Product).filter(Product.id == product_id).first()
+    async def update_product(
+        self, db: AsyncSession, product_id: int, product_data: ProductCreate
+    ) -> Tuple[Optional[dict], Optional[dict]]:
+        """Update an existing product.
+
+        Returns the updated product and the product as it was before the
+        update (both None if the product doesn't exist).
+        """
+        db_product = await db.get(Product, product_id)
         if not db_product:
-            return None
+            return None, None
+        previous_product = db_product.to_dict()
 
         # Update fields
         db_product.name = product_data.name
@@ -41,29 +76,96 @@ class DatabaseService:
         db_product.category = product_data.category
         db_product.stock_quantity = product_data.stock_quantity
 
-        db.commit()
-        db.refresh(db_product)
-        return db_product.to_dict()
+        await db.commit()
+        await db.refresh(db_product)
+        return db_product.to_dict(), previous_product
 
-    def delete_product(self, db: Session, product_id: int) -> bool:
-        """Delete a product"""
-        db_product = db.query(Product).filter(Product.id == product_id).first()
+    async def delete_product(self, db: AsyncSession, product_id: int) -> Optional[dict]:
+        """Delete a product; returns the deleted product, or None if it doesn't exist"""
+        db_product = await db.get(Product, product_id)
         if not db_product:
-            return False
+            return None
+
+        deleted_product = db_product.to_dict()
+        await db.delete(db_product)
+        await db.commit()
+        return deleted_product
+
+    async def get_products_by_ids(self, db: AsyncSession, product_ids: List[int]) -> List[dict]:
+        """Get several products by ID with one WHERE id IN (...) query"""
+        result = await db.execute(select(Product).where(Product.id.in_(product_ids)).order_by(Product.id))
+        return [product.to_dict() for product in result.scalars().all()]
+
+    async def create_products(self, db: AsyncSession, products_data: List[ProductCreate]) -> List[dict]:
+        """Create several products with one multi-row INSERT ... RETURNING"""
+        result = await db.execute(
+            insert(Product).returning(Product),
+            [product_data.model_dump() for product_data in products_data]
+        )
+        products = [product.to_dict() for product in result.scalars().all()]
+        await db.commit()
+        return products
+
+    async def update_products(
+        self, db: AsyncSession, products_data: List[ProductBulkUpdate]
+    ) -> Tuple[List[dict], List[dict]]:
+        """Update several existing products in one transaction; unknown IDs are skipped.
+
+        Returns the updated products and the searchable fields (id, name,
+        description, category) they had before the update.
+        """
+        product_ids = [product_data.id for product_data in products_data]
+        # Plain columns rather than entities so the bulk UPDATE below can't
+        # leave stale objects in the session's identity map
+        result = await db.execute(
+            select(Product.id, Product.name, Product.description, Product.category)
+            .where(Product.id.in_(product_ids))
+        )
+        previous_products = [row._asdict() for row in result.all()]
+        existing_ids = {product["id"] for product in previous_products}
+
+        rows = [product_data.model_dump() for product_data in products_data if product_data.id in existing_ids]
+        if rows:
+            # ORM bulk UPDATE by primary key, batched into one executemany
+            await db.execute(update(Product), rows)
+            await db.commit()
 
-        db.delete(db_product)
-        db.commit()
-        return True
+        products = await self.get_products_by_ids(db, list(existing_ids))
+        return products, previous_products
 
-    def get_products_by_category(self, db: Session, category: str) -> List[dict]:
+    async def delete_products(self, db: AsyncSession, product_ids: List[int]) -> List[dict]:
+        """Delete several products with one DELETE ... RETURNING; returns the deleted products"""
+        result = await db.execute(
+            delete(Product).where(Product.id.in_(product_ids)).returning(Product)
+        )
+        deleted_products = sorted((product.to_dict() for product in result.scalars().all()), key=lambda p: p["id"])
+        await db.commit()
+        return deleted_products
+
+    async def get_products_by_category(self, db: AsyncSession, category: str) -> List[dict]:
         """Get products by category"""
-        products = db.query(Product).filter(Product.category == category).all()
-        return [product.to_dict() for product in products]
-
-    def search_products(self, db: Session, search_term: str) -> List[dict]:
-        """Search products by name or description"""
-        products = db.query(Product).filter(
-            Product.name.ilike(f"%{search_term}%") |
-            Product.description.ilike(f"%{search_term}%")
-        ).all()
-        return [product.to_dict() for product in products]
+        result = await db.execute(select(Product).where(Product.category == category))
+        return [product.to_dict() for product in result.scalars().all()]
+
+    async def search_products(self, db: AsyncSession, search_term: str, limit: int = 20) -> List[dict]:
+        """Full-text search over name and description, best matches first.
+
+        On PostgreSQL the query (web search syntax: quotes, OR, -word) is
+        answered from the GIN index on search_document and ranked with
+        ts_rank_cd. Other databases fall back to an unranked ILIKE scan.
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            result = await db.execute(select(Product).where(
+                Product.name.ilike(f"%{search_term}%") |
+                Product.description.ilike(f"%{search_term}%")
+            ).order_by(Product.id).limit(limit))
+            return [product.to_dict() for product in result.scalars().all()]
+
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, search_term)
+        result = await db.execute(
+            select(Product)
+            .where(search_document.op("@@")(query))
+            .order_by(func.ts_rank_cd(search_document, query).desc(), Product.id)
+            .limit(limit)
+        )
+        return [product.to_dict() for product in result.scalars().all()]
@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for production mode (APP_MODE=production in start.sh).
+
+Runs WEB_CONCURRENCY uvicorn workers with the app preloaded in the master.
+Database and Redis pools are sized per worker from WEB_CONCURRENCY, see
+pools.py.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master so workers fork with it loaded
+preload_app = True
+
+# Give in-flight requests time to finish on SIGTERM before workers are killed
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = 5
+
+# Every worker derives its pool sizes from the same worker count
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the preloading master"""
+    from database import engine, async_engine, replica_engine
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    replica_engine.sync_engine.dispose(close=False)
+
+def child_exit(server, worker):
+    """Drop an exited worker's live gauges from the merged metrics"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,96 @@
+import struct
+import zlib
+from typing import Optional, Sequence
+
+# Brotli is optional; without it only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content codings we can produce, preferred first when the client rates them equally
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Compression effort: bodies are compressed once and served many times
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+# gzip member header: deflate, no file name, no mtime, unknown OS
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+# Brotli meta-block with ISLAST and ISLASTEMPTY set: ends the stream
+BROTLI_LAST_BLOCK = b"\x03"
+
+class CompressedHead(bytes):
+    """The compressed start of a response body, as made by compress_head()"""
+
+def parse_accept_encoding(accept_encoding: str) -> dict:
+    """Map each content coding in an Accept-Encoding header to its q-value"""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities["gzip" if coding == "x-gzip" else coding] = quality
+    return qualities
+
+def negotiate(accept_encoding: Optional[str], encodings: Sequence[str] = SUPPORTED_ENCODINGS) -> Optional[str]:
+    """Pick the content coding to send, or None for an uncompressed body"""
+    if not accept_encoding:
+        return None
+    qualities = parse_accept_encoding(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress_head(encoding: str, data: bytes) -> CompressedHead:
+    """Compress the constant start of a response body so finish() can append to it.
+
+    gzip: a raw deflate stream flushed to a byte boundary, after the CRC-32
+    and length of data. br: a brotli stream flushed without its last block.
+    Either way the per-request end of the body is added later without
+    touching the compressed bytes.
+    """
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+        body = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return CompressedHead(struct.pack("<II", zlib.crc32(data), len(data) & 0xFFFFFFFF) + body)
+    if encoding == "br" and brotli is not None:
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return CompressedHead(compressor.process(data) + compressor.flush())
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+def _brotli_uncompressed_block(data: bytes) -> bytes:
+    """A brotli meta-block holding data as is (RFC 7932 section 9.2)"""
+    length = len(data) - 1
+    nibbles = 4 if length < 1 << 16 else 5 if length < 1 << 20 else 6
+    # ISLAST=0, MNIBBLES, MLEN-1, ISUNCOMPRESSED=1, then zero bits up to a byte boundary
+    bits = (nibbles - 4) << 1 | length << 3 | 1 << (3 + 4 * nibbles)
+    return bits.to_bytes((4 + 4 * nibbles + 7) // 8, "little") + data
+
+def finish(encoding: str, head: bytes, tail: bytes) -> bytes:
+    """Complete encoded body: a compress_head() result followed by tail.
+
+    Only the tail is compressed here (gzip) or stored as is (br), so the
+    cost doesn't grow with the size of the head.
+    """
+    if encoding == "gzip":
+        crc, size = struct.unpack("<II", head[:8])
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+        body = compressor.compress(tail) + compressor.flush()
+        trailer = struct.pack("<II", zlib.crc32(tail, crc), (size + len(tail)) & 0xFFFFFFFF)
+        return GZIP_HEADER + head[8:] + body + trailer
+    if encoding == "br":
+        return head + (_brotli_uncompressed_block(tail) if tail else b"") + BROTLI_LAST_BLOCK
+    raise ValueError(f"Unsupported content encoding: {encoding}")
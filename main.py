@@ -1,29 +1,388 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import FileResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Iterable, List, Optional, Set, Tuple
+import os
+import math
+import logging
 import time
+import asyncio
+import statistics
 import json
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
 
-from database import get_db, engine
-from models import Base, Product
+from database import (
+    get_async_db, read_session, engine, async_engine, replica_engine,
+    HAS_REPLICA, REPLICA_LAG_THRESHOLD
+)
+from models import Base, Product, SEARCH_INDEX
 from schemas import (
     ProductCreate, ProductResponse, CacheStats,
     ProductResponseWithMetadata, ProductsResponseWithMetadata,
-    DeleteResponse, PerformanceResponse
+    DeleteResponse, PerformanceResponse,
+    ProductBulkUpdate, BulkDeleteRequest, BulkProductsResponse, BulkDeleteResponse
 )
 from cache_service import CacheService
+from circuit_breaker import log_error
 from database_service import DatabaseService
+from catalog_cache import CatalogCache
+from cache_warmer import CacheWarmer
+from cache_outbox import OutboxWorker, configure_trigger
+from bloom_filter import BloomFilter
+from http_compression import CompressedHead, finish, negotiate
+from metrics import REQUEST_LATENCY, render_metrics
+from pools import database_pool_stats, redis_pool_stats, worker_count
+
+logger = logging.getLogger(__name__)
 
-# Create database tables
+# Create database tables; tables created before the search index existed
+# don't get it from create_all
 Base.metadata.create_all(bind=engine)
+SEARCH_INDEX.create(bind=engine, checkfirst=True)
+configure_trigger()
+
+# Initialize services
+cache_service = CacheService()
+db_service = DatabaseService()
+
+catalog_cache = CatalogCache(cache_service)
+
+# Product list pagination
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Seconds product and category entries live; every committed product write
+# invalidates them through the cache outbox, so this can be long
+PRODUCT_CACHE_TTL = int(os.getenv("PRODUCT_CACHE_TTL", "600"))
+
+# Seconds a product ID found missing is answered with 404 from a tombstone
+# (0 disables); creating the product clears it
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", "60"))
+
+# Largest batch accepted by the bulk endpoints and GET /products?ids=
+MAX_BULK_SIZE = 1000
+
+# Product search: results per query and how long a cached result lives
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))
+# Tag of every cached search: any product write drops them all (see product_tags)
+SEARCH_TAG = "search"
+
+# Read-your-writes with a replica: requests that may write the products table,
+# and the cookie telling the writing client when its last write happened
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+WRITE_PATH_PREFIXES = ("/products", "/debug/products")
+WRITE_MARKER_COOKIE = "last_write"
+
+# Conditional GETs: browsers revalidate every time (cheap with an ETag), while
+# shared caches such as a CDN or reverse proxy may reuse a response briefly
+HTTP_SHARED_MAX_AGE = int(os.getenv("HTTP_SHARED_MAX_AGE", "5"))
+CACHE_CONTROL = f"public, max-age=0, s-maxage={HTTP_SHARED_MAX_AGE}"
+
+# /cache/performance: timed calls per path, capped so a comparison stays
+# cheap on a loaded server, and the lock letting one run at a time
+DEFAULT_PERFORMANCE_ITERATIONS = 20
+MAX_PERFORMANCE_ITERATIONS = 100
+PERFORMANCE_LOCK_KEY = "lock:performance"  # under the key prefix
+PERFORMANCE_LOCK_TIMEOUT = 60
+performance_lock = asyncio.Lock()
+
+def parse_product_ids(ids: str) -> List[int]:
+    """Parse a comma-separated list of product IDs, keeping order and dropping duplicates"""
+    try:
+        product_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be a comma-separated list of integers")
+    if not product_ids or len(product_ids) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=422, detail=f"ids must contain 1 to {MAX_BULK_SIZE} product IDs")
+    return product_ids
+
+def encode_members(fields: dict) -> List[bytes]:
+    """JSON object members ("name":value) for a few small fields"""
+    return [json.dumps(name).encode() + b":" + json.dumps(value).encode() for name, value in fields.items()]
+
+def raw_json_response(encoded: dict, **fields) -> Response:
+    """Build a JSON response from already-encoded members plus a few small fields.
+
+    Used for cache hits in CACHE_RAW_RESPONSES mode so the cached body is
+    spliced in as bytes instead of being parsed, validated and re-encoded.
+    """
+    parts = [json.dumps(name).encode() + b":" + value for name, value in encoded.items()]
+    parts += encode_members(fields)
+    return Response(content=b"{" + b",".join(parts) + b"}", media_type="application/json")
+
+def accepted_encoding(request: Request) -> Optional[str]:
+    """Content coding to compress a response with, from the client's Accept-Encoding"""
+    return negotiate(request.headers.get("accept-encoding"), cache_service.compressed_encodings)
+
+def compressed_response(head: CompressedHead, encoding: str, **fields) -> Response:
+    """Build a compressed JSON response from a stored compressed body start plus a few small fields.
+
+    Only the closing fields are encoded per request; the head was compressed
+    once when it was cached (see CacheService.register_compressed).
+    """
+    tail = b"," + b",".join(encode_members(fields)) + b"}"
+    return Response(
+        content=finish(encoding, head, tail),
+        media_type="application/json",
+        headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+    )
+
+def product_etag(product: dict) -> str:
+    """Strong ETag of a product, from its ID and a digest of its serialized fields"""
+    digest = hashlib.blake2b(
+        json.dumps(product, sort_keys=True, separators=(",", ":")).encode(), digest_size=8
+    ).hexdigest()
+    return f'"{product["id"]}-{digest}"'
+
+# Keep each product's ETag next to it in Redis for conditional requests
+cache_service.register_etag("product:", product_etag)
+
+# Keep compressed bodies of product listings next to them; the cached
+# value becomes the "products" member of the response
+cache_service.register_compressed("category:", b'{"products":')
+cache_service.register_compressed("search:", b'{"products":')
+
+def product_namespace(key: str) -> Tuple[str, ...]:
+    """Namespace path of a product cache key: everything derived from products, then a category's listings"""
+    if key.startswith("category:"):
+        category = key[len("category:"):]
+        if category.endswith(":products"):
+            category = category[:-len(":products")]
+        return ("products", category_tag(category))
+    return ("products",)
+
+# Product entries, the catalog, listings, searches and the ID filter can be
+# cleared together (POST /cache/clear?scope=products) and listings per category
+for key_prefix in ("product:", "products:", "category:", "search:", "bloom:products"):
+    cache_service.register_namespace(key_prefix, product_namespace)
+
+def catalog_etag(version: str, limit: int, cursor: Optional[int], encoding: Optional[str] = None) -> str:
+    """Strong ETag of a catalog page: the catalog version, the page bounds and the content coding"""
+    return f'"{version}-{cursor or 0}-{limit}{"-" + encoding if encoding else ""}"'
+
+def catalog_modified(version: str) -> datetime:
+    """Last-Modified of the catalog: the change time recorded in its version"""
+    return datetime.fromtimestamp(int(version.split(".")[0]) / 1000, timezone.utc)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison, as RFC 9110 asks)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def http_date(value: datetime) -> str:
+    """Format a datetime for Last-Modified (naive values are UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def set_validators(response: Response, etag: Optional[str], last_modified: Optional[datetime] = None):
+    """Add ETag, Last-Modified and Cache-Control headers to a cacheable response"""
+    if etag is None:
+        return
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+def not_modified(etag: str) -> Response:
+    """304 response for a conditional request whose ETag still matches"""
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    )
+
+def check_bulk_size(items: list):
+    """Reject bulk requests that are empty or larger than MAX_BULK_SIZE"""
+    if not items or len(items) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=422, detail=f"Bulk requests must contain 1 to {MAX_BULK_SIZE} items")
+
+def category_tag(category: str) -> str:
+    """Cache tag carried by every entry derived from one category"""
+    return f"category:{category}"
+
+def product_tags(product: dict) -> Set[str]:
+    """Tags of the cached listings and searches a product can appear in.
+
+    Searches share one tag: PostgreSQL matches Snowball stems ("dry" is
+    indexed as "dri") and other databases match substrings, so no tag
+    derived from the words alone covers every query a product can match.
+    """
+    return {category_tag(product["category"]), SEARCH_TAG}
+
+async def invalidate_products(products: Iterable[dict]):
+    """Drop cached listings and searches derived from the given product versions in one round trip"""
+    tags = set()
+    for product in products:
+        tags |= product_tags(product)
+    await cache_service.invalidate_tags(tags)
+
+def client_wrote_recently(request: Request) -> bool:
+    """Whether the client's write marker cookie is younger than the replica lag threshold"""
+    try:
+        return time.time() - float(request.cookies.get(WRITE_MARKER_COOKIE, "0")) < REPLICA_LAG_THRESHOLD
+    except ValueError:
+        return False
+
+async def use_primary(request: Optional[Request] = None) -> bool:
+    """Whether a read must go to the primary to see recent writes.
+
+    Reads for one client (request given) follow its write marker cookie.
+    Reads that fill the shared cache use the primary while any write is
+    younger than the lag threshold, since every client would see the result.
+    """
+    if not HAS_REPLICA:
+        return True
+    if request is not None:
+        return client_wrote_recently(request)
+    return await cache_service.has_recent_write()
+
+async def fetch_products_page(limit: int, cursor: Optional[int] = None, request: Optional[Request] = None):
+    """Read one page of products in its own session (used for catalog loads)"""
+    async with read_session(await use_primary(request)) as db:
+        return await db_service.get_products_page(db, limit, cursor)
+
+async def fetch_products_by_ids(product_ids: List[int]) -> List[dict]:
+    """Read several products in their own session (used to fill the cache)"""
+    async with read_session(await use_primary()) as db:
+        return await db_service.get_products_by_ids(db, product_ids)
+
+async def fetch_product_ids(limit: int, cursor: Optional[int] = None):
+    """Read one page of product IDs from the primary (used to build the Bloom filter)"""
+    async with read_session(primary=True) as db:
+        return await db_service.get_product_ids_page(db, limit, cursor)
+
+# Optional filter over existing product IDs: lookups of IDs it has never
+# seen are rejected without a database query
+product_filter = BloomFilter(
+    cache_service,
+    "products",
+    fetch_product_ids,
+    enabled=os.getenv("PRODUCT_BLOOM_FILTER", "false").lower() == "true",
+    bits=int(os.getenv("PRODUCT_BLOOM_BITS", str(1 << 23))),
+    hashes=int(os.getenv("PRODUCT_BLOOM_HASHES", "7"))
+)
+
+async def mark_existing(product_ids: List[int]) -> bool:
+    """Add created products to the Bloom filter and drop their tombstones"""
+    added = await product_filter.add_many(product_ids)
+    cleared = await cache_service.clear_missing([f"product:{product_id}" for product_id in product_ids])
+    return added and cleared
+
+async def cache_created_products(products: List[dict]):
+    """Bring the cache up to date with newly created products.
+
+    Lookups may have found their IDs missing before they existed, so those
+    tombstones go; the products are patched into the cached catalog and
+    written through, and the category listings and searches they now
+    appear in are dropped.
+    """
+    await mark_existing([product["id"] for product in products])
+    await catalog_cache.upsert_many(products)
+    await cache_service.replace_many(
+        {f"product:{product['id']}": product for product in products}, expire=PRODUCT_CACHE_TTL
+    )
+    await invalidate_products(products)
+
+# Preloads the catalog and hot products, then refreshes hot products before
+# their TTL runs out
+cache_warmer = CacheWarmer(
+    cache_service,
+    catalog_cache,
+    fetch_products_page,
+    fetch_products_by_ids,
+    expire=PRODUCT_CACHE_TTL,
+    top_n=int(os.getenv("CACHE_WARM_TOP_N", "200")),
+    interval=float(os.getenv("CACHE_REFRESH_INTERVAL", "15")),
+    refresh_ahead=float(os.getenv("CACHE_REFRESH_AHEAD", "60")),
+    warmup_timeout=float(os.getenv("CACHE_WARMUP_TIMEOUT", "30"))
+)
+
+async def apply_outbox(entries: List[dict]):
+    """Bring the cache in line with committed product writes recorded in the outbox.
+
+    Products are re-read from the primary and patched into the catalog (or
+    removed from it), cached copies are written through (or dropped) and
+    the listings and searches of their old and new versions invalidated.
+    Raises if the cache couldn't be updated so the entries are retried.
+    """
+    product_ids = sorted({entry["product_id"] for entry in entries if entry["product_id"] is not None})
+    current = []
+    if product_ids:
+        async with read_session(primary=True) as db:
+            current = await db_service.get_products_by_ids(db, product_ids)
+    current_ids = {product["id"] for product in current}
+    removed_ids = [product_id for product_id in product_ids if product_id not in current_ids]
+    if not await catalog_cache.upsert_many(current) or not await catalog_cache.remove_many(removed_ids):
+        raise RuntimeError("catalog update failed")
+    if not await mark_existing(sorted(current_ids)):
+        raise RuntimeError("negative cache update failed")
+
+    tags = set()
+    for entry in entries:
+        for version in (entry["old_values"], entry["new_values"]):
+            if version and version.get("name") is not None and version.get("category") is not None:
+                tags |= product_tags(version)
+    if any(entry["product_id"] is None for entry in entries):
+        # Products written without their IDs coming back: reload the catalog,
+        # and drop every listing and search when not even the values are known
+        await catalog_cache.invalidate()
+        if any(entry["product_id"] is None and not entry["new_values"] for entry in entries):
+            tags |= set(await cache_service.tag_names())
+    # Refresh cached products in place so the write doesn't cost a miss; keys
+    # that aren't cached (or can't be checked) are dropped instead
+    product_keys = {f"product:{product['id']}": product for product in current}
+    cached = await cache_service.cached_keys(list(product_keys))
+    fresh = {key: product for key, product in product_keys.items() if key in cached}
+    if not await cache_service.replace_many(fresh, expire=PRODUCT_CACHE_TTL):
+        raise RuntimeError("product write-through failed")
+    await cache_service.invalidate_tags(
+        tags,
+        keys=[f"product:{product_id}" for product_id in product_ids if f"product:{product_id}" not in fresh],
+        raise_errors=True
+    )
+
+# Applies the invalidations recorded with each product write, retrying
+# until Redis takes them
+outbox_worker = OutboxWorker(
+    apply_outbox,
+    interval=float(os.getenv("CACHE_OUTBOX_INTERVAL", "1")),
+    batch_size=int(os.getenv("CACHE_OUTBOX_BATCH_SIZE", "500")),
+    max_backoff=float(os.getenv("CACHE_OUTBOX_MAX_BACKOFF", "60")),
+    breaker=cache_service.breaker
+)
+# Writes made while the Redis circuit breaker was open are applied before it closes
+cache_service.breaker.on_close(outbox_worker.replay)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start cache services and the background cache warm-up; release pools on shutdown"""
+    await cache_service.start()
+    await outbox_worker.start()
+    await cache_warmer.start()
+    await product_filter.start()
+    yield
+    await cache_warmer.stop()
+    await outbox_worker.stop()
+    await cache_service.close()
+    await async_engine.dispose()
+    if HAS_REPLICA:
+        await replica_engine.dispose()
 
 app = FastAPI(
     title="Cache Example Application",
     description="A demonstration of caching with FastAPI, PostgreSQL, and Redis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -35,13 +394,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Observe request latency per route template and status code"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            request.method,
+            route.path if route is not None else "unmatched",
+            str(status)
+        ).observe(time.perf_counter() - start)
+
+@app.middleware("http")
+async def mark_writes(request: Request, call_next):
+    """Keep reads that must see a product write on the primary until the replica catches up.
+
+    The shared marker is set before the write so nothing caches replica rows
+    between the commit and the cache invalidation, and again afterwards so
+    the window starts at the commit. The cookie covers the client's own reads.
+    """
+    if not HAS_REPLICA or request.method not in WRITE_METHODS or not request.url.path.startswith(WRITE_PATH_PREFIXES):
+        return await call_next(request)
+
+    await cache_service.mark_recent_write(REPLICA_LAG_THRESHOLD)
+    response = await call_next(request)
+    if response.status_code < 400:
+        await cache_service.mark_recent_write(REPLICA_LAG_THRESHOLD)
+        response.set_cookie(
+            WRITE_MARKER_COOKIE,
+            f"{time.time():.3f}",
+            max_age=math.ceil(REPLICA_LAG_THRESHOLD),
+            httponly=True,
+            samesite="lax"
+        )
+    return response
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Initialize services
-cache_service = CacheService()
-db_service = DatabaseService()
-
 @app.get("/")
 async def root():
     """Serve the frontend application"""
@@ -49,88 +445,354 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint; degraded while the Redis circuit breaker is open (reads go to the database)"""
+    breaker = cache_service.breaker
     return {
-        "status": "healthy",
+        "status": "degraded" if breaker.is_open else "healthy",
         "timestamp": time.time(),
         "services": {
             "database": "connected",
-            "cache": "connected"
-        }
+            "cache": "unavailable" if breaker.is_open else "connected"
+        },
+        "cache_circuit": breaker.get_stats()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: OK once the startup cache warm-up has finished or given up"""
+    if not cache_warmer.ready:
+        raise HTTPException(status_code=503, detail="Cache warm-up in progress")
+    return {"status": "ready"}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: request, cache operation and SQL latency histograms"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/products", response_model=ProductsResponseWithMetadata)
-async def get_products(db: Session = Depends(get_db)):
-    """Get all products with caching"""
+async def get_products(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, ge=0),
+    ids: Optional[str] = Query(None, description="Comma-separated product IDs to fetch instead of a page")
+):
+    """Get a page of products (keyset-paginated by ID) with caching"""
     start_time = time.time()
 
-    # Try to get from cache first
-    cached_products = cache_service.get("all_products")
-    if cached_products:
-        cache_service.increment_hits()
+    if ids is not None:
+        products, from_cache = await get_products_by_ids(parse_product_ids(ids))
         return {
-            "products": cached_products,
-            "source": "cache",
+            "products": products,
+            "source": "cache" if from_cache else "database",
             "response_time": time.time() - start_time
         }
 
-    # Cache miss - get from database
-    cache_service.increment_misses()
-    products = db_service.get_all_products(db)
+    # Conditional request: answer from the catalog version without reading the page
+    encoding = accepted_encoding(request)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        version = await catalog_cache.get_version()
+        for etag in ((catalog_etag(version, limit, cursor, encoding), catalog_etag(version, limit, cursor))
+                     if version else ()):
+            if etag_matches(if_none_match, etag):
+                cache_service.increment_hits("GET /products", "products:catalog")
+                return not_modified(etag)
+
+    # Serve from the cached catalog; a cold catalog loads in the background
+    page = None
+    if await catalog_cache.ensure_loaded(fetch_products_page):
+        if encoding:
+            # Compressed once per catalog version, then served as stored
+            compressed_page = await catalog_cache.get_compressed_page(encoding, limit, cursor)
+            if compressed_page is not None:
+                cache_service.increment_hits("GET /products", "products:catalog")
+                head, version = compressed_page
+                compressed = compressed_response(
+                    head, encoding, source="cache", response_time=time.time() - start_time
+                )
+                set_validators(compressed, catalog_etag(version, limit, cursor, encoding), catalog_modified(version))
+                return compressed
+        page = await catalog_cache.get_page(limit, cursor, raw=cache_service.raw_responses)
+        if page is None:
+            # Catalog keys are incomplete; reload them and use the database meanwhile
+            await catalog_cache.invalidate()
 
-    # Cache the result for 5 minutes
-    cache_service.set("all_products", products, expire=300)
+    from_cache = page is not None
+    if from_cache:
+        cache_service.increment_hits("GET /products", "products:catalog")
+        products, next_cursor, version = page
+        etag = catalog_etag(version, limit, cursor) if version else None
+        last_modified = catalog_modified(version) if version else None
+        if cache_service.raw_responses:
+            raw_response = raw_json_response(
+                {"products": b"[" + b",".join(products) + b"]"},
+                next_cursor=next_cursor,
+                source="cache",
+                response_time=time.time() - start_time
+            )
+            set_validators(raw_response, etag, last_modified)
+            return raw_response
+        set_validators(response, etag, last_modified)
+    else:
+        cache_service.increment_misses("GET /products", "products:catalog")
+        products, next_cursor = await fetch_products_page(limit, cursor, request)
 
     return {
         "products": products,
+        "next_cursor": next_cursor,
+        "source": "cache" if from_cache else "database",
+        "response_time": time.time() - start_time
+    }
+
+async def get_products_by_ids(product_ids: List[int]):
+    """Multi-get products: one MGET, then one WHERE id IN (...) query for the misses"""
+    cached = await cache_service.get_many([f"product:{product_id}" for product_id in product_ids])
+    missing_ids = [product_id for product_id in product_ids if f"product:{product_id}" not in cached]
+    cache_service.increment_hits("GET /products?ids", "product:*", len(product_ids) - len(missing_ids))
+    for product_id in product_ids:
+        cache_warmer.record(product_id)
+
+    loaded = {}
+    if missing_ids:
+        cache_service.increment_misses("GET /products?ids", "product:*", len(missing_ids))
+    # IDs the Bloom filter has never seen don't need a query
+    missing_ids = [
+        product_id for product_id, maybe in zip(missing_ids, await product_filter.might_contain_many(missing_ids))
+        if maybe
+    ]
+    if missing_ids:
+        for product in await fetch_products_by_ids(missing_ids):
+            loaded[f"product:{product['id']}"] = product
+        await cache_service.set_many(loaded, expire=PRODUCT_CACHE_TTL)
+
+    products = []
+    for product_id in product_ids:
+        key = f"product:{product_id}"
+        product = cached.get(key) or loaded.get(key)
+        if product:
+            products.append(product)
+    return products, not missing_ids
+
+@app.post("/products/bulk", response_model=BulkProductsResponse)
+async def create_products_bulk(products: List[ProductCreate], db: AsyncSession = Depends(get_async_db)):
+    """Create several products in one statement and update the cache once"""
+    start_time = time.time()
+    check_bulk_size(products)
+
+    new_products = await db_service.create_products(db, products)
+    await cache_created_products(new_products)
+
+    return {
+        "products": new_products,
+        "source": "database",
+        "response_time": time.time() - start_time
+    }
+
+@app.put("/products/bulk", response_model=BulkProductsResponse)
+async def update_products_bulk(products: List[ProductBulkUpdate], db: AsyncSession = Depends(get_async_db)):
+    """Update several products in one transaction and update the cache once"""
+    start_time = time.time()
+    check_bulk_size(products)
+
+    updated_products, previous_products = await db_service.update_products(db, products)
+    updated_ids = {p["id"] for p in updated_products}
+
+    # Patch the cached catalog, write the products through and drop the
+    # listings and searches of both their old and new versions
+    await catalog_cache.upsert_many(updated_products)
+    await cache_service.replace_many({f"product:{p['id']}": p for p in updated_products}, expire=PRODUCT_CACHE_TTL)
+    await invalidate_products([*previous_products, *updated_products])
+
+    return {
+        "products": updated_products,
+        "not_found": sorted({p.id for p in products} - updated_ids),
         "source": "database",
         "response_time": time.time() - start_time
     }
 
+@app.delete("/products/bulk", response_model=BulkDeleteResponse)
+async def delete_products_bulk(request: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)):
+    """Delete several products in one statement and update the cache once"""
+    start_time = time.time()
+    check_bulk_size(request.ids)
+
+    deleted_products = await db_service.delete_products(db, request.ids)
+    deleted_ids = [p["id"] for p in deleted_products]
+
+    # Remove the products and the listings and searches they appeared in
+    await catalog_cache.remove_many(deleted_ids)
+    await cache_service.delete_many([f"product:{product_id}" for product_id in deleted_ids])
+    await invalidate_products(deleted_products)
+
+    return {
+        "message": f"Deleted {len(deleted_ids)} products",
+        "deleted": deleted_ids,
+        "not_found": sorted(set(request.ids) - set(deleted_ids)),
+        "source": "database",
+        "response_time": time.time() - start_time
+    }
+
+@app.get("/products/search", response_model=ProductsResponseWithMetadata)
+async def search_products(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms (web search syntax)"),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT)
+):
+    """Full-text search over product names and descriptions with caching"""
+    start_time = time.time()
+
+    # Case and spacing don't change the result, so they don't get their own key
+    query = " ".join(q.lower().split())
+    if not query:
+        raise HTTPException(status_code=422, detail="q must contain a search term")
+
+    async def load_results():
+        async with read_session(await use_primary()) as db:
+            return await db_service.search_products(db, query, limit)
+
+    encoding = accepted_encoding(request)
+    products, from_cache = await cache_service.get_or_set(
+        f"search:{limit}:{query}",
+        load_results,
+        expire=SEARCH_CACHE_TTL,
+        raw=cache_service.raw_responses,
+        tags={SEARCH_TAG},
+        encoding=encoding
+    )
+    if from_cache:
+        cache_service.increment_hits("GET /products/search", "search:*")
+        if isinstance(products, CompressedHead):
+            return compressed_response(products, encoding, source="cache", response_time=time.time() - start_time)
+        if cache_service.raw_responses:
+            raw_response = raw_json_response(
+                {"products": products},
+                source="cache",
+                response_time=time.time() - start_time
+            )
+            raw_response.headers["Vary"] = "Accept-Encoding"
+            return raw_response
+    else:
+        cache_service.increment_misses("GET /products/search", "search:*")
+
+    response.headers["Vary"] = "Accept-Encoding"
+    return {
+        "products": products,
+        "source": "cache" if from_cache else "database",
+        "response_time": time.time() - start_time
+    }
+
 @app.get("/products/{product_id}", response_model=ProductResponseWithMetadata)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(product_id: int, request: Request, response: Response):
     """Get product by ID with caching"""
     start_time = time.time()
-
-    # Try to get from cache first
     cache_key = f"product:{product_id}"
-    cached_product = cache_service.get(cache_key)
-    if cached_product:
-        cache_service.increment_hits()
-        return {
-            "product": cached_product,
-            "source": "cache",
-            "response_time": time.time() - start_time
-        }
+    cache_warmer.record(product_id)
 
-    # Cache miss - get from database
-    cache_service.increment_misses()
-    product = db_service.get_product_by_id(db, product_id)
-    if not product:
+    # Conditional request: answer from the ETag stored next to the product
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etag = await cache_service.get_etag(cache_key)
+        if etag and etag_matches(if_none_match, etag):
+            cache_service.increment_hits("GET /products/{id}", "product:*")
+            return not_modified(etag)
+
+    async def load_product():
+        if not await product_filter.might_contain(product_id):
+            return None
+        async with read_session(await use_primary()) as db:
+            return await db_service.get_product_by_id(db, product_id)
+
+    # Try to get from cache first, loading once per key on a miss; IDs found
+    # missing leave a tombstone so repeated lookups skip the database
+    product, from_cache = await cache_service.get_or_set(
+        cache_key,
+        load_product,
+        expire=PRODUCT_CACHE_TTL,
+        raw=cache_service.raw_responses,
+        negative_ttl=NEGATIVE_CACHE_TTL
+    )
+    if from_cache and product is None:
+        cache_service.increment_hits("GET /products/{id}", "missing:*")
         raise HTTPException(status_code=404, detail="Product not found")
+    if from_cache:
+        cache_service.increment_hits("GET /products/{id}", "product:*")
+        if cache_service.raw_responses:
+            # The body stays encoded, so the ETag comes from Redis metadata
+            raw_response = raw_json_response(
+                {"product": product},
+                source="cache",
+                response_time=time.time() - start_time
+            )
+            set_validators(raw_response, await cache_service.get_etag(cache_key))
+            return raw_response
+    else:
+        cache_service.increment_misses("GET /products/{id}", "product:*")
 
-    # Cache the result for 10 minutes
-    cache_service.set(cache_key, product, expire=600)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
 
+    modified = product.get("updated_at") or product.get("created_at")
+    set_validators(response, product_etag(product), datetime.fromisoformat(modified) if modified else None)
     return {
         "product": product,
-        "source": "database",
+        "source": "cache" if from_cache else "database",
+        "response_time": time.time() - start_time
+    }
+
+@app.get("/categories/{category}/products", response_model=ProductsResponseWithMetadata)
+async def get_category_products(category: str, request: Request, response: Response):
+    """Get all products in a category with caching, tagged for invalidation"""
+    start_time = time.time()
+
+    async def load_category():
+        async with read_session(await use_primary()) as db:
+            return await db_service.get_products_by_category(db, category)
+
+    # Writes to the category drop it through its tag
+    encoding = accepted_encoding(request)
+    products, from_cache = await cache_service.get_or_set(
+        f"category:{category}:products",
+        load_category,
+        expire=PRODUCT_CACHE_TTL,
+        raw=cache_service.raw_responses,
+        tags=[category_tag(category)],
+        encoding=encoding
+    )
+    if from_cache:
+        cache_service.increment_hits("GET /categories/{category}/products", "category:*")
+        if isinstance(products, CompressedHead):
+            return compressed_response(products, encoding, source="cache", response_time=time.time() - start_time)
+        if cache_service.raw_responses:
+            raw_response = raw_json_response(
+                {"products": products},
+                source="cache",
+                response_time=time.time() - start_time
+            )
+            raw_response.headers["Vary"] = "Accept-Encoding"
+            return raw_response
+    else:
+        cache_service.increment_misses("GET /categories/{category}/products", "category:*")
+
+    response.headers["Vary"] = "Accept-Encoding"
+    return {
+        "products": products,
+        "source": "cache" if from_cache else "database",
         "response_time": time.time() - start_time
     }
 
 @app.post("/products", response_model=ProductResponseWithMetadata)
-async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
+async def create_product(product: ProductCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new product and invalidate cache"""
     start_time = time.time()
 
-    # Log the incoming request for debugging
-    print(f"Creating product: {product.dict()}")
+    logger.debug("Creating product: %s", product.model_dump())
 
     # Create product in database
-    new_product = db_service.create_product(db, product)
-
-    # Invalidate cache
-    cache_service.delete("all_products")
+    new_product = await db_service.create_product(db, product)
+    await cache_created_products([new_product])
 
     return {
         "product": new_product,
@@ -139,18 +801,20 @@ async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     }
 
 @app.put("/products/{product_id}", response_model=ProductResponseWithMetadata)
-async def update_product(product_id: int, product: ProductCreate, db: Session = Depends(get_db)):
+async def update_product(product_id: int, product: ProductCreate, db: AsyncSession = Depends(get_async_db)):
     """Update a product and invalidate cache"""
     start_time = time.time()
 
     # Update product in database
-    updated_product = db_service.update_product(db, product_id, product)
+    updated_product, previous_product = await db_service.update_product(db, product_id, product)
     if not updated_product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    # Invalidate cache
-    cache_service.delete("all_products")
-    cache_service.delete(f"product:{product_id}")
+    # Patch the cached catalog, write the product through and drop the
+    # listings and searches of its old and new version
+    await catalog_cache.upsert(updated_product)
+    await cache_service.replace(f"product:{product_id}", updated_product, expire=PRODUCT_CACHE_TTL)
+    await invalidate_products([previous_product, updated_product])
 
     return {
         "product": updated_product,
@@ -159,18 +823,19 @@ async def update_product(product_id: int, product: ProductCreate, db: Session =
     }
 
 @app.delete("/products/{product_id}", response_model=DeleteResponse)
-async def delete_product(product_id: int, db: Session = Depends(get_db)):
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a product and invalidate cache"""
     start_time = time.time()
 
     # Delete product from database
-    success = db_service.delete_product(db, product_id)
-    if not success:
+    deleted_product = await db_service.delete_product(db, product_id)
+    if deleted_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    # Invalidate cache
-    cache_service.delete("all_products")
-    cache_service.delete(f"product:{product_id}")
+    # Remove the product from the cached catalog, its category listing and searches
+    await catalog_cache.remove(product_id)
+    await cache_service.delete(f"product:{product_id}")
+    await invalidate_products([deleted_product])
 
     return {
         "message": "Product deleted successfully",
@@ -181,35 +846,186 @@ async def delete_product(product_id: int, db: Session = Depends(get_db)):
 @app.get("/cache/stats", response_model=CacheStats)
 async def get_cache_stats():
     """Get cache statistics"""
-    return cache_service.get_stats()
+    return {
+        **await cache_service.get_stats(),
+        **cache_warmer.get_stats(),
+        "outbox": outbox_worker.get_stats(),
+        "bloom_filter": product_filter.get_stats()
+    }
 
 @app.post("/cache/clear")
-async def clear_cache():
-    """Clear all cache"""
-    cache_service.clear_all()
-    return {"message": "Cache cleared successfully"}
+async def clear_cache(
+    scope: str = Query("all", pattern="^(all|products|category)$"),
+    category: Optional[str] = Query(None, min_length=1, description="Category to clear with scope=category")
+):
+    """Clear the whole cache, every product entry or one category's listings.
+
+    Clearing is O(1): the scope moves to a new key generation and its old
+    keys are deleted in the background. After clearing all or products the
+    catalog and hot products are warmed again in the background. Fails with
+    503 when Redis is unavailable, as nothing was cleared then.
+    """
+    if scope == "category":
+        if category is None:
+            raise HTTPException(status_code=422, detail="scope=category needs a category")
+        namespace = ("products", category_tag(category))
+    else:
+        namespace = ("products",) if scope == "products" else ()
+    if not await cache_service.clear(namespace):
+        raise HTTPException(status_code=503, detail="Cache unavailable, nothing was cleared")
+    if scope != "category":
+        cache_warmer.schedule_warm()
+    return {"message": "Cache cleared successfully", "scope": scope}
+
+def latency_stats(samples: List[float]) -> dict:
+    """Min, median, tail percentiles (nearest rank) and sequential throughput of timings in seconds"""
+    if not samples:
+        return {"iterations": 0, "min_ms": 0.0, "median_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "throughput_rps": 0.0}
+    ordered = sorted(samples)
+    total = sum(ordered)
+
+    def percentile(pct: float) -> float:
+        return round(ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)] * 1000, 3)
+
+    return {
+        "iterations": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "throughput_rps": round(len(ordered) / total, 1) if total > 0 else 0.0
+    }
+
+def path_performance(warm: List[float], cold: List[float]) -> dict:
+    """Warm (cached) and cold (database) statistics of one path and the median speedup"""
+    warm_stats, cold_stats = latency_stats(warm), latency_stats(cold)
+    return {
+        "warm": warm_stats,
+        "cold": cold_stats,
+        "speedup": round(cold_stats["median_ms"] / warm_stats["median_ms"], 2) if warm_stats["median_ms"] > 0 else None
+    }
+
+def encode_result(result, model) -> bytes:
+    """The body a handler result becomes, including response model validation"""
+    if isinstance(result, Response):
+        return result.body
+    return model.model_validate(result).model_dump_json().encode()
+
+async def time_calls(call: Callable[[], Awaitable[None]], iterations: int) -> List[float]:
+    """Seconds taken by each of `iterations` sequential calls, after one unmeasured call"""
+    await call()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return samples
 
 @app.get("/cache/performance", response_model=PerformanceResponse)
-async def compare_performance(db: Session = Depends(get_db)):
-    """Compare cached vs non-cached performance"""
-    # Test with cached request
-    cache_start = time.time()
-    cached_products = cache_service.get("all_products")
-    cache_time = time.time() - cache_start
+async def compare_performance(
+    iterations: int = Query(DEFAULT_PERFORMANCE_ITERATIONS, ge=1, le=MAX_PERFORMANCE_ITERATIONS)
+):
+    """Compare cached vs non-cached performance of the catalog and single-product paths.
+
+    Warm runs call the real handlers (served from cache) and cold runs do
+    the handlers' database path, both including response validation and
+    encoding. Calls run one at a time and only one comparison runs across
+    workers; a second caller gets 429. Benchmark reads count towards the
+    cache statistics like any other request.
+    """
+    if performance_lock.locked():
+        raise HTTPException(status_code=429, detail="A performance comparison is already running")
+    async with performance_lock:
+        lock = cache_service.redis_client.lock(cache_service.shared_key(PERFORMANCE_LOCK_KEY), timeout=PERFORMANCE_LOCK_TIMEOUT, blocking=False)
+        try:
+            acquired = await lock.acquire()
+        except Exception as e:
+            # Redis is unavailable; the per-worker lock still applies
+            log_error("Cache lock error", e)
+            acquired = None
+        if acquired is False:
+            raise HTTPException(status_code=429, detail="A performance comparison is already running")
+        try:
+            return await run_performance_comparison(iterations)
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except Exception:
+                    pass
+
+async def run_performance_comparison(iterations: int) -> dict:
+    """Time warm and cold catalog and product reads (see compare_performance)"""
+    # Handlers see a plain request: no validators, cookies or compression
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
 
-    # Test with database request
-    db_start = time.time()
-    db_products = db_service.get_all_products(db)
-    db_time = time.time() - db_start
+    async def catalog_warm():
+        encode_result(
+            await get_products(request, Response(), limit=DEFAULT_PAGE_SIZE, cursor=None, ids=None),
+            ProductsResponseWithMetadata
+        )
+
+    async def catalog_cold():
+        start_time = time.time()
+        products, next_cursor = await fetch_products_page(DEFAULT_PAGE_SIZE)
+        encode_result({
+            "products": products,
+            "next_cursor": next_cursor,
+            "source": "database",
+            "response_time": time.time() - start_time
+        }, ProductsResponseWithMetadata)
 
+    catalog = path_performance(
+        await time_calls(catalog_warm, iterations), await time_calls(catalog_cold, iterations)
+    )
+
+    # Single products: the first product in the catalog, if there is one
+    product = None
+    first_page, _ = await fetch_products_page(1)
+    if first_page:
+        product_id = first_page[0]["id"]
+
+        async def product_warm():
+            encode_result(await get_product(product_id, request, Response()), ProductResponseWithMetadata)
+
+        async def product_cold():
+            start_time = time.time()
+            async with read_session(await use_primary()) as db:
+                loaded = await db_service.get_product_by_id(db, product_id)
+            encode_result({
+                "product": loaded,
+                "source": "database",
+                "response_time": time.time() - start_time
+            }, ProductResponseWithMetadata)
+
+        product = path_performance(
+            await time_calls(product_warm, iterations), await time_calls(product_cold, iterations)
+        )
+
+    cache_time = catalog["warm"]["median_ms"] / 1000
+    db_time = catalog["cold"]["median_ms"] / 1000
     return {
         "cached_response_time": cache_time,
         "database_response_time": db_time,
-        "performance_improvement": f"{((db_time - cache_time) / db_time * 100):.2f}%"
+        "performance_improvement": f"{((db_time - cache_time) / db_time * 100):.2f}%" if db_time > 0 else "n/a",
+        "iterations": iterations,
+        "catalog": catalog,
+        "product": product
+    }
+
+@app.get("/debug/pools")
+async def debug_pools():
+    """Connection pool usage of the worker serving this request"""
+    return {
+        "worker_pid": os.getpid(),
+        "workers": worker_count(),
+        "database": database_pool_stats(async_engine.pool),
+        "replica": database_pool_stats(replica_engine.pool) if HAS_REPLICA else None,
+        "redis": redis_pool_stats(cache_service.redis_pool)
     }
 
 @app.post("/debug/products", response_model=ProductResponseWithMetadata)
-async def debug_create_product(request: dict, db: Session = Depends(get_db)):
+async def debug_create_product(request: dict, db: AsyncSession = Depends(get_async_db)):
     """Debug endpoint to log the exact request data"""
     print(f"🔍 Debug: Received request data: {request}")
 
@@ -224,10 +1040,8 @@ async def debug_create_product(request: dict, db: Session = Depends(get_db)):
     start_time = time.time()
 
     # Create product in database
-    new_product = db_service.create_product(db, product)
-
-    # Invalidate cache
-    cache_service.delete("all_products")
+    new_product = await db_service.create_product(db, product)
+    await cache_created_products([new_product])
 
     return {
         "product": new_product,
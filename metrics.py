@@ -0,0 +1,99 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Tuple
+
+from sqlalchemy import event
+
+# With several worker processes, PROMETHEUS_MULTIPROC_DIR must point at a
+# directory shared by all of them (and be emptied before they start) so
+# /metrics reports every worker, not just the one serving the scrape.
+# prometheus_client picks its mode from the variable when imported, so a
+# missing directory is dropped first: metrics then cover this process only
+# instead of every observation failing.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR and not os.path.isdir(MULTIPROC_DIR):
+    print(f"⚠️  PROMETHEUS_MULTIPROC_DIR={MULTIPROC_DIR} does not exist; metrics cover this process only")
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR")
+    os.environ.pop("prometheus_multiproc_dir", None)
+    MULTIPROC_DIR = None
+
+from prometheus_client import (  # noqa: E402 (must follow the check above)
+    CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, REGISTRY, generate_latest, multiprocess
+)
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow queries
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Payload size buckets in bytes, 64B to 16MB
+SIZE_BUCKETS = tuple(64 * 4 ** i for i in range(10))
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route and status",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+CACHE_OPERATION_LATENCY = Histogram(
+    "cache_operation_duration_seconds",
+    "Redis cache operation latency",
+    ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+
+CACHE_PAYLOAD_SIZE = Histogram(
+    "cache_payload_bytes",
+    "Size of values read from and written to Redis",
+    ["operation"],
+    buckets=SIZE_BUCKETS
+)
+
+SQL_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency by statement type",
+    ["statement"],
+    buckets=LATENCY_BUCKETS
+)
+
+@contextmanager
+def time_cache_operation(operation: str):
+    """Observe the duration of a cache operation"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        CACHE_OPERATION_LATENCY.labels(operation).observe(time.perf_counter() - start)
+
+def observe_payload_size(operation: str, size: int):
+    """Observe the size of a value read from or written to the cache"""
+    CACHE_PAYLOAD_SIZE.labels(operation).observe(size)
+
+def instrument_engine(engine):
+    """Time every SQL statement run through a (sync) SQLAlchemy engine.
+
+    For an AsyncEngine pass its sync_engine; the events fire the same way.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start_time"].pop()
+        statement_type = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        SQL_LATENCY.labels(statement_type).observe(time.perf_counter() - start)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # Keep the timing stack balanced when a statement fails
+        if context.connection is not None and context.connection.info.get("query_start_time"):
+            context.connection.info["query_start_time"].pop()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format, merged across workers"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
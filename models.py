@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Index, JSON, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from database import Base
 
@@ -26,3 +27,35 @@ class Product(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
+
+class CacheOutbox(Base):
+    """A committed product write whose cache invalidation is still to be applied.
+
+    Rows are written in the same transaction as the product change (by the
+    session hooks in cache_outbox.py, or by a database trigger) and deleted
+    once the cache reflects it. old_values/new_values hold the product
+    before and after the write (None for inserts and deletes); product_id
+    is None when a bulk insert didn't report its IDs.
+    """
+    __tablename__ = "cache_outbox"
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer)
+    old_values = Column(JSON().with_variant(JSONB(), "postgresql"))
+    new_values = Column(JSON().with_variant(JSONB(), "postgresql"))
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+# Weighted full-text document for product search (name ranks above description).
+# The GIN index is on this expression, so queries must use it verbatim; the
+# text configuration is inlined so the planner can match it.
+SEARCH_CONFIG = text("'english'::regconfig")
+search_document = func.setweight(
+    func.to_tsvector(SEARCH_CONFIG, Product.__table__.c.name), text("'A'")
+).op("||")(func.setweight(
+    func.to_tsvector(SEARCH_CONFIG, func.coalesce(Product.__table__.c.description, text("''"))), text("'B'")
+))
+SEARCH_INDEX = Index(
+    "ix_products_search_document", search_document, postgresql_using="gin"
+).ddl_if(dialect="postgresql")
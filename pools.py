@@ -0,0 +1,137 @@
+import os
+import time
+from typing import Optional
+
+from redis.asyncio import BlockingConnectionPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+def worker_count() -> int:
+    """Number of worker processes sharing the database and Redis connection budgets"""
+    return max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+def database_pool_settings() -> dict:
+    """Per-worker SQLAlchemy pool settings.
+
+    Unless DB_POOL_SIZE/DB_MAX_OVERFLOW are set explicitly, the
+    DB_MAX_CONNECTIONS budget (connections this app may hold on Postgres
+    across all workers) is split evenly between workers, with two thirds
+    of each share kept open and the rest allowed as overflow.
+    """
+    per_worker = max(2, int(os.getenv("DB_MAX_CONNECTIONS", "90")) // worker_count())
+    pool_size = _env_int("DB_POOL_SIZE") or max(1, per_worker * 2 // 3)
+    max_overflow = _env_int("DB_MAX_OVERFLOW")
+    if max_overflow is None:
+        max_overflow = max(0, per_worker - pool_size)
+
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    }
+
+def redis_pool_settings() -> dict:
+    """Per-worker Redis pool settings, splitting REDIS_MAX_CLIENTS between workers.
+
+    A connect fails after REDIS_CONNECT_TIMEOUT and a reply after
+    REDIS_SOCKET_TIMEOUT seconds; waiting for a free connection when all
+    are in use adds up to REDIS_POOL_TIMEOUT. (redis-py before 5.0.8 held
+    the pool lock through a failed connect and stalled for the whole
+    REDIS_POOL_TIMEOUT instead.)
+    """
+    max_connections = _env_int("REDIS_POOL_SIZE") or max(
+        2, int(os.getenv("REDIS_MAX_CLIENTS", "400")) // worker_count()
+    )
+    return {
+        "max_connections": max_connections,
+        "timeout": float(os.getenv("REDIS_POOL_TIMEOUT", "5")),
+        "socket_connect_timeout": float(os.getenv("REDIS_CONNECT_TIMEOUT", "1")),
+        "socket_timeout": float(os.getenv("REDIS_SOCKET_TIMEOUT", "1"))
+    }
+
+class WaitStats:
+    """Running count, total and max of pool checkout waits"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "checkouts": self.count,
+            "avg_wait_ms": round(self.total / self.count * 1000, 3) if self.count else 0,
+            "max_wait_ms": round(self.max * 1000, 3)
+        }
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Async engine pool that records how long checkouts wait"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = WaitStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.wait_stats.observe(time.perf_counter() - start)
+
+class TimedBlockingConnectionPool(BlockingConnectionPool):
+    """Redis pool that waits (up to timeout) for a free connection and records the wait"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = WaitStats()
+
+    async def get_connection(self, command_name, *keys, **options):
+        start = time.perf_counter()
+        try:
+            return await super().get_connection(command_name, *keys, **options)
+        finally:
+            self.wait_stats.observe(time.perf_counter() - start)
+
+def database_pool_stats(pool) -> dict:
+    """Checked-out, idle and overflow connections of a SQLAlchemy queue pool"""
+    if not hasattr(pool, "checkedout"):
+        return {"type": type(pool).__name__}
+    stats = {
+        "type": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": pool._max_overflow
+    }
+    if hasattr(pool, "wait_stats"):
+        stats.update(pool.wait_stats.to_dict())
+    return stats
+
+def redis_pool_stats(pool) -> dict:
+    """In-use and idle connections of a redis-py asyncio pool"""
+    in_use = len(getattr(pool, "_in_use_connections", ()))
+    idle = len(getattr(pool, "_available_connections", ()))
+    stats = {
+        "max_connections": pool.max_connections,
+        "checked_out": in_use,
+        "idle": idle
+    }
+    if hasattr(pool, "wait_stats"):
+        stats.update(pool.wait_stats.to_dict())
+    return stats
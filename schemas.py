@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 class ProductBase(BaseModel):
@@ -12,6 +12,12 @@ class ProductBase(BaseModel):
 class ProductCreate(ProductBase):
     pass
 
+class ProductBulkUpdate(ProductCreate):
+    id: int
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
 class ProductUpdate(ProductBase):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
     price: Optional[float] = Field(None, gt=0)
@@ -33,6 +39,7 @@ class ProductResponseWithMetadata(BaseModel):
 
 class ProductsResponseWithMetadata(BaseModel):
     products: List[ProductResponse]
+    next_cursor: Optional[int] = None
     source: str
     response_time: float
 
@@ -41,13 +48,113 @@ class DeleteResponse(BaseModel):
     source: str
     response_time: float
 
+class BulkProductsResponse(BaseModel):
+    products: List[ProductResponse]
+    not_found: List[int] = []
+    source: str
+    response_time: float
+
+class BulkDeleteResponse(BaseModel):
+    message: str
+    deleted: List[int]
+    not_found: List[int] = []
+    source: str
+    response_time: float
+
+class TierStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+
+class LocalCacheStats(TierStats):
+    size: int
+    max_entries: int
+    evictions: int
+
+class WindowStats(TierStats):
+    requests_per_second: float
+
+class OutboxStats(BaseModel):
+    mode: str
+    applied: int = 0
+    retries: int = 0
+    last_error: Optional[str] = None
+
+class TTLDecision(BaseModel):
+    key: str
+    ttl: int
+    reason: str
+
+class AdaptiveTTLStats(BaseModel):
+    enabled: bool
+    min_ttl: int
+    max_ttl: int
+    max_stretch: float
+    jitter: float
+    tracked_keys: int = 0
+    decisions: Dict[str, int] = {}
+    recent: List[TTLDecision] = []
+
+class NamespaceStats(BaseModel):
+    prefix: str
+    generations: Dict[str, int] = {}
+    reclaimed: int = 0
+
+class CircuitBreakerStats(BaseModel):
+    state: str
+    failures: int = 0
+    failure_threshold: int
+    trips: int = 0
+    rejected: int = 0
+    open_for: float = 0
+    last_error: Optional[str] = None
+
+class BloomFilterStats(BaseModel):
+    enabled: bool
+    bits: int
+    hashes: int
+    rejected: int = 0
+
 class CacheStats(BaseModel):
     hits: int
     misses: int
     hit_rate: float
     total_requests: int
+    by_family: Dict[str, TierStats] = {}
+    by_endpoint: Dict[str, TierStats] = {}
+    windows: Dict[str, WindowStats] = {}
+    codec: str
+    l1: Optional[LocalCacheStats] = None
+    l2: TierStats
+    coalesced_misses: int = 0
+    stale_hits: int = 0
+    negative_hits: int = 0
+    background_refreshes: int = 0
+    adaptive_ttl: Optional[AdaptiveTTLStats] = None
+    namespaces: Optional[NamespaceStats] = None
+    circuit_breaker: Optional[CircuitBreakerStats] = None
+    warmed_keys: int = 0
+    refreshed_ahead: int = 0
+    outbox: Optional[OutboxStats] = None
+    bloom_filter: Optional[BloomFilterStats] = None
+
+class LatencyStats(BaseModel):
+    iterations: int
+    min_ms: float
+    median_ms: float
+    p95_ms: float
+    p99_ms: float
+    throughput_rps: float
+
+class PathPerformance(BaseModel):
+    warm: LatencyStats
+    cold: LatencyStats
+    speedup: Optional[float] = None
 
 class PerformanceResponse(BaseModel):
     cached_response_time: float
     database_response_time: float
     performance_improvement: str
+    iterations: int
+    catalog: PathPerformance
+    product: Optional[PathPerformance] = None
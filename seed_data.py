@@ -9,6 +9,8 @@ import sys
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine
 from models import Base, Product
+# Records these writes in the cache outbox so the app drops stale cache entries
+import cache_outbox  # noqa: F401
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -1,13 +1,36 @@
 #!/bin/bash
 
+# Processes share metrics through this directory when it is set; it must
+# exist (in every mode) before anything imports the app, and the server
+# starts from an empty one
+reset_metrics_dir() {
+    if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+        rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+        mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    fi
+}
+
+# Only production runs several workers, and pools are sized per worker; an
+# empty count lets gunicorn.conf.py derive one from the CPU count
+if [ "$APP_MODE" != "production" ] || [ -z "$WEB_CONCURRENCY" ]; then
+    unset WEB_CONCURRENCY
+fi
+
 # Wait for database to be ready
 echo "Waiting for database to be ready..."
 sleep 10
 
 # Seed the database with sample data
 echo "Seeding database with sample products..."
+reset_metrics_dir
 python seed_data.py
+reset_metrics_dir
 
 # Start the FastAPI application
-echo "Starting FastAPI application..."
-uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+if [ "$APP_MODE" = "production" ]; then
+    echo "Starting FastAPI application in production mode..."
+    exec gunicorn -c gunicorn.conf.py main:app
+else
+    echo "Starting FastAPI application..."
+    exec uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+fi
@@ -0,0 +1,128 @@
+"""Fixtures for the in-process tests: the app on SQLite and fakeredis.
+
+The other scripts in this directory drive a running server and are
+skipped by pytest (run them as described in README.md).
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = tempfile.mkdtemp(prefix="cache-example-tests-")
+
+# The app reads its configuration at import time
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(TMP_DIR, 'primary.db')}",
+    "CACHE_OUTBOX_INTERVAL": "0.1",
+    "CACHE_BREAKER_THRESHOLD": "3",
+    "CACHE_BREAKER_PROBE_INTERVAL": "0.2",
+    "CACHE_WARM_TOP_N": "0",
+})
+for name in ("PROMETHEUS_MULTIPROC_DIR", "WEB_CONCURRENCY", "DB_REPLICA_HOST", "REPLICA_DATABASE_URL"):
+    os.environ.pop(name, None)
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+import pools
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeAsyncRedisConnection
+
+REDIS_SERVER = FakeServer()
+_pool_settings = pools.redis_pool_settings
+pools.redis_pool_settings = lambda: {**_pool_settings(), "connection_class": FakeAsyncRedisConnection, "server": REDIS_SERVER}
+
+import main
+from fastapi.testclient import TestClient
+
+collect_ignore = [
+    "test_cache.py",
+    "test_fix.py",
+    "test_form_validation.py",
+    "test_browser_debug.py",
+    "test_frontend_simulation.py",
+]
+
+@pytest.fixture(scope="session")
+def app_client():
+    with TestClient(main.app) as client:
+        yield client
+
+@pytest.fixture
+def client(app_client):
+    """The app with Redis reachable and an empty cache"""
+    REDIS_SERVER.connected = True
+    wait_for(lambda: not main.cache_service.breaker.is_open)
+    wait_for(lambda: pending_outbox_rows() == 0)
+    assert app_client.post("/cache/clear").status_code == 200
+    wait_for(lambda: main.cache_warmer._warm_task is None or main.cache_warmer._warm_task.done())
+    yield app_client
+    REDIS_SERVER.connected = True
+
+@pytest.fixture
+def call(app_client):
+    """Run an async function on the app's event loop"""
+    return lambda function, *args, **kwargs: app_client.portal.call(lambda: function(*args, **kwargs))
+
+@pytest.fixture
+def redis_server():
+    return REDIS_SERVER
+
+@pytest.fixture
+def cache_services(app_client, call, monkeypatch):
+    """Build extra started CacheServices on the shared fakeredis, configured by environment variables"""
+    from cache_service import CacheService
+
+    services = []
+
+    def build(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        service = CacheService()
+        call(service.start)
+        services.append(service)
+        return service
+
+    yield build
+    for service in services:
+        call(service.close)
+
+def wait_for(predicate, timeout: float = 5.0):
+    """Poll predicate until it is true, failing after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+def take_redis_down(client, redis_server):
+    """Disconnect Redis and trip the breaker with failing reads"""
+    redis_server.connected = False
+    for _ in range(main.cache_service.breaker.failure_threshold):
+        client.get("/products/1")
+    assert main.cache_service.breaker.state == "open"
+
+def pending_outbox_rows() -> int:
+    from database import SessionLocal
+    from models import CacheOutbox
+
+    with SessionLocal() as db:
+        return db.query(CacheOutbox).count()
+
+def new_product(client, **fields) -> dict:
+    """Create a product through the API and wait for its outbox row to be applied"""
+    body = {"name": "Test product", "price": 10, "category": "Tests", **fields}
+    response = client.post("/products", json=body)
+    assert response.status_code == 200, response.text
+    wait_for(lambda: pending_outbox_rows() == 0)
+    return response.json()["product"]
+
+def catalog_entry(client, product_id: int):
+    """The product as served by its catalog page, once the catalog is loaded"""
+    wait_for(lambda: client.get("/products", params={"limit": 1}).json()["source"] == "cache")
+    response = client.get("/products", params={"cursor": product_id - 1, "limit": 1}).json()
+    assert response["source"] == "cache"
+    products = [product for product in response["products"] if product["id"] == product_id]
+    return products[0] if products else None
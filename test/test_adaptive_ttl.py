@@ -0,0 +1,39 @@
+from adaptive_ttl import COLD, READ_MOSTLY, VOLATILE, AdaptiveTTL
+
+def policy(**settings):
+    return AdaptiveTTL(enabled=True, **{"jitter": 0, "half_life": 600, **settings})
+
+def test_cold_keys_keep_the_requested_ttl():
+    ttl_policy = policy()
+    ttl_policy.record_read("product:1")
+    assert ttl_policy.choose("product:1", 600) == (600, COLD)
+
+def test_read_mostly_keys_stay_near_the_requested_ttl():
+    ttl_policy = policy(max_ttl=86400, max_stretch=2)
+    capped = policy(max_ttl=900, max_stretch=2)
+    for _ in range(10):
+        ttl_policy.record_read("product:1")
+        capped.record_read("product:1")
+    assert ttl_policy.choose("product:1", 600) == (1200, READ_MOSTLY)
+    assert capped.choose("product:1", 600) == (900, READ_MOSTLY)
+
+def test_written_keys_expire_before_the_next_expected_write():
+    ttl_policy = policy(min_ttl=60)
+    for _ in range(10):
+        ttl_policy.record_read("product:1")
+    for _ in range(20):
+        ttl_policy.record_write("product:1")
+    ttl, reason = ttl_policy.choose("product:1", 600)
+    assert reason == VOLATILE and 60 <= ttl < 600
+
+def test_jitter_stays_within_its_fraction():
+    ttl_policy = policy(jitter=0.1)
+    ttls = {ttl_policy.ttl("product:1", 600) for _ in range(200)}
+    assert min(ttls) >= 540 and max(ttls) <= 660 and len(ttls) > 1
+
+def test_disabled_policy_uses_the_requested_ttl():
+    ttl_policy = AdaptiveTTL(enabled=False)
+    for _ in range(10):
+        ttl_policy.record_read("product:1")
+    assert ttl_policy.ttl("product:1", 600) == 600
+    assert ttl_policy.get_stats()["decisions"] == {}
@@ -0,0 +1,87 @@
+import pytest
+
+import main
+from test.conftest import catalog_entry, pending_outbox_rows, wait_for
+
+def create_bulk(client, *names, category="Bulk") -> list:
+    body = [{"name": name, "price": 10, "category": category} for name in names]
+    response = client.post("/products/bulk", json=body)
+    assert response.status_code == 200, response.text
+    wait_for(lambda: pending_outbox_rows() == 0)
+    return response.json()["products"]
+
+def get_ids(client, ids: str):
+    return client.get("/products", params={"ids": ids})
+
+def category_names(client, category: str) -> set:
+    return {product["name"] for product in client.get(f"/categories/{category}/products").json()["products"]}
+
+def test_multi_get_loads_only_misses(client, call, monkeypatch):
+    first, second, third = create_bulk(client, "Multi 1", "Multi 2", "Multi 3")
+    assert call(main.cache_service.delete, f"product:{second['id']}")
+    loaded = []
+    fetch_products_by_ids = main.fetch_products_by_ids
+
+    async def counting_fetch(product_ids):
+        loaded.append(product_ids)
+        return await fetch_products_by_ids(product_ids)
+
+    monkeypatch.setattr(main, "fetch_products_by_ids", counting_fetch)
+    ids = f"{third['id']},{first['id']},{second['id']},{third['id']},{third['id'] + 1000}"
+    response = get_ids(client, ids).json()
+    assert [product["id"] for product in response["products"]] == [third["id"], first["id"], second["id"]]
+    assert response["source"] == "database"
+    assert loaded == [[second["id"], third["id"] + 1000]]
+
+    response = get_ids(client, f"{first['id']},{second['id']},{third['id']}").json()
+    assert response["source"] == "cache"
+    assert len(loaded) == 1
+
+@pytest.mark.parametrize("ids", ["1,x", ",", " ", "1.5", ",".join(map(str, range(1, main.MAX_BULK_SIZE + 2)))])
+def test_invalid_ids_are_rejected(client, ids):
+    assert get_ids(client, ids).status_code == 422
+
+@pytest.mark.parametrize("method, path, body", [
+    ("POST", "/products/bulk", []),
+    ("PUT", "/products/bulk", []),
+    ("DELETE", "/products/bulk", {"ids": []}),
+])
+def test_empty_bulk_requests_are_rejected(client, method, path, body):
+    assert client.request(method, path, json=body).status_code == 422
+
+def test_bulk_update_refreshes_products_catalog_and_listings(client):
+    kept, moved = create_bulk(client, "Bulk kept", "Bulk moved", category="Bulk old")
+    assert category_names(client, "Bulk old") == {"Bulk kept", "Bulk moved"}
+    assert category_names(client, "Bulk new") == set()
+    assert catalog_entry(client, moved["id"])["name"] == "Bulk moved"
+
+    body = [
+        {"id": kept["id"], "name": "Bulk kept 2", "price": 11, "category": "Bulk old"},
+        {"id": moved["id"], "name": "Bulk moved 2", "price": 12, "category": "Bulk new"},
+        {"id": moved["id"] + 1000, "name": "Unknown", "price": 1, "category": "Bulk new"},
+    ]
+    response = client.put("/products/bulk", json=body).json()
+    assert response["not_found"] == [moved["id"] + 1000]
+    wait_for(lambda: pending_outbox_rows() == 0)
+
+    assert client.get(f"/products/{moved['id']}").json()["product"]["name"] == "Bulk moved 2"
+    assert get_ids(client, f"{kept['id']},{moved['id']}").json()["products"][0]["price"] == 11
+    assert catalog_entry(client, moved["id"])["name"] == "Bulk moved 2"
+    assert category_names(client, "Bulk old") == {"Bulk kept 2"}
+    assert category_names(client, "Bulk new") == {"Bulk moved 2"}
+
+def test_bulk_delete_drops_products_catalog_entries_and_listings(client):
+    gone, kept = create_bulk(client, "Bulk gone", "Bulk stays", category="Bulk delete")
+    assert client.get(f"/products/{gone['id']}").status_code == 200
+    assert category_names(client, "Bulk delete") == {"Bulk gone", "Bulk stays"}
+    assert catalog_entry(client, gone["id"]) is not None
+
+    response = client.request("DELETE", "/products/bulk", json={"ids": [gone["id"], gone["id"], kept["id"] + 1000]})
+    assert response.json()["deleted"] == [gone["id"]]
+    assert response.json()["not_found"] == [kept["id"] + 1000]
+    wait_for(lambda: pending_outbox_rows() == 0)
+
+    assert client.get(f"/products/{gone['id']}").status_code == 404
+    assert [product["id"] for product in get_ids(client, f"{gone['id']},{kept['id']}").json()["products"]] == [kept["id"]]
+    assert catalog_entry(client, gone["id"]) is None
+    assert category_names(client, "Bulk delete") == {"Bulk stays"}
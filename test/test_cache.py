@@ -155,6 +155,11 @@ def test_performance_comparison():
         print(f"   📊 Cached response time: {data.get('cached_response_time', 0):.3f}s")
         print(f"   📊 Database response time: {data.get('database_response_time', 0):.3f}s")
         print(f"   🚀 Performance improvement: {data.get('performance_improvement', '0%')}")
+        for path in ("catalog", "product"):
+            if data.get(path):
+                warm, cold = data[path]["warm"], data[path]["cold"]
+                print(f"   📈 {path}: cached p50 {warm['median_ms']:.3f}ms p99 {warm['p99_ms']:.3f}ms | "
+                      f"database p50 {cold['median_ms']:.3f}ms p99 {cold['p99_ms']:.3f}ms")
     else:
         print(f"   ❌ Error: {response.status_code}")
 
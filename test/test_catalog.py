@@ -0,0 +1,51 @@
+import pytest
+
+import main
+from test.conftest import catalog_entry, new_product, wait_for
+
+@pytest.fixture
+def rebuilds(monkeypatch):
+    """Count catalog rebuilds"""
+    counted = []
+    rebuild = main.catalog_cache.rebuild
+
+    async def counting_rebuild(fetch_batch):
+        counted.append(fetch_batch)
+        return await rebuild(fetch_batch)
+
+    monkeypatch.setattr(main.catalog_cache, "rebuild", counting_rebuild)
+    return counted
+
+def test_empty_catalog_is_served_without_rebuilding(client, call, rebuilds, monkeypatch):
+    async def no_products(limit, cursor=None, request=None):
+        return [], None
+
+    monkeypatch.setattr(main, "fetch_products_page", no_products)
+    call(main.catalog_cache.invalidate)
+    wait_for(lambda: client.get("/products").json()["source"] == "cache")
+    loads = len(rebuilds)
+    for _ in range(5):
+        response = client.get("/products").json()
+        assert response["source"] == "cache" and response["products"] == []
+    assert len(rebuilds) == loads == 1
+
+    call(main.catalog_cache.upsert, {"id": 1, "name": "Only product"})
+    assert call(main.catalog_cache.get_page, 10)[0] == [{"id": 1, "name": "Only product"}]
+    call(main.catalog_cache.remove, 1)
+    assert call(main.catalog_cache.get_page, 10)[:2] == ([], None)
+
+def test_writes_patch_the_catalog_in_place(client, rebuilds):
+    product = new_product(client, name="Catalog entry")
+    assert catalog_entry(client, product["id"])["name"] == "Catalog entry"
+    loads = len(rebuilds)
+
+    created = new_product(client, name="Created later")
+    assert catalog_entry(client, created["id"])["name"] == "Created later"
+
+    body = {"name": "Catalog update", "price": 12, "category": "Tests"}
+    assert client.put(f"/products/{product['id']}", json=body).status_code == 200
+    assert catalog_entry(client, product["id"])["name"] == "Catalog update"
+
+    assert client.delete(f"/products/{product['id']}").status_code == 200
+    assert catalog_entry(client, product["id"]) is None
+    assert len(rebuilds) == loads
@@ -0,0 +1,51 @@
+import time
+
+import main
+from test.conftest import new_product, pending_outbox_rows, take_redis_down, wait_for
+
+def test_reads_fail_fast_from_the_database_while_open(client, redis_server):
+    product = new_product(client, name="Breaker read")
+    take_redis_down(client, redis_server)
+
+    start = time.perf_counter()
+    sources = [client.get(f"/products/{product['id']}").json()["source"] for _ in range(20)]
+    assert sources == ["database"] * 20
+    assert time.perf_counter() - start < 2
+
+    health = client.get("/health").json()
+    assert health["status"] == "degraded"
+    assert health["services"]["cache"] == "unavailable"
+    stats = client.get("/cache/stats").json()["circuit_breaker"]
+    assert stats["state"] == "open" and stats["rejected"] > 0
+
+    redis_server.connected = True
+    wait_for(lambda: main.cache_service.breaker.state == "closed")
+    assert client.get("/health").json()["status"] == "healthy"
+
+def test_performance_comparison_degrades_while_open(client, redis_server):
+    new_product(client, name="Breaker performance")
+    take_redis_down(client, redis_server)
+    response = client.get("/cache/performance", params={"iterations": 3})
+    assert response.status_code == 200, response.text
+
+def test_writes_while_open_are_replayed_before_the_breaker_closes(client, redis_server):
+    product = new_product(client, name="Before outage")
+    assert client.get(f"/products/{product['id']}").json()["source"] == "cache"
+    take_redis_down(client, redis_server)
+
+    body = {"name": "During outage", "price": 10, "category": "Tests"}
+    assert client.put(f"/products/{product['id']}", json=body).status_code == 200
+    time.sleep(0.3)
+    assert pending_outbox_rows() == 1
+
+    redis_server.connected = True
+    wait_for(lambda: main.cache_service.breaker.state == "closed")
+    assert pending_outbox_rows() == 0
+    response = client.get(f"/products/{product['id']}").json()
+    assert response["product"]["name"] == "During outage"
+
+def test_warm_up_gives_up_once_the_breaker_opens(client, call, redis_server):
+    take_redis_down(client, redis_server)
+    start = time.perf_counter()
+    assert call(main.cache_warmer.warm) is False
+    assert time.perf_counter() - start < 1
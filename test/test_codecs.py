@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+import main
+from cache_codecs import AVAILABLE, COMPRESSORS, SERIALIZERS, Codec
+from test.conftest import new_product
+
+CODECS = [
+    (serializer, compression)
+    for serializer in (name for name, *_ in SERIALIZERS.values())
+    for compression in (name for name, *_ in COMPRESSORS.values())
+    if AVAILABLE.get(serializer, True) and AVAILABLE.get(compression, True)
+]
+
+def test_legacy_json_entry_is_served(client, call):
+    product = new_product(client, name="Legacy entry")
+    legacy = {**product, "name": "Written before codecs"}
+    key = main.cache_service.key(f"product:{product['id']}")
+    call(main.cache_service.redis_client.set, key, json.dumps(legacy).encode(), ex=600)
+
+    assert call(main.cache_service.get, f"product:{product['id']}") == legacy
+    assert json.loads(call(main.cache_service.get_raw, f"product:{product['id']}")) == legacy
+    assert client.get(f"/products/{product['id']}").json()["product"] == legacy
+
+@pytest.mark.parametrize("written_with", CODECS, ids="+".join)
+def test_entries_of_another_codec_decode_after_switching(client, call, monkeypatch, written_with):
+    value = {"id": 1, "name": "Switched codec", "description": "word " * 400, "tags": ["a", "b"]}
+    monkeypatch.setattr(main.cache_service, "codec", Codec(*written_with, threshold=0))
+    assert call(main.cache_service.set, "codec:switch", value, 600)
+
+    for reader in (codec for codec in (("json", "none"), ("msgpack", "zstd")) if codec in CODECS):
+        monkeypatch.setattr(main.cache_service, "codec", Codec(*reader))
+        assert call(main.cache_service.get, "codec:switch") == value
+        assert json.loads(call(main.cache_service.get_raw, "codec:switch")) == value
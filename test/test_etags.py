@@ -0,0 +1,61 @@
+from test.conftest import new_product, pending_outbox_rows, wait_for
+
+def product_etag(client, product_id: int) -> str:
+    response = client.get(f"/products/{product_id}")
+    assert response.status_code == 200
+    return response.headers["etag"]
+
+def catalog_etag(client, encoding: str = "identity") -> str:
+    """ETag of the first catalog page once the catalog is served from the cache"""
+    headers = {"Accept-Encoding": encoding}
+    wait_for(lambda: "etag" in client.get("/products", headers=headers).headers)
+    return client.get("/products", headers=headers).headers["etag"]
+
+def test_unchanged_product_answers_304(client):
+    product = new_product(client, name="Conditional")
+    etag = product_etag(client, product["id"])
+    response = client.get(f"/products/{product['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.headers["etag"] == etag
+
+def test_product_etag_changes_with_every_put(client):
+    product = new_product(client, name="Version 0")
+    etags = [product_etag(client, product["id"])]
+    for version in (1, 2):
+        body = {"name": f"Version {version}", "price": 10, "category": "Tests"}
+        assert client.put(f"/products/{product['id']}", json=body).status_code == 200
+        etags.append(product_etag(client, product["id"]))
+    assert len(set(etags)) == 3
+
+    response = client.get(f"/products/{product['id']}", headers={"If-None-Match": etags[1]})
+    assert response.status_code == 200 and response.json()["product"]["name"] == "Version 2"
+
+def test_product_etag_changes_after_bulk_put(client):
+    product = new_product(client, name="Bulk before")
+    etag = product_etag(client, product["id"])
+    body = [{"id": product["id"], "name": "Bulk after", "price": 10, "category": "Tests"}]
+    assert client.put("/products/bulk", json=body).status_code == 200
+    wait_for(lambda: pending_outbox_rows() == 0)
+    assert product_etag(client, product["id"]) != etag
+    assert client.get(f"/products/{product['id']}", headers={"If-None-Match": etag}).status_code == 200
+
+def test_unchanged_catalog_page_answers_304_until_a_write(client):
+    new_product(client, name="Catalog conditional")
+    etag = catalog_etag(client)
+    assert client.get("/products", headers={"If-None-Match": etag}).status_code == 304
+
+    new_product(client, name="Catalog changed")
+    assert client.get("/products", headers={"If-None-Match": etag}).status_code == 200
+    assert catalog_etag(client) != etag
+
+def test_catalog_etag_depends_on_the_encoding(client):
+    body = [
+        {"name": f"Encoded {i}", "price": 10, "category": "Tests", "description": "Long description " * 10}
+        for i in range(20)
+    ]
+    assert client.post("/products/bulk", json=body).status_code == 200
+    wait_for(lambda: pending_outbox_rows() == 0)
+
+    plain, gzipped = catalog_etag(client), catalog_etag(client, "gzip")
+    assert plain != gzipped and gzipped.endswith('-gzip"')
+    response = client.get("/products", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped})
+    assert response.status_code == 304
@@ -0,0 +1,37 @@
+import gzip
+
+import pytest
+
+from http_compression import SUPPORTED_ENCODINGS, brotli, compress_head, finish, negotiate
+from test.conftest import pending_outbox_rows, wait_for
+
+DECOMPRESS = {"gzip": gzip.decompress, "br": brotli.decompress if brotli is not None else None}
+
+HEAD = b'{"products":[' + b",".join(b'{"id":%d,"name":"Product %d"}' % (i, i) for i in range(500)) + b"]"
+
+@pytest.mark.parametrize("encoding", SUPPORTED_ENCODINGS)
+@pytest.mark.parametrize("tail", [b"", b',"source":"cache"}', b"x" * 70000])
+def test_finished_bodies_decompress_to_head_and_tail(encoding, tail):
+    assert DECOMPRESS[encoding](finish(encoding, compress_head(encoding, HEAD), tail)) == HEAD + tail
+
+def test_negotiate_honours_q_values():
+    assert negotiate("gzip, br", ("br", "gzip")) == "br"
+    assert negotiate("gzip, br;q=0.5", ("br", "gzip")) == "gzip"
+    assert negotiate("br;q=0, *", ("br", "gzip")) == "gzip"
+    assert negotiate("identity", ("br", "gzip")) is None
+
+@pytest.mark.parametrize("encoding", SUPPORTED_ENCODINGS)
+def test_cached_listings_are_spliced_into_the_same_json(client, encoding):
+    body = [
+        {"name": f"Compressed {i}", "price": 10, "category": "Compressed", "description": "Long description " * 10}
+        for i in range(20)
+    ]
+    assert client.post("/products/bulk", json=body).status_code == 200
+    wait_for(lambda: pending_outbox_rows() == 0)
+    plain = client.get("/categories/Compressed/products", headers={"Accept-Encoding": "identity"})
+    assert plain.json()["source"] == "database"
+
+    response = client.get("/categories/Compressed/products", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.json()["source"] == "cache"
+    assert response.json()["products"] == plain.json()["products"]
@@ -0,0 +1,41 @@
+import main
+from cache_warmer import CacheWarmer
+from test.conftest import wait_for
+
+def redis_keys(call) -> set:
+    return {key.decode() for key in call(main.cache_service.redis_client.keys, "*")}
+
+def test_prefixes_keep_apps_on_one_redis_apart(cache_services, call):
+    alpha = cache_services(CACHE_KEY_PREFIX="alpha", CACHE_L1_MAX_ENTRIES="100")
+    beta = cache_services(CACHE_KEY_PREFIX="beta", CACHE_L1_MAX_ENTRIES="100")
+    wait_for(lambda: {"alpha:invalidate", "beta:invalidate"} <= {
+        channel.decode() for channel in call(main.cache_service.redis_client.pubsub_channels)
+    })
+    before = redis_keys(call)
+
+    for service in (alpha, beta):
+        assert call(service.set, "shared", service.namespaces.prefix)
+        assert call(service.get, "shared") == service.namespaces.prefix
+    call(alpha.mark_recent_write, 5)
+    alpha.increment_hits("test", "product")
+    assert call(alpha.stats.flush)
+    warmers = [CacheWarmer(service, None, None, None) for service in (alpha, beta)]
+    warmers[0].record(1)
+    assert call(warmers[0].flush)
+    call(warmers[0]._decay)
+
+    # Neither app's locks, stats or invalidations reach the other
+    assert all(call(warmer._acquire_round) for warmer in warmers)
+    assert call(beta.has_recent_write) is False
+    assert call(beta.stats.get_stats)["total_requests"] == 0
+    assert call(warmers[1].hot_product_ids) == []
+    assert call(beta.clear)
+    assert call(alpha.get, "shared") == "alpha"
+    assert alpha.local_cache.get(alpha.key("shared")) == "alpha"
+
+    written = redis_keys(call) - before
+    assert {
+        "alpha:stats:totals", "alpha:stats:hot_products", "alpha:stats:hot_products:decay",
+        "alpha:lock:refresh_ahead", "beta:lock:refresh_ahead", "alpha:db:recent_write"
+    } <= written
+    assert all(key.startswith(("alpha:", "beta:")) for key in written), written
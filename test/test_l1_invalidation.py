@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+
+from test.conftest import wait_for
+
+APPS = itertools.count()
+
+@pytest.fixture
+def workers(cache_services, call):
+    """Two workers of one app, each with an L1 cache, listening for invalidations"""
+    prefix = f"l1-{next(APPS)}"
+    first, second = (
+        cache_services(CACHE_KEY_PREFIX=prefix, CACHE_L1_MAX_ENTRIES="100", CACHE_L1_TTL="60") for _ in range(2)
+    )
+    wait_for(lambda: dict(call(first.redis_client.pubsub_numsub, first.invalidation_channel)).get(
+        first.invalidation_channel.encode()) == 2)
+    yield first, second
+    call(first.clear)
+
+def cached_locally(worker, key: str):
+    return worker.local_cache.get(worker.key(key))
+
+def read_into_l1(call, worker, key: str, value):
+    assert call(worker.get, key) == value
+    assert cached_locally(worker, key) == value
+
+def test_write_through_drops_other_workers_copies(workers, call):
+    first, second = workers
+    assert call(first.set, "l1:replace", "old", 600)
+    read_into_l1(call, second, "l1:replace", "old")
+
+    assert call(first.replace, "l1:replace", "new", 600)
+    wait_for(lambda: cached_locally(second, "l1:replace") is None)
+    assert call(second.get, "l1:replace") == "new"
+
+def test_deletes_and_tag_invalidations_reach_other_workers(workers, call):
+    first, second = workers
+    assert call(first.set, "l1:deleted", "value", 600)
+    assert call(first.set, "l1:tagged", "value", 600, ["l1-tag"])
+    for key in ("l1:deleted", "l1:tagged"):
+        read_into_l1(call, second, key, "value")
+
+    assert call(first.delete, "l1:deleted")
+    assert call(first.invalidate_tags, ["l1-tag"]) == 1
+    wait_for(lambda: cached_locally(second, "l1:deleted") is None and cached_locally(second, "l1:tagged") is None)
+    assert call(second.get, "l1:deleted") is None
+    assert call(second.get, "l1:tagged") is None
+
+def test_clear_empties_every_workers_l1(workers, call):
+    first, second = workers
+    assert call(first.set, "l1:cleared", "value", 600)
+    read_into_l1(call, second, "l1:cleared", "value")
+
+    assert call(first.clear)
+    wait_for(lambda: second.namespaces._generations == first.namespaces._generations)
+    assert len(second.local_cache._entries) == 0
+    assert call(second.get, "l1:cleared") is None
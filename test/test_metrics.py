@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from metrics import LATENCY_BUCKETS
+from test.conftest import new_product
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_metrics(multiproc_dir: str) -> subprocess.CompletedProcess:
+    """Import metrics in a fresh process, record an observation and render"""
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": multiproc_dir}
+    code = (
+        "import metrics\n"
+        "metrics.SQL_LATENCY.labels('SELECT').observe(0.01)\n"
+        "print(metrics.MULTIPROC_DIR)\n"
+        "print(b'db_query_duration_seconds_count' in metrics.render_metrics()[0])\n"
+    )
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+
+def test_missing_multiproc_dir_falls_back_to_single_process(tmp_path):
+    result = run_metrics(str(tmp_path / "missing"))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-2:] == ["None", "True"]
+
+def test_existing_multiproc_dir_is_shared(tmp_path):
+    result = run_metrics(str(tmp_path))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == "True"
+    assert any(name.endswith(".db") for name in os.listdir(tmp_path))
+
+def request_latency_samples(client, route: str) -> dict:
+    """(sample name, le) -> value of the request latency histogram for GETs of one route"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    families = {family.name: family for family in text_string_to_metric_families(response.text)}
+    return {
+        (sample.name, sample.labels.get("le")): sample.value
+        for sample in families["http_request_duration_seconds"].samples
+        if sample.labels["route"] == route and sample.labels["method"] == "GET" and sample.labels["status"] == "200"
+    }
+
+def test_metrics_expose_request_latency_buckets(client):
+    product = new_product(client, name="Measured product")
+    route = "/products/{product_id}"
+    client.get(f"/products/{product['id']}")
+    before = request_latency_samples(client, route)
+    assert client.get(f"/products/{product['id']}").status_code == 200
+    after = request_latency_samples(client, route)
+
+    buckets = [le for name, le in after if name == "http_request_duration_seconds_bucket"]
+    assert buckets == [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+    assert after[("http_request_duration_seconds_count", None)] == before[("http_request_duration_seconds_count", None)] + 1
+    assert after[("http_request_duration_seconds_bucket", "+Inf")] == after[("http_request_duration_seconds_count", None)]
+    assert after[("http_request_duration_seconds_sum", None)] > before[("http_request_duration_seconds_sum", None)]
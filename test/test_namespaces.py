@@ -0,0 +1,41 @@
+import fakeredis
+
+import main
+from test.conftest import new_product, take_redis_down, wait_for
+
+def sources(client, product, *categories):
+    """Where the product and each category listing were served from"""
+    paths = [f"/products/{product['id']}"] + [f"/categories/{category}/products" for category in categories]
+    return [client.get(path).json()["source"] for path in paths]
+
+def test_category_scope_clears_only_that_listing(client):
+    product = new_product(client, name="Scoped", category="Scope A")
+    new_product(client, name="Other", category="Scope B")
+    sources(client, product, "Scope A", "Scope B")
+
+    assert client.post("/cache/clear", params={"scope": "category", "category": "Scope A"}).status_code == 200
+    assert sources(client, product, "Scope A", "Scope B") == ["cache", "database", "cache"]
+
+def test_products_scope_clears_products_and_listings(client):
+    product = new_product(client, name="Products scope", category="Scope A")
+    sources(client, product, "Scope A")
+
+    assert client.post("/cache/clear", params={"scope": "products"}).status_code == 200
+    assert sources(client, product, "Scope A") == ["database", "database"]
+
+def test_category_scope_needs_a_category(client):
+    assert client.post("/cache/clear", params={"scope": "category"}).status_code == 422
+
+def test_old_generations_are_reclaimed(client, redis_server):
+    product = new_product(client, name="Reclaimed")
+    old_key = main.cache_service.key(f"product:{product['id']}")
+    redis = fakeredis.FakeRedis(server=redis_server)
+    assert redis.exists(old_key)
+
+    assert client.post("/cache/clear").status_code == 200
+    assert main.cache_service.key(f"product:{product['id']}") != old_key
+    wait_for(lambda: not redis.exists(old_key))
+
+def test_clear_fails_while_redis_is_down(client, redis_server):
+    take_redis_down(client, redis_server)
+    assert client.post("/cache/clear").status_code == 503
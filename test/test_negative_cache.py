@@ -0,0 +1,58 @@
+import main
+from test.conftest import new_product, wait_for
+
+def bloom_keys(call) -> int:
+    """Bloom filter keys stored under the current generation"""
+    redis_client = main.cache_service.redis_client
+    return call(redis_client.exists, *[main.cache_service.key(key) for key in (
+        main.product_filter.key, main.product_filter.ready_key
+    )])
+
+def filter_ready(call) -> bool:
+    return bool(call(main.cache_service.redis_client.exists, main.cache_service.key(main.product_filter.ready_key)))
+
+def test_missing_product_is_tombstoned_until_created(client):
+    product = new_product(client, name="Tombstone neighbour")
+    next_id = product["id"] + 1
+    before = client.get("/cache/stats").json()["negative_hits"]
+    assert client.get(f"/products/{next_id}").status_code == 404
+    assert client.get(f"/products/{next_id}").status_code == 404
+    assert client.get("/cache/stats").json()["negative_hits"] == before + 1
+
+    created = new_product(client, name="Tombstoned product")
+    assert created["id"] == next_id
+    assert client.get(f"/products/{next_id}").status_code == 200
+
+def test_disabled_filter_touches_nothing(client, call):
+    assert not main.product_filter.enabled
+    call(main.product_filter.start)
+    assert call(main.product_filter.ensure_ready) is False
+    assert call(main.product_filter.rebuild) is None
+    assert bloom_keys(call) == 0
+
+def test_enabled_filter_rejects_unknown_ids(client, call, monkeypatch):
+    product = new_product(client, name="Bloom member")
+    monkeypatch.setattr(main.product_filter, "enabled", True)
+    call(main.product_filter.start)
+    wait_for(lambda: filter_ready(call))
+
+    assert client.get(f"/products/{product['id']}").status_code == 200
+    before = main.product_filter.rejected
+    assert client.get("/products/999999").status_code == 404
+    assert main.product_filter.rejected == before + 1
+
+def test_products_created_while_disabled_are_found_after_enabling(client, call, monkeypatch):
+    # A bitmap and ready marker left from an earlier run with the filter on
+    monkeypatch.setattr(main.product_filter, "enabled", True)
+    call(main.product_filter.start)
+    wait_for(lambda: filter_ready(call))
+
+    monkeypatch.setattr(main.product_filter, "enabled", False)
+    product = new_product(client, name="Created while off")
+
+    monkeypatch.setattr(main.product_filter, "enabled", True)
+    call(main.product_filter.start)
+    wait_for(lambda: filter_ready(call))
+    # The entry cached by the create has expired
+    call(main.cache_service.delete, f"product:{product['id']}")
+    assert client.get(f"/products/{product['id']}").status_code == 200
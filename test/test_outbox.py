@@ -0,0 +1,47 @@
+import main
+from database import SessionLocal
+from models import CacheOutbox, Product
+from test.conftest import new_product, pending_outbox_rows, wait_for
+
+def test_writes_outside_the_api_reach_the_cache(client):
+    product = new_product(client, name="Outside write", category="Outbox")
+    assert client.get(f"/products/{product['id']}").json()["source"] == "cache"
+    assert client.get("/categories/Outbox/products").json()["source"] == "database"
+
+    with SessionLocal() as db:
+        db.get(Product, product["id"]).name = "Renamed outside"
+        db.commit()
+    wait_for(lambda: pending_outbox_rows() == 0)
+
+    response = client.get(f"/products/{product['id']}").json()
+    assert response["source"] == "cache" and response["product"]["name"] == "Renamed outside"
+    listing = client.get("/categories/Outbox/products").json()
+    assert listing["source"] == "database" and listing["products"][0]["name"] == "Renamed outside"
+
+def test_deletes_outside_the_api_drop_the_cached_product(client):
+    product = new_product(client, name="Deleted outside")
+    assert client.get(f"/products/{product['id']}").json()["source"] == "cache"
+
+    with SessionLocal() as db:
+        db.delete(db.get(Product, product["id"]))
+        db.commit()
+    wait_for(lambda: pending_outbox_rows() == 0)
+    assert client.get(f"/products/{product['id']}").status_code == 404
+
+def test_failed_batches_stay_queued_and_are_retried(client, monkeypatch):
+    retries = main.outbox_worker.retries
+    apply = main.outbox_worker.apply
+
+    async def fail(entries):
+        raise RuntimeError("cache unavailable")
+
+    monkeypatch.setattr(main.outbox_worker, "apply", fail)
+    product = client.post("/products", json={"name": "Retried", "price": 10, "category": "Tests"}).json()["product"]
+    wait_for(lambda: main.outbox_worker.retries > retries)
+    with SessionLocal() as db:
+        row = db.query(CacheOutbox).one()
+        assert row.product_id == product["id"] and row.attempts >= 1
+    assert main.outbox_worker.last_error == "cache unavailable"
+
+    monkeypatch.setattr(main.outbox_worker, "apply", apply)
+    wait_for(lambda: pending_outbox_rows() == 0)
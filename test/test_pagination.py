@@ -0,0 +1,69 @@
+import pytest
+
+import main
+from test.conftest import new_product, pending_outbox_rows, wait_for
+
+@pytest.fixture(params=["cache", "database"])
+def source(request, client, call, monkeypatch):
+    """Serve pages from the loaded catalog or, with the catalog cold, from the database"""
+    if request.param == "database":
+        async def cold(fetch_batch):
+            return False
+
+        call(main.catalog_cache.invalidate)
+        monkeypatch.setattr(main.catalog_cache, "ensure_loaded", cold)
+    else:
+        wait_for(lambda: client.get("/products", params={"limit": 1}).json()["source"] == "cache")
+    return request.param
+
+def all_pages(client, limit: int, cursor=None):
+    """Follow next_cursor from cursor until the last page"""
+    pages = []
+    while True:
+        params = {"limit": limit} if cursor is None else {"limit": limit, "cursor": cursor}
+        page = client.get("/products", params=params).json()
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+def product_ids() -> list:
+    from database import SessionLocal
+    from models import Product
+
+    with SessionLocal() as db:
+        return [product_id for (product_id,) in db.query(Product.id).order_by(Product.id)]
+
+def test_next_cursor_chains_through_every_product_once(client, source):
+    body = [{"name": f"Paged {i}", "price": 10, "category": "Tests"} for i in range(7)]
+    assert client.post("/products/bulk", json=body).status_code == 200
+    wait_for(lambda: pending_outbox_rows() == 0)
+
+    pages = all_pages(client, limit=3)
+    assert {page["source"] for page in pages} == {source}
+    assert all(len(page["products"]) == 3 for page in pages[:-1]) and 1 <= len(pages[-1]["products"]) <= 3
+    assert [product["id"] for page in pages for product in page["products"]] == product_ids()
+
+@pytest.mark.parametrize("params", [
+    {"cursor": -1}, {"cursor": "abc"}, {"limit": 0}, {"limit": main.MAX_PAGE_SIZE + 1}, {"limit": "ten"}
+])
+def test_invalid_cursor_or_limit_is_rejected(client, params):
+    assert client.get("/products", params=params).status_code == 422
+
+def test_writes_to_an_earlier_page_keep_later_cursors_valid(client, source):
+    first, second, third = (new_product(client, name=f"Keyset {i}") for i in range(3))
+    page = client.get("/products", params={"cursor": first["id"] - 1, "limit": 1}).json()
+    etag = client.get("/products", params={"cursor": second["id"] - 1, "limit": 1}).headers.get("etag")
+    assert [product["id"] for product in page["products"]] == [first["id"]]
+
+    assert client.delete(f"/products/{first['id']}").status_code == 200
+    wait_for(lambda: pending_outbox_rows() == 0)
+    following = client.get("/products", params={"cursor": page["next_cursor"], "limit": 2}).json()
+    assert [product["id"] for product in following["products"]] == [second["id"], third["id"]]
+
+    if source == "cache":
+        response = client.get("/products", params={"cursor": second["id"] - 1, "limit": 1})
+        assert response.headers["etag"] != etag
+        assert client.get(
+            "/products", params={"cursor": second["id"] - 1, "limit": 1}, headers={"If-None-Match": etag}
+        ).status_code == 200
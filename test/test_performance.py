@@ -0,0 +1,33 @@
+import types
+
+import main
+from test.conftest import new_product
+
+def test_latency_stats_of_no_samples_or_zero_times():
+    empty = main.latency_stats([])
+    assert empty == {"iterations": 0, "min_ms": 0.0, "median_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "throughput_rps": 0.0}
+    assert main.latency_stats([0.0, 0.0])["throughput_rps"] == 0.0
+    assert main.path_performance([], [0.001])["speedup"] is None
+    assert main.path_performance([0.0], [0.001])["speedup"] is None
+    assert main.path_performance([0.001], [0.003])["speedup"] == 3.0
+
+def test_performance_with_zero_timings(client, monkeypatch):
+    new_product(client, name="Timed product")
+    monkeypatch.setattr(main, "time", types.SimpleNamespace(time=lambda: 1000.0, perf_counter=lambda: 5.0))
+    response = client.get("/cache/performance", params={"iterations": 2})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["performance_improvement"] == "n/a"
+    assert body["cached_response_time"] == body["database_response_time"] == 0
+    for path in (body["catalog"], body["product"]):
+        assert path["speedup"] is None
+        assert path["warm"]["throughput_rps"] == path["cold"]["throughput_rps"] == 0.0
+
+def test_performance_reports_both_paths(client):
+    new_product(client, name="Timed product")
+    body = client.get("/cache/performance", params={"iterations": 3}).json()
+    assert body["iterations"] == 3
+    for path in (body["catalog"], body["product"]):
+        assert path["warm"]["iterations"] == path["cold"]["iterations"] == 3
+        assert 0 < path["warm"]["min_ms"] <= path["warm"]["median_ms"] <= path["warm"]["p99_ms"]
+    assert body["performance_improvement"].endswith("%")
@@ -0,0 +1,41 @@
+import asyncio
+import socket
+import time
+
+import pytest
+import redis.asyncio as redis
+from redis.exceptions import ConnectionError, TimeoutError
+
+from pools import TimedBlockingConnectionPool
+
+SETTINGS = {"max_connections": 4, "timeout": 5, "socket_connect_timeout": 0.5, "socket_timeout": 0.5}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def timed_ping(port: int):
+    """Seconds a PING through the app's pool took to fail, and the error"""
+    client = redis.Redis.from_pool(TimedBlockingConnectionPool(host="127.0.0.1", port=port, **SETTINGS))
+    start = time.perf_counter()
+    try:
+        await client.ping()
+    except (ConnectionError, TimeoutError) as e:
+        return time.perf_counter() - start, e
+    finally:
+        await client.aclose()
+    pytest.fail("PING succeeded")
+
+def test_refused_connection_fails_within_connect_timeout():
+    elapsed, error = asyncio.run(timed_ping(free_port()))
+    assert elapsed < SETTINGS["socket_connect_timeout"] + 0.5
+    assert "No connection available" not in str(error)
+
+def test_silent_server_fails_within_socket_timeout():
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen(8)
+        elapsed, error = asyncio.run(timed_ping(server.getsockname()[1]))
+    assert isinstance(error, TimeoutError)
+    assert elapsed < SETTINGS["socket_timeout"] + 0.5
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import database
+import main
+from models import Base
+from test.conftest import ROOT
+
+LAG_THRESHOLD = 0.5
+
+@pytest.fixture
+def replica(client, call, monkeypatch, tmp_path):
+    """Route reads to an empty replica that never catches up with the primary"""
+    path = tmp_path / "replica.db"
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(database, "HAS_REPLICA", True)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", sessions)
+    monkeypatch.setattr(main, "HAS_REPLICA", True)
+    monkeypatch.setattr(main, "REPLICA_LAG_THRESHOLD", LAG_THRESHOLD)
+    yield
+    call(engine.dispose)
+
+def uncached_get(client, call, product_id: int):
+    """Read a product through the database, as on a cache miss"""
+    call(main.cache_service.delete, f"product:{product_id}")
+    return client.get(f"/products/{product_id}")
+
+def own_write(client, name: str) -> dict:
+    """Create a product without waiting for its outbox row, as the write marker only lasts LAG_THRESHOLD"""
+    response = client.post("/products", json={"name": name, "price": 10, "category": "Tests"})
+    assert response.status_code == 200
+    return response.json()["product"]
+
+def test_reads_after_a_write_use_the_primary_until_the_lag_passes(client, call, replica):
+    product = own_write(client, "Replicated")
+    assert "last_write" in client.cookies
+    assert uncached_get(client, call, product["id"]).status_code == 200
+
+    time.sleep(LAG_THRESHOLD + 0.1)
+    assert uncached_get(client, call, product["id"]).status_code == 404
+
+def test_client_reads_follow_its_write_marker(client, replica, monkeypatch):
+    async def cold(fetch_batch):
+        return False
+
+    # A catalog rebuilt once the lag has passed would come from the replica
+    # and be served to every client; read pages from the database instead
+    monkeypatch.setattr(main.catalog_cache, "ensure_loaded", cold)
+    product = own_write(client, "Own write")
+
+    params = {"cursor": product["id"] - 1, "limit": 1}
+    assert [item["id"] for item in client.get("/products", params=params).json()["products"]] == [product["id"]]
+
+    client.cookies.clear()
+    assert client.get("/products", params=params).json()["products"] == []
+
+def test_replica_url_replaces_the_replica_settings(tmp_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'primary.db'}",
+        "REPLICA_DATABASE_URL": f"sqlite:///{tmp_path / 'replica.db'}",
+        "DB_REPLICA_HOST": "",
+    }
+    code = "import database\nprint(database.HAS_REPLICA, database.ASYNC_REPLICA_DATABASE_URL)\n"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["True", f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"]
@@ -0,0 +1,47 @@
+import asyncio
+
+import main
+from test.conftest import wait_for
+
+def test_concurrent_misses_load_once(client, call):
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.1)
+        return {"id": 1, "name": "Loaded once"}
+
+    async def misses(count: int):
+        return await asyncio.gather(*[
+            main.cache_service.get_or_set("stampede:miss", loader, expire=60) for _ in range(count)
+        ])
+
+    before = main.cache_service.coalesced_misses
+    results = call(misses, 20)
+    assert len(loads) == 1
+    assert results == [({"id": 1, "name": "Loaded once"}, False)] * 20
+    assert main.cache_service.coalesced_misses == before + 19
+    assert call(main.cache_service.get_or_set, "stampede:miss", loader, 60) == ({"id": 1, "name": "Loaded once"}, True)
+    assert len(loads) == 1
+
+def test_stale_value_is_served_while_refreshing(client, call):
+    released = []
+
+    async def loader():
+        while not released:
+            await asyncio.sleep(0.01)
+        return "fresh"
+
+    # A TTL inside the stale window makes the stored value stale straight away
+    assert main.cache_service.stale_ttl > 5
+    assert call(main.cache_service.set, "stampede:stale", "old", 5)
+    before = main.cache_service.stale_hits
+    assert call(main.cache_service.get_or_set, "stampede:stale", loader, 60) == ("old", True)
+    assert call(main.cache_service.get_or_set, "stampede:stale", loader, 60) == ("old", True)
+    assert main.cache_service.stale_hits == before + 2
+    assert len(main.cache_service._refresh_tasks) == 1
+
+    released.append(True)
+    wait_for(lambda: call(main.cache_service.get, "stampede:stale") == "fresh")
+    assert call(main.cache_service.get_or_set, "stampede:stale", loader, 60) == ("fresh", True)
+    assert main.cache_service.stale_hits == before + 2
@@ -0,0 +1,64 @@
+import types
+
+import pytest
+
+import cache_stats
+import main
+from cache_stats import StatsRecorder
+
+MINUTE = 29_000_000
+
+@pytest.fixture
+def recorder(app_client, call, monkeypatch):
+    """A stats recorder of its own on the shared Redis, with a settable clock"""
+    clock = types.SimpleNamespace(now=MINUTE * 60)
+    monkeypatch.setattr(cache_stats, "time", types.SimpleNamespace(time=lambda: clock.now))
+    stats = StatsRecorder(main.cache_service.redis_client, prefix="stats-test")
+    stats.clock = clock
+    yield stats
+    keys = call(main.cache_service.redis_client.keys, "stats-test:*")
+    if keys:
+        call(main.cache_service.redis_client.delete, *keys)
+
+def record_at(call, recorder, minute: int, endpoint: str, family: str, hits: int, misses: int):
+    recorder.clock.now = minute * 60
+    recorder.record(endpoint, family, True, hits)
+    recorder.record(endpoint, family, False, misses)
+    assert call(recorder.flush)
+
+def test_windows_count_only_their_minutes(recorder, call):
+    record_at(call, recorder, MINUTE - 10, "GET /products/{id}", "product:*", 6, 2)
+    record_at(call, recorder, MINUTE - 3, "GET /products/{id}", "product:*", 3, 1)
+    record_at(call, recorder, MINUTE - 3, "GET /products", "products:catalog", 0, 4)
+    record_at(call, recorder, MINUTE, "GET /products", "products:catalog", 1, 0)
+
+    recorder.clock.now = MINUTE * 60 + 30
+    stats = call(recorder.get_stats)
+    assert stats["windows"] == {
+        "1m": {"hits": 1, "misses": 0, "hit_rate": 100.0, "requests_per_second": round(1 / 30, 3)},
+        "5m": {"hits": 4, "misses": 5, "hit_rate": 44.44, "requests_per_second": round(9 / 270, 3)},
+        "15m": {"hits": 10, "misses": 7, "hit_rate": 58.82, "requests_per_second": round(17 / 870, 3)},
+    }
+
+    # Totals cover everything ever recorded, by family and endpoint
+    assert (stats["hits"], stats["misses"], stats["total_requests"]) == (10, 7, 17)
+    assert stats["by_family"] == {
+        "product:*": {"hits": 9, "misses": 3, "hit_rate": 75.0},
+        "products:catalog": {"hits": 1, "misses": 4, "hit_rate": 20.0},
+    }
+    assert stats["by_endpoint"]["GET /products"] == {"hits": 1, "misses": 4, "hit_rate": 20.0}
+
+    # Minutes older than the widest window drop out of every window
+    recorder.clock.now = (MINUTE + 20) * 60
+    stats = call(recorder.get_stats)
+    assert all(window["hits"] + window["misses"] == 0 for window in stats["windows"].values())
+    assert stats["total_requests"] == 17
+
+def test_unflushed_counts_are_kept_when_redis_fails(recorder, call, redis_server):
+    recorder.record("GET /products", "products:catalog", True, 2)
+    redis_server.connected = False
+    try:
+        assert call(recorder.flush) is False
+    finally:
+        redis_server.connected = True
+    assert call(recorder.get_stats)["total_requests"] == 2
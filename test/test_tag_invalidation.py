@@ -0,0 +1,36 @@
+from test.conftest import new_product
+
+def category_listing(client, category):
+    response = client.get(f"/categories/{category}/products").json()
+    return response["source"], [product["name"] for product in response["products"]]
+
+def search(client, query):
+    response = client.get("/products/search", params={"q": query}).json()
+    return response["source"], [product["name"] for product in response["products"]]
+
+def test_writes_drop_only_their_category_listings(client):
+    new_product(client, name="Kettle", category="Kitchen")
+    new_product(client, name="Drill", category="Tools")
+    category_listing(client, "Kitchen")
+    category_listing(client, "Tools")
+
+    new_product(client, name="Toaster", category="Kitchen")
+    assert category_listing(client, "Kitchen") == ("database", ["Kettle", "Toaster"])
+    assert category_listing(client, "Tools") == ("cache", ["Drill"])
+
+def test_updates_drop_the_old_and_new_category_listings(client):
+    product = new_product(client, name="Lamp", category="Lighting")
+    category_listing(client, "Lighting")
+    category_listing(client, "Garden")
+
+    body = {"name": "Lamp", "price": 10, "category": "Garden"}
+    assert client.put(f"/products/{product['id']}", json=body).status_code == 200
+    assert category_listing(client, "Lighting") == ("database", [])
+    assert category_listing(client, "Garden") == ("database", ["Lamp"])
+
+def test_writes_drop_searches_that_match_only_part_of_a_word(client):
+    assert search(client, "dry") == ("database", [])
+    assert search(client, "dry")[0] == "cache"
+
+    new_product(client, name="Sundry goods")
+    assert search(client, "dry") == ("database", ["Sundry goods"])
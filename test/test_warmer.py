@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+import main
+from cache_warmer import CacheWarmer, HOT_PRODUCTS_KEY, REFRESH_LOCK_KEY
+from catalog_cache import CatalogCache
+from test.conftest import wait_for
+
+PRODUCTS = {product_id: {"id": product_id, "name": f"Warm {product_id}"} for product_id in range(1, 6)}
+
+async def fetch_page(limit, cursor=None):
+    ids = sorted(product_id for product_id in PRODUCTS if product_id > (cursor or 0))[:limit]
+    return [PRODUCTS[product_id] for product_id in ids], (ids[-1] if len(ids) == limit else None)
+
+async def fetch_products(ids):
+    return [PRODUCTS[product_id] for product_id in ids if product_id in PRODUCTS]
+
+@pytest.fixture
+def warmers(cache_services, call):
+    """Build CacheWarmers over a cache service of their own, stopped afterwards"""
+    service = cache_services(CACHE_KEY_PREFIX="warmer")
+    built = []
+
+    def build(**options):
+        warmer = CacheWarmer(service, CatalogCache(service), fetch_page, fetch_products, expire=600, **options)
+        built.append(warmer)
+        return warmer
+
+    yield build
+    for warmer in built:
+        call(warmer.stop)
+    call(service.redis_client.delete, service.shared_key(HOT_PRODUCTS_KEY))
+
+def test_ready_only_after_background_warm_up(client, call, monkeypatch):
+    released = []
+
+    async def gated_fetch_page(limit, cursor=None):
+        while not released:
+            await asyncio.sleep(0.01)
+        return await main.fetch_products_page(limit, cursor)
+
+    warmer = CacheWarmer(main.cache_service, main.catalog_cache, gated_fetch_page, main.fetch_products_by_ids, top_n=0)
+    monkeypatch.setattr(main, "cache_warmer", warmer)
+    call(main.catalog_cache.invalidate)
+    call(warmer.start)
+    try:
+        assert client.get("/ready").status_code == 503
+        assert client.get("/health").status_code == 200
+        released.append(True)
+        wait_for(lambda: client.get("/ready").status_code == 200)
+        assert client.get("/products", params={"limit": 1}).json()["source"] == "cache"
+    finally:
+        released.append(True)
+        call(warmer.stop)
+
+def test_hot_products_rank_by_reads_and_decay(warmers, call):
+    warmer = warmers(top_n=2, decay_interval=60)
+    for product_id, reads in ((1, 1), (2, 8), (3, 4)):
+        warmer.record(product_id, reads)
+    assert call(warmer.flush)
+    assert call(warmer.hot_product_ids) == [2, 3]
+
+    # Scores halve once per decay interval and drop out below 0.5
+    call(warmer._decay)
+    call(warmer._decay)
+    scores = dict(call(warmer.redis_client.zrange, warmer.hot_products_key, 0, -1, withscores=True))
+    assert scores == {b"1": 0.5, b"2": 4.0, b"3": 2.0}
+    call(warmer.redis_client.delete, warmer.decay_marker_key)
+    call(warmer._decay)
+    scores = dict(call(warmer.redis_client.zrange, warmer.hot_products_key, 0, -1, withscores=True))
+    assert scores == {b"2": 2.0, b"3": 1.0}
+
+    warmer.record(1, 5)
+    assert call(warmer.flush)
+    assert call(warmer.hot_product_ids) == [1, 2]
+
+def test_refresh_ahead_reloads_expiring_hot_products_once_per_round(warmers, call):
+    first, second = warmers(interval=0.3, refresh_ahead=60), warmers(interval=0.3, refresh_ahead=60)
+    service = first.cache_service
+    for product_id in (1, 2, 3):
+        first.record(product_id, 4 - product_id)
+    first.record(99)
+    assert call(first.flush)
+    assert call(service.set, "product:1", PRODUCTS[1], 5)
+    assert call(service.set, "product:2", PRODUCTS[2], 3600)
+
+    # One worker per round holds the refresh lock
+    assert call(first._acquire_round) is True
+    assert call(second._acquire_round) is False
+    assert call(service.redis_client.pttl, service.shared_key(REFRESH_LOCK_KEY)) > 0
+
+    # Products expiring within refresh_ahead (1) or missing (3) are reloaded,
+    # deleted ones (99) leave the ranking
+    assert call(first._refresh, call(first.hot_product_ids), first.refresh_ahead) == 2
+    assert call(service.redis_client.ttl, service.key("product:1")) > 60
+    assert call(service.get, "product:3") == PRODUCTS[3]
+    assert call(first.hot_product_ids) == [1, 2, 3]
+
+    call(first.start)
+    call(second.start)
+    wait_for(lambda: first.ready and second.ready)
+    assert call(service.set, "product:1", PRODUCTS[1], 5)
+    wait_for(lambda: first.refreshed_ahead + second.refreshed_ahead >= 1)
+    assert call(service.redis_client.ttl, service.key("product:1")) > 60